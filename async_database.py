@@ -0,0 +1,103 @@
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """在后台线程中执行数据库操作，避免阻塞 Tk 主循环
+
+    所有任务由同一个后台线程按提交顺序执行，因此对同一条记录的写操作保持先后顺序。
+    任务完成后结果放入队列，由主线程通过 root.after 定时取出并调用回调函数，
+    回调总是在 Tk 主线程中执行，可以直接操作界面。数据变更通知（subscribe）也同样转到主线程处理。
+    """
+    def __init__(self, db, root, poll_interval=20):
+        self.db = db
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-worker')
+        self._done = queue.Queue()
+        self._events = queue.Queue()
+        self._subscriptions = 0
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, func, *args, callback=None, errback=None, **kwargs):
+        """提交后台任务
+
+        func 可以是 Database 的方法名，也可以是以 db 为第一个参数的函数。
+        callback(result) 在成功时调用，errback(exception) 在出错时调用，都在主线程中执行。
+        """
+        future = self._executor.submit(self._run, func, args, kwargs)
+        future.add_done_callback(lambda f: self._done.put((f, callback, errback)))
+        self._pending += 1
+        self._start_polling()
+        return future
+
+    def subscribe(self, callback):
+        """在主线程中接收数据变更通知，返回取消注册的函数（必须在主线程中调用）"""
+        def forward(change):
+            self._events.put((callback, change))
+
+        unsubscribe_db = self.db.subscribe(forward)
+        self._subscriptions += 1
+        self._start_polling()
+
+        def unsubscribe():
+            nonlocal unsubscribe_db
+            if unsubscribe_db is not None:
+                unsubscribe_db()
+                unsubscribe_db = None
+                self._subscriptions -= 1
+        return unsubscribe
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _run(self, func, args, kwargs):
+        # 只在后台线程中访问数据库，主线程的查询也通过 submit 提交：主线程不会被阻塞，
+        # 但查询与其他任务按提交顺序执行，排在耗时的任务（如保存、大范围查询）之后时要等它完成才有结果
+        if isinstance(func, str):
+            return getattr(self.db, func)(*args, **kwargs)
+        return func(self.db, *args, **kwargs)
+
+    def _poll(self):
+        """在主线程中处理变更通知和已完成的任务"""
+        # 任务执行过程中产生的通知总是先于任务完成入队，先处理通知，任务回调看到的界面就是最新的
+        while True:
+            try:
+                callback, change = self._events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("变更通知处理出错")
+
+        while True:
+            try:
+                future, callback, errback = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            exc = future.exception()
+            if exc is not None:
+                if errback:
+                    errback(exc)
+                else:
+                    logger.error("后台数据库操作出错", exc_info=exc)
+            elif callback:
+                callback(future.result())
+
+        # 有订阅者时一直轮询，否则只在有未完成的任务时轮询
+        if self._pending or self._subscriptions:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self, wait=True):
+        """等待已提交的任务完成后关闭后台线程"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,71 @@
+"""主键查找性能测试
+
+分别在 1k、10k、100k、1M 个物品的数据库上测量 get_item、get_user、get_item_type、
+update_item、delete_item 的平均耗时。使用哈希索引后各规模下的耗时应基本持平。
+
+    python -m benchmarks.bench_lookup [--sizes 1000,10000,100000,1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from database import Database
+from models import User, ItemType, Item
+
+OPERATIONS = 1000
+
+
+def build_database(db_file, size):
+    """构造包含 size 个物品的数据库（只写内存，不落盘）"""
+    db = Database(db_file)
+    db._apply({'op': 'add_user', 'user': User('owner', 'pw', '测试', '地址', '1', 'a@b.c').to_dict()})
+    db._apply({'op': 'add_item_type', 'item_type': ItemType('书籍', ['作者']).to_dict()})
+    for i in range(size):
+        item = Item(f'物品{i}', '描述', '地址', '1', 'a@b.c', '书籍', 'owner', id=str(i))
+        db._apply({'op': 'add_item', 'item': item.to_dict()})
+    return db
+
+
+def timed(func, args_list):
+    """返回每次调用的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def run(size):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_database(os.path.join(tmp, 'database.json'), size)
+        # 测试期间不触发快照压缩，只计算索引和追加日志的开销
+        db.compact_threshold = float('inf')
+        ids = [str(i) for i in random.sample(range(size), OPERATIONS)]
+        
+        result = {
+            'get_item': timed(db.get_item, [(i,) for i in ids]),
+            'get_user': timed(db.get_user, [('owner',)] * OPERATIONS),
+            'get_item_type': timed(db.get_item_type, [('书籍',)] * OPERATIONS),
+            'update_item': timed(db.update_item, [(i, {'address': '新地址'}) for i in ids]),
+            'delete_item': timed(db.delete_item, [(i,) for i in ids]),
+        }
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='主键查找性能测试')
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                        help='物品数量列表，逗号分隔')
+    args = parser.parse_args()
+    
+    sizes = [int(s) for s in args.sizes.split(',')]
+    print(f"{'物品数':>10} {'get_item':>10} {'get_user':>10} {'get_type':>10} {'update':>10} {'delete':>10}  (微秒/次)")
+    for size in sizes:
+        r = run(size)
+        print(f"{size:>10} {r['get_item']:>10.2f} {r['get_user']:>10.2f} {r['get_item_type']:>10.2f} "
+              f"{r['update_item']:>10.2f} {r['delete_item']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""内存占用测试
+
+比较 1M 个物品分别以字典和 __slots__ 对象（models.Item）保存时的常驻内存（RSS）增量，
+并确认 Database.get_items 返回的结果与写入的数据一致。每种方式在独立的子进程中测量。
+
+    python -m benchmarks.bench_memory [--size 1000000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from database import Database
+from models import Item
+
+
+def make_item(i):
+    return Item(f'物品{i}', f'九成新的二手物品，编号{i}', '闵行校区东川路800号', '13800000000',
+                'owner@example.com', '书籍', 'owner', {'作者': '佚名', '出版社': '出版社'}, id=str(i))
+
+
+def rss_kb():
+    """当前进程的常驻内存（KB）"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def measure(mode, size):
+    """在当前进程中构造 size 个物品，返回 RSS 增量（KB）"""
+    before = rss_kb()
+    if mode == 'dict':
+        store = {str(i): make_item(i).to_dict() for i in range(size)}
+    else:
+        store = {str(i): make_item(i) for i in range(size)}
+    after = rss_kb()
+    del store
+    return after - before
+
+
+def check_output(size=1000):
+    """确认 get_items 的输出与写入的字典完全相同"""
+    expected = [make_item(i).to_dict() for i in range(size)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'database.json'))
+        with db.batch():
+            for i in range(size):
+                db.add_item(make_item(i))
+        # 物品延迟加载，重新加载的数据库第一次查询时才读取物品文件，必须在临时目录删除之前比较
+        reloaded = Database(os.path.join(tmp, 'database.json'))
+        return db.get_items() == expected and reloaded.get_items() == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description='内存占用测试')
+    parser.add_argument('--size', type=int, default=1000000, help='物品数量')
+    parser.add_argument('--mode', choices=['dict', 'slots'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # 子进程：只输出测量结果
+        print(measure(args.mode, args.size))
+        return
+
+    results = {}
+    for mode in ('dict', 'slots'):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.bench_memory', '--size', str(args.size), '--mode', mode])
+        results[mode] = int(output.decode().strip().splitlines()[-1])
+
+    print(f"物品数: {args.size}")
+    print(f"字典保存:    {results['dict'] / 1024:10.1f} MB")
+    print(f"__slots__:   {results['slots'] / 1024:10.1f} MB")
+    print(f"节省:        {(1 - results['slots'] / results['dict']) * 100:10.1f} %")
+    print(f"get_items 输出一致: {check_output()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""密码哈希代价测试
+
+对一组 scrypt 参数 N 分别测量计算哈希、验证密码（不使用缓存，即第一次登录）和命中缓存的验证（再次登录）
+的耗时，以及每次计算使用的内存，并给出验证耗时不超过目标（--target-ms）的最大 N。
+在部署的机器上运行，把结果设置为环境变量 ITEM_DB_SCRYPT_N（r、p 同理）。
+
+    python -m benchmarks.bench_password [--target-ms 100] [--n 4096,8192,16384,32768,65536,131072] [--r 8] [--p 1]
+"""
+import argparse
+import time
+
+from passwords import PasswordHasher, hasher as default_hasher
+
+
+def median_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def measure(n, r, p, repeat):
+    """返回 (哈希耗时, 验证耗时, 缓存验证耗时)，单位为毫秒，均为中位数"""
+    hasher = PasswordHasher(n=n, r=r, p=p)
+    stored = hasher.hash('correct horse battery staple')
+
+    def verify_uncached():
+        hasher.clear_cache()
+        hasher.verify('correct horse battery staple', stored)
+
+    hash_ms = median_ms(lambda: hasher.hash('correct horse battery staple'), repeat)
+    verify_ms = median_ms(verify_uncached, repeat)
+    hasher.verify('correct horse battery staple', stored)
+    cached_ms = median_ms(lambda: hasher.verify('correct horse battery staple', stored), repeat)
+    return hash_ms, verify_ms, cached_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='密码哈希代价测试')
+    parser.add_argument('--target-ms', type=float, default=100, help='验证一次密码的目标耗时上限（毫秒）')
+    parser.add_argument('--n', default='4096,8192,16384,32768,65536,131072', help='scrypt 的 N，逗号分隔，必须是 2 的幂')
+    parser.add_argument('--r', type=int, default=8, help='scrypt 的 r')
+    parser.add_argument('--p', type=int, default=1, help='scrypt 的 p')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数，取中位数')
+    args = parser.parse_args()
+
+    print(f"当前参数: N={default_hasher.n} r={default_hasher.r} p={default_hasher.p}")
+    print(f"{'N':>8} {'内存(MB)':>10} {'哈希(ms)':>10} {'验证(ms)':>10} {'缓存验证(ms)':>14}")
+    best = None
+    for n in (int(value) for value in args.n.split(',')):
+        hash_ms, verify_ms, cached_ms = measure(n, args.r, args.p, args.repeat)
+        memory_mb = 128 * n * args.r / 1024 / 1024
+        print(f"{n:>8} {memory_mb:>10.1f} {hash_ms:>10.2f} {verify_ms:>10.2f} {cached_ms:>14.4f}")
+        if verify_ms <= args.target_ms and (best is None or n > best):
+            best = n
+
+    if best is None:
+        print(f"没有参数能在 {args.target_ms:g}ms 内完成验证，请减小 N 或 r")
+    else:
+        print(f"验证耗时不超过 {args.target_ms:g}ms 的最大 N 为 {best}，"
+              f"设置环境变量 ITEM_DB_SCRYPT_N={best} ITEM_DB_SCRYPT_R={args.r} ITEM_DB_SCRYPT_P={args.p}")
+
+
+if __name__ == '__main__':
+    main()
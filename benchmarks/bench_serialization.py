@@ -0,0 +1,62 @@
+"""数据文件读写性能测试
+
+在 10k、100k、1M 个物品的数据上，分别测量原来的缩进格式（标准库 json）、紧凑格式（标准库 json）
+以及紧凑格式（orjson，如已安装）的保存时间、加载时间和文件大小。
+
+    python -m benchmarks.bench_serialization [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from models import User, ItemType, Item
+from serialization import JSONSerializer, orjson
+
+
+def make_data(size):
+    return {
+        'users': [User('owner', 'pw', '测试用户', '闵行校区', '13800000000', 'owner@example.com').to_dict()],
+        'item_types': [ItemType('书籍', ['作者', '出版社', '出版日期']).to_dict()],
+        'items': [Item(f'物品{i}', f'九成新的二手物品，编号{i}', '闵行校区东川路800号', '13800000000',
+                       'owner@example.com', '书籍', 'owner',
+                       {'作者': '佚名', '出版社': '出版社', '出版日期': '2020-01-01'}, id=str(i)).to_dict()
+                  for i in range(size)],
+        'journal_seq': 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据文件读写性能测试')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='物品数量列表，逗号分隔')
+    args = parser.parse_args()
+
+    serializers = [
+        ('json 缩进', JSONSerializer(compact=False, use_orjson=False)),
+        ('json 紧凑', JSONSerializer(compact=True, use_orjson=False)),
+    ]
+    if orjson is not None:
+        serializers.append(('orjson 紧凑', JSONSerializer(compact=True, use_orjson=True)))
+    else:
+        print("未安装 orjson，跳过 orjson 测试")
+
+    print(f"{'物品数':>8} {'格式':<12} {'保存(秒)':>9} {'加载(秒)':>9} {'大小(MB)':>9}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        data = make_data(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'database.json')
+            for name, serializer in serializers:
+                start = time.perf_counter()
+                written = serializer.write_atomic(path, data)
+                save_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                loaded = serializer.read(path)
+                load_time = time.perf_counter() - start
+                assert len(loaded['items']) == size
+
+                print(f"{size:>8} {name:<12} {save_time:>9.3f} {load_time:>9.3f} {written / 1024 / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
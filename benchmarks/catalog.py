@@ -0,0 +1,112 @@
+"""测试数据生成
+
+按给定的规模和随机种子生成用户、物品类型和物品，同样的参数总是生成完全相同的数据（包括物品ID和
+用户的密码哈希，哈希使用固定的盐，在同样的 ITEM_DB_SCRYPT_* 设置下不变），不同版本之间的测试结果可以直接比较。文本混合中文和 ASCII，物品带有所属类型的额外属性。
+
+    from benchmarks.catalog import generate_catalog
+    catalog = generate_catalog(items=10000, users=100, seed=0)
+"""
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from ids import id_floor
+from models import User, ItemType, Item
+from passwords import hasher
+
+Catalog = namedtuple('Catalog', ['users', 'item_types', 'items'])
+
+ITEM_TYPES = [
+    ('书籍', ['作者', '出版社', 'ISBN']),
+    ('电子产品', ['品牌', '型号', '序列号']),
+    ('家具', ['材质', '尺寸', '颜色']),
+    ('衣物', ['尺码', '材质', '品牌']),
+    ('工具', ['品牌', '使用年限', '功能']),
+    ('其他', []),
+]
+# 有值类型的属性（其余为文本）
+ATTRIBUTE_TYPES = {'工具': {'使用年限': 'number'}}
+
+# 各类型物品名称的组成部分
+NOUNS = {
+    '书籍': ['高等数学', '线性代数', '算法导论', '红楼梦', '英语词汇', 'Python编程', 'C++ Primer', '概率论'],
+    '电子产品': ['台灯', '耳机', '键盘', '显示器', 'iPad', '路由器', '充电宝', 'Kindle'],
+    '家具': ['书桌', '椅子', '书架', '床垫', '衣柜', '鞋架'],
+    '衣物': ['羽绒服', '卫衣', 'T恤', '运动鞋', '围巾', '外套'],
+    '工具': ['螺丝刀', '电钻', '扳手', '卷尺', '自行车打气筒'],
+    '其他': ['自行车', '雨伞', '篮球', '吉他', '绿植', '收纳箱'],
+}
+ADJECTIVES = ['九成新', '八成新', '全新', '二手', '闲置', '几乎没用过', 'used', 'like new']
+CAMPUSES = ['闵行校区', '徐汇校区', '长宁校区', '黄浦校区']
+DORMS = ['东区', '西区', '南区', '北区']
+ASCII_WORDS = ['good', 'cheap', 'free', 'pickup', 'sjtu', 'box', 'black', 'white', 'blue', 'large', 'small']
+ATTRIBUTE_VALUES = {
+    '作者': ['佚名', '曹雪芹', 'Cormen', 'Stroustrup', '同济大学数学系'],
+    '出版社': ['高等教育出版社', '机械工业出版社', '人民文学出版社', "O'Reilly"],
+    '品牌': ['联想', '小米', '华为', 'Apple', '宜家', 'Bosch', 'Nike'],
+    '材质': ['实木', '金属', '棉', '涤纶', '塑料'],
+    '颜色': ['黑色', '白色', '原木色', 'blue'],
+    '尺码': ['S', 'M', 'L', 'XL', '42'],
+}
+
+# 测试用户密码哈希的盐，固定以使生成的数据可重复（真实用户的盐总是随机的）
+PASSWORD_SALT = b'benchmark-salt--'
+
+# 物品ID从这个时间开始，每个物品间隔一毫秒，与 ids.new_id 的格式相同
+ID_START = datetime(2024, 9, 1, 8, 0, 0, tzinfo=timezone.utc)
+
+
+def _attribute_value(rng, attr, index):
+    values = ATTRIBUTE_VALUES.get(attr)
+    if values:
+        return rng.choice(values)
+    if attr == '使用年限':
+        # 不消耗随机数，其余数据与没有数字属性时相同
+        return f'{index % 15}年'
+    return f'{attr}-{index % 997}'
+
+
+def generate_catalog(items=10000, users=100, seed=0):
+    """生成测试数据，返回 Catalog(用户列表, 物品类型列表, 物品列表)，元素为 models 中的对象"""
+    rng = random.Random(seed)
+    # 所有用户共用一个预先计算的密码哈希，添加用户时不必逐个计算 scrypt（密码都是 pw）
+    password = hasher.hash('pw', salt=PASSWORD_SALT)
+    user_list = [
+        User(f'user{i:05d}', password, f'用户{i}', f'{rng.choice(CAMPUSES)}{rng.choice(DORMS)}{rng.randint(1, 40)}号楼',
+             f'138{rng.randrange(10 ** 8):08d}', f'user{i}@example.com', is_approved=True)
+        for i in range(users)
+    ]
+    item_types = [ItemType(name, list(attributes), ATTRIBUTE_TYPES.get(name)) for name, attributes in ITEM_TYPES]
+
+    item_list = []
+    node = seed % 100000
+    for i in range(items):
+        item_type = item_types[rng.randrange(len(item_types))]
+        owner = user_list[rng.randrange(users)]
+        noun = rng.choice(NOUNS[item_type.name])
+        name = f'{rng.choice(ADJECTIVES)}{noun}'
+        description = (f'{rng.choice(ADJECTIVES)}，{rng.choice(ASCII_WORDS)} {rng.choice(ASCII_WORDS)}，'
+                       f'编号{i}，{rng.choice(["可小刀", "自取", "送货上门", "面交"])}')
+        moment = ID_START + timedelta(milliseconds=i)
+        item_list.append(Item(
+            name=name,
+            description=description,
+            address=f'{rng.choice(CAMPUSES)}{rng.choice(DORMS)}',
+            contact_phone=owner.phone,
+            contact_email=owner.email,
+            item_type=item_type.name,
+            user=owner.username,
+            extra_attributes={attr: _attribute_value(rng, attr, i) for attr in item_type.attributes},
+            id=f'{id_floor(moment)}000{node:05d}'
+        ))
+    return Catalog(user_list, item_types, item_list)
+
+
+def attribute_filters():
+    """属性筛选测试使用的条件：等值、窄范围和宽范围"""
+    return ['使用年限=3', '使用年限<2', '使用年限>=5']
+
+
+def search_keywords():
+    """关键字搜索测试使用的关键字：单字、常见词、较少见的词、ASCII 词和不存在的词"""
+    return ['书', '九成新', '闵行校区', '算法导论', '自行车打气筒', 'ipad', 'cheap', '编号12', '不存在的物品']
@@ -0,0 +1,161 @@
+"""HTTP 接口压力测试
+
+在临时数据文件上生成测试数据，启动 server.py 子进程，再用多个并发客户端（asyncio，保持连接）
+按比例发送关键字搜索、按ID查询和添加物品请求，输出各类请求的 p50/p99 延迟和每秒请求数。
+
+    python -m benchmarks.load_test [--items 20000] [--clients 32] [--duration 10] [--write-ratio 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from database import Database
+from models import User, ItemType, Item
+
+KEYWORDS = ['九成新', '教材', '闵行', '台灯', '数学', 'python', '自行车', '编号1']
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(path, size):
+    db = Database(path)
+    with db.batch():
+        db.add_user(User('owner', 'pw', '测试用户', '闵行校区', '13800000000', 'owner@example.com',
+                         is_approved=True))
+        db.add_item_type(ItemType('书籍', ['作者']))
+        rng = random.Random(0)
+        for i in range(size):
+            db.add_item(Item(f'{rng.choice(KEYWORDS)}物品{i}', f'九成新的二手物品，编号{i}', '闵行校区东川路800号',
+                             '13800000000', 'owner@example.com', '书籍', 'owner', {'作者': '佚名'}))
+    db.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Client:
+    """保持连接的简单 HTTP 客户端"""
+    def __init__(self, port):
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n'
+                          f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_load(port, clients, duration, write_ratio):
+    probe = Client(port)
+    _, page = await probe.request('GET', '/items?limit=1000')
+    item_ids = [item['id'] for item in page['items']]
+    probe.close()
+
+    latencies = {'search': [], 'get': [], 'add': []}
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        client = Client(port)
+        try:
+            while time.perf_counter() < deadline:
+                r = rng.random()
+                if r < write_ratio:
+                    kind = 'add'
+                    args = ('POST', '/items', {'name': f'压测物品{rng.randrange(10 ** 6)}', 'item_type': '书籍',
+                                               'user': 'owner', 'description': '压测', 'address': '闵行'})
+                elif r < write_ratio + (1 - write_ratio) * 0.3:
+                    kind = 'get'
+                    args = ('GET', f'/items/{rng.choice(item_ids)}')
+                else:
+                    kind = 'search'
+                    keyword = rng.choice(KEYWORDS)
+                    args = ('GET', f'/items?keyword={quote(keyword)}&limit=20')
+                start = time.perf_counter()
+                status, _ = await client.request(*args)
+                latencies[kind].append(time.perf_counter() - start)
+                if status >= 400:
+                    errors += 1
+        finally:
+            client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP 接口压力测试')
+    parser.add_argument('--items', type=int, default=20000, help='预先生成的物品数')
+    parser.add_argument('--clients', type=int, default=32, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10, help='测试时长（秒）')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='添加物品请求的比例')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'database.json')
+        seed(path, args.items)
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(PROJECT_DIR, 'server.py'), '--db', path,
+                                   '--port', str(port)], cwd=PROJECT_DIR, stdout=subprocess.DEVNULL)
+        try:
+            # 等待服务启动
+            for _ in range(300):
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            latencies, errors, elapsed = asyncio.run(run_load(port, args.clients, args.duration, args.write_ratio))
+        finally:
+            server.terminate()
+            server.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"物品数: {args.items}, 并发客户端: {args.clients}, 时长: {elapsed:.1f} 秒, 错误: {errors}")
+    print(f"{'请求':<8} {'次数':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'每秒':>8}")
+    for kind, values in latencies.items():
+        print(f"{kind:<8} {len(values):>8} {percentile(values, 0.5) * 1000:>9.2f} "
+              f"{percentile(values, 0.99) * 1000:>9.2f} {len(values) / elapsed:>8.0f}")
+    every = [v for values in latencies.values() for v in values]
+    print(f"{'合计':<8} {total:>8} {percentile(every, 0.5) * 1000:>9.2f} "
+          f"{percentile(every, 0.99) * 1000:>9.2f} {total / elapsed:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
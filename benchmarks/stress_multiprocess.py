@@ -0,0 +1,182 @@
+"""多进程并发写入压力测试
+
+启动 N 个进程同时打开同一个 JSON 数据文件，各自随机添加、修改、删除自己的物品（其间穿插批处理、
+同步和压缩），全部结束后重新加载数据文件，检查每个进程的最后状态是否都被保留，即没有丢失的修改。
+各进程还会修改、删除同一组共享物品，制造多个进程修改同一记录的冲突（Database._merge）：每个进程记下
+自己的每次共享修改在日志中的序号，最后把所有进程的共享修改按序号依次重放，结果应与数据文件中的一致，
+也应与每个进程在全部结束后同步得到的内存数据一致（合并错误的进程内存与日志不符，之后写入的快照就会出错）。
+
+    python -m benchmarks.stress_multiprocess [--processes 8] [--ops 500] [--compact-threshold 50]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from database import Database
+from models import ItemType, Item
+
+SHARED_ITEMS = 20
+SHARED_FIELDS = ('name', 'description', 'address')
+
+
+def shared_id(i):
+    return f'shared-{i:02d}'
+
+
+def shared_op(rng, db, index, done):
+    """修改（偶尔删除）一个共享物品，返回 (物品ID, 修改的字段)，删除时字段为 None；没有写入日志时返回 None"""
+    item_id = shared_id(rng.randrange(SHARED_ITEMS))
+    if rng.random() < 0.01:
+        return (item_id, None) if db.delete_item(item_id) else None
+    data = {rng.choice(SHARED_FIELDS): f'p{index}-{done}'}
+    return (item_id, data) if db.update_item(item_id, data) else None
+
+
+def worker(index, path, ops, compact_threshold, barrier, results):
+    rng = random.Random(index)
+    db = Database(path, compact_threshold=compact_threshold)
+    expected = {}  # 本进程的物品ID -> 最后写入的名称
+    shared_log = []  # (日志序号, 物品ID, 修改的字段)，本进程对共享物品的修改
+    barrier.wait()
+
+    done = 0
+    while done < ops:
+        action = rng.random()
+        if action < 0.1:
+            # 批处理中的多条修改一次写入，按顺序占用日志中连续的序号
+            entries = []
+            with db.batch():
+                for _ in range(rng.randint(2, 5)):
+                    if rng.random() < 0.4:
+                        op = shared_op(rng, db, index, done)
+                        if op is not None:
+                            entries.append(op)
+                    else:
+                        item = Item(f'p{index}-{done}', '批量添加', '闵行校区', '13800000000', 'a@example.com',
+                                    '书籍', f'user{index}')
+                        db.add_item(item)
+                        expected[item.id] = item.name
+                        entries.append(None)
+                    done += 1
+                    # 批处理期间让出 CPU，其他进程在这时写入同一记录就会产生冲突
+                    time.sleep(0.0005)
+            first_seq = db.version - len(entries) + 1
+            shared_log.extend((first_seq + i, *op) for i, op in enumerate(entries) if op is not None)
+            continue
+        if action < 0.15:
+            db.sync()
+        elif action < 0.35:
+            # 批处理之外的修改立即写入，写入后的版本号就是它的序号（写入和压缩时持有文件锁，其间没有其他进程写入）
+            op = shared_op(rng, db, index, done)
+            if op is not None:
+                shared_log.append((db.version, *op))
+        elif action < 0.7 or not expected:
+            item = Item(f'p{index}-{done}', '压力测试', '闵行校区', '13800000000', 'a@example.com',
+                        '书籍', f'user{index}')
+            db.add_item(item)
+            expected[item.id] = item.name
+        elif action < 0.85:
+            item_id = rng.choice(list(expected))
+            name = f'{item_id}-v{done}'
+            db.update_item(item_id, {'name': name})
+            expected[item_id] = name
+        else:
+            item_id = rng.choice(list(expected))
+            db.delete_item(item_id)
+            del expected[item_id]
+        done += 1
+
+    db.close()
+    # 等所有进程写完，再读取其他进程的修改，比较内存中的共享物品
+    barrier.wait()
+    db.sync()
+    view = {item['id']: {field: item[field] for field in SHARED_FIELDS}
+            for item in db.get_items(user='shared')}
+    results.put((index, expected, db.conflicts, shared_log, view))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程并发写入压力测试')
+    parser.add_argument('--processes', type=int, default=8, help='进程数')
+    parser.add_argument('--ops', type=int, default=500, help='每个进程的操作数')
+    parser.add_argument('--compact-threshold', type=int, default=50, help='日志压缩阈值，取小值以便频繁压缩')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'database.json')
+        setup = Database(path)
+        with setup.batch():
+            setup.add_item_type(ItemType('书籍', ['作者']))
+            for i in range(SHARED_ITEMS):
+                setup.add_item(Item(f'共享{i}', '共享物品', '闵行校区', '13800000000', 'a@example.com', '书籍',
+                                    'shared', id=shared_id(i)))
+        shared = {item['id']: {field: item[field] for field in SHARED_FIELDS} for item in setup.get_items()}
+
+        barrier = multiprocessing.Barrier(args.processes)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker,
+                                             args=(i, path, args.ops, args.compact_threshold, barrier, results))
+                     for i in range(args.processes)]
+        start = time.perf_counter()
+        for p in processes:
+            p.start()
+        outcomes = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        expected = {}
+        conflicts = 0
+        duplicates = 0
+        shared_log = []
+        views = []
+        for _, items, worker_conflicts, worker_shared_log, view in outcomes:
+            views.append(view)
+            # 各进程自动生成的物品ID不应重复
+            duplicates += len(expected.keys() & items.keys())
+            expected.update(items)
+            conflicts += worker_conflicts
+            shared_log.extend(worker_shared_log)
+
+        # 共享物品的修改按日志序号重放：对已删除物品的修改无效，同一字段以后写入的为准
+        shared_log.sort()
+        duplicate_seqs = len(shared_log) - len({seq for seq, _, _ in shared_log})
+        for _, item_id, data in shared_log:
+            if item_id not in shared:
+                continue
+            if data is None:
+                del shared[item_id]
+            else:
+                shared[item_id].update(data)
+
+        items = Database(path).get_items()
+        final = {item['id']: item['name'] for item in items if item['user'] != 'shared'}
+        final_shared = {item['id']: {field: item[field] for field in SHARED_FIELDS}
+                        for item in items if item['user'] == 'shared'}
+        shared_wrong = [item_id for item_id in shared.keys() | final_shared.keys()
+                        if shared.get(item_id) != final_shared.get(item_id)]
+        stale_views = sum(view != shared for view in views)
+        lost = [item_id for item_id in expected if item_id not in final]
+        wrong = [item_id for item_id in expected if item_id in final and final[item_id] != expected[item_id]]
+        extra = [item_id for item_id in final if item_id not in expected]
+
+    total_ops = args.processes * args.ops
+    print(f"进程数: {args.processes}, 每进程操作数: {args.ops}, 总耗时: {elapsed:.2f} 秒, "
+          f"吞吐: {total_ops / elapsed:.0f} 操作/秒")
+    print(f"最终物品数: {len(final)}, 预期: {len(expected)}, 冲突合并: {conflicts}")
+    print(f"丢失: {len(lost)}, 内容错误: {len(wrong)}, 多余（删除未生效）: {len(extra)}, 重复ID: {duplicates}")
+    print(f"共享物品修改: {len(shared_log)}, 剩余共享物品: {len(final_shared)}, "
+          f"与按日志顺序重放不一致: {len(shared_wrong)}, 内存数据不一致的进程: {stale_views}, "
+          f"重复序号: {duplicate_seqs}")
+    if lost or wrong or extra or duplicates or shared_wrong or stale_views or duplicate_seqs:
+        print("失败：存在丢失的修改")
+        sys.exit(1)
+    print("通过：没有丢失的修改")
+
+
+if __name__ == '__main__':
+    main()
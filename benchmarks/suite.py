@@ -0,0 +1,229 @@
+"""综合性能测试
+
+用 benchmarks.catalog 按固定的随机种子生成测试数据，在各个规模、各个存储后端上测量：批量添加、保存、加载、
+逐个添加、逐个删除、关键字搜索（首次建立索引、首次查询、重复查询）、按类型和按所有者筛选、按额外属性筛选、
+排序分页，
+以及把一页物品填入 Treeview（与 ItemResurrectionGUI.load_items 显示结果的方式相同，需要显示器，
+没有显示器时跳过，可以用 xvfb-run 运行）。
+
+结果输出为表格，并以 JSON 格式写入 --output 指定的文件；--baseline 指定以前的结果文件时同时列出耗时之比，
+用于比较不同版本。
+
+    python -m benchmarks.suite [--sizes 1000,10000,100000] [--backends json,sqlite] [--output results.json]
+    python -m benchmarks.suite --baseline results-old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.catalog import attribute_filters, generate_catalog, search_keywords
+from database import Database
+from models import Item
+
+BACKENDS = {'json': 'database.json', 'sqlite': 'database.db'}
+
+# 逐个添加、删除的次数
+SINGLE_OPS = 200
+PAGE_SIZE = 100
+
+
+class Recorder:
+    """记录各操作每次的耗时"""
+    def __init__(self, backend, size):
+        self.backend = backend
+        self.size = size
+        self.results = []
+
+    def measure(self, operation, func, calls=None):
+        """calls 为参数元组的列表，逐个调用 func 并分别计时；为 None 时只调用一次 func()"""
+        times = []
+        for args in (calls if calls is not None else [()]):
+            start = time.perf_counter()
+            func(*args)
+            times.append(time.perf_counter() - start)
+        self.add(operation, times)
+
+    def add(self, operation, times):
+        ordered = sorted(times)
+        self.results.append({
+            'backend': self.backend,
+            'size': self.size,
+            'operation': operation,
+            'count': len(times),
+            'total_s': round(sum(times), 6),
+            'mean_ms': round(sum(times) / len(times) * 1000, 4),
+            'p50_ms': round(ordered[len(ordered) // 2] * 1000, 4),
+            'max_ms': round(ordered[-1] * 1000, 4)
+        })
+
+
+def run_database(backend, size, seed, tmp, recorder, treeview=True):
+    """在一个规模、一个存储后端上测量各项操作；treeview 为 True 时同时测量 Treeview，返回其是否完成或跳过原因"""
+    catalog = generate_catalog(items=size, users=max(10, size // 100), seed=seed)
+    path = os.path.join(tmp, f'{size}-{BACKENDS[backend]}')
+
+    db = Database(path)
+    with db.batch():
+        for user in catalog.users:
+            db.add_user(user, hashed=True)
+        for item_type in catalog.item_types:
+            db.add_item_type(item_type)
+    recorder.measure('add_bulk', lambda: db.add_items(catalog.items))
+    recorder.measure('save', db.save_data)
+    db.close()
+
+    def load():
+        # JSON 存储包括读取物品文件
+        nonlocal db
+        db = Database(path)
+        db.count_items()
+    recorder.measure('load', load)
+
+    keywords = search_keywords()
+    recorder.measure('keyword_first_query', lambda: db.get_items_page(keyword='预热', limit=PAGE_SIZE))
+    recorder.measure('keyword_search', db.get_items_page, [(None, keyword, 0, PAGE_SIZE) for keyword in keywords])
+    recorder.measure('keyword_search_repeat', db.get_items_page,
+                     [(None, keyword, 0, PAGE_SIZE) for keyword in keywords])
+    recorder.measure('keyword_search_all', db.get_items, [(None, keyword) for keyword in keywords])
+
+    type_names = [item_type.name for item_type in catalog.item_types]
+    recorder.measure('type_page', db.get_items_page, [(name, None, 0, PAGE_SIZE) for name in type_names])
+    recorder.measure('type_all', db.get_items, [(name,) for name in type_names])
+    rng = random.Random(seed)
+    owners = [user.username for user in rng.sample(catalog.users, 10)]
+    recorder.measure('user_page', db.get_items_page, [(None, None, 0, PAGE_SIZE, owner) for owner in owners])
+    recorder.measure('type_keyword_user', db.get_items_page,
+                     [(rng.choice(type_names), rng.choice(keywords), 0, PAGE_SIZE, owner) for owner in owners])
+
+    filters = attribute_filters()
+    recorder.measure('attribute_first_query', lambda: db.get_items_page(limit=PAGE_SIZE, filters=filters[0]))
+    recorder.measure('attribute_page', db.get_items_page,
+                     [(None, None, 0, PAGE_SIZE, None, condition) for condition in filters])
+    recorder.measure('attribute_all', db.get_items, [(None, None, None, condition) for condition in filters])
+
+    recorder.measure('sorted_first_query', lambda: db.get_items_page(limit=PAGE_SIZE, order_by='name'))
+    recorder.measure('sorted_page', db.get_items_page,
+                     [(None, None, 0, PAGE_SIZE, None, None, field, descending)
+                      for field in ('id', 'name', 'address') for descending in (False, True)])
+    # 最新的 50 本书
+    recorder.measure('sorted_type_newest', db.get_items_page,
+                     [(name, None, 0, 50, None, None, 'id', True) for name in type_names])
+    recorder.measure('sorted_keyword_page', db.get_items_page,
+                     [(None, keyword, 0, PAGE_SIZE, None, None, 'name') for keyword in keywords])
+
+    template = catalog.items[0]
+    new_items = [Item(f'新增物品{i}', template.description, template.address, template.contact_phone,
+                      template.contact_email, template.item_type, template.user, dict(template.extra_attributes))
+                 for i in range(SINGLE_OPS)]
+    recorder.measure('add', db.add_item, [(item,) for item in new_items])
+    victims = rng.sample([item.id for item in catalog.items], min(SINGLE_OPS, size))
+    recorder.measure('delete', db.delete_item, [(item_id,) for item_id in victims])
+
+    status = 'ok'
+    if treeview:
+        try:
+            run_treeview(db, recorder)
+        except Exception as e:
+            # 没有显示器时 tkinter 无法创建窗口
+            status = f'skipped: {e}'
+    db.close()
+    return status
+
+
+def run_treeview(db, recorder):
+    """把物品页填入 Treeview：首次填入、翻到下一页、内容不变时刷新"""
+    import tkinter as tk
+    from tkinter import ttk
+    from gui import ItemResurrectionGUI, sync_tree_rows
+
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        tree = ttk.Treeview(root, columns=('ID', '名称', '类型', '联系人', '地址'), show='headings')
+        pages = [[(str(item['id']), ItemResurrectionGUI.item_values(item))
+                  for item in db.get_items_page(offset=offset, limit=PAGE_SIZE)[0]]
+                 for offset in (0, PAGE_SIZE)]
+
+        def fill(rows):
+            sync_tree_rows(tree, rows)
+            root.update_idletasks()
+
+        recorder.measure('treeview_fill', fill, [(pages[0],)])
+        recorder.measure('treeview_next_page', fill, [(pages[1],)])
+        recorder.measure('treeview_refresh', fill, [(pages[1],)])
+    finally:
+        root.destroy()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='综合性能测试')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='物品数量列表，逗号分隔')
+    parser.add_argument('--backends', default='json,sqlite', help=f"存储后端（{','.join(BACKENDS)}），逗号分隔")
+    parser.add_argument('--seed', type=int, default=0, help='生成测试数据的随机种子')
+    parser.add_argument('--output', default='benchmark-results.json', help='结果 JSON 文件')
+    parser.add_argument('--baseline', help='以前的结果 JSON 文件，列出与它的耗时之比')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    backends = [b.strip() for b in args.backends.split(',')]
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        parser.error(f"未知的存储后端: {', '.join(unknown)}")
+
+    meta = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'treeview': 'ok'
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            for size in sizes:
+                recorder = Recorder(backend, size)
+                status = run_database(backend, size, args.seed, tmp, recorder, meta['treeview'] == 'ok')
+                if status != 'ok':
+                    meta['treeview'] = status
+                results.extend(recorder.results)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = {(r['backend'], r['size'], r['operation']): r['mean_ms'] for r in json.load(f)['results']}
+
+    print(f"{'后端':<8}{'物品数':>9} {'操作':<24}{'次数':>6}{'平均(ms)':>12}{'中位(ms)':>12}{'最大(ms)':>12}"
+          + (f"{'对比基线':>10}" if baseline else ''))
+    for r in results:
+        line = (f"{r['backend']:<8}{r['size']:>9} {r['operation']:<24}{r['count']:>6}"
+                f"{r['mean_ms']:>12.3f}{r['p50_ms']:>12.3f}{r['max_ms']:>12.3f}")
+        old = baseline.get((r['backend'], r['size'], r['operation']))
+        if old:
+            line += f"{r['mean_ms'] / old:>9.2f}x"
+        print(line)
+    if meta['treeview'] != 'ok':
+        print(f"Treeview 测试: {meta['treeview']}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
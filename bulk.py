@@ -0,0 +1,264 @@
+"""物品批量导入导出
+
+从 CSV 或 JSONL（每行一个 JSON 对象）文件流式读取物品，逐条校验后分批添加，整个导入只写入一次数据文件；
+导出同样逐条写出，不会在内存中构造全部物品的列表。
+
+CSV 文件的第一行是列名：id（可省略，省略时自动生成）、name、description、address、contact_phone、
+contact_email、item_type、user，其余列都作为物品类型的额外属性。JSONL 中每行的字段与 Item.to_dict() 相同。
+
+    python bulk.py import donations.csv --user admin
+    python bulk.py export items.jsonl --type 书籍
+"""
+import argparse
+import csv
+import sys
+import time
+from collections import namedtuple
+
+from database import configure_logging, get_database
+from models import ATTRIBUTE_KINDS, Item, parse_attribute_value
+from serialization import JSONSerializer
+
+# 物品的基本字段，CSV 中其余的列是额外属性
+ITEM_FIELDS = ('id', 'name', 'description', 'address', 'contact_phone', 'contact_email', 'item_type', 'user')
+REQUIRED_FIELDS = ('name', 'item_type')
+FORMATS = ('csv', 'jsonl')
+
+# rejected 为 (行号, 原因) 的列表，seconds 为导入耗时
+ImportReport = namedtuple('ImportReport', ['imported', 'rejected', 'seconds'])
+
+
+def detect_format(path, fmt=None):
+    """根据参数或文件后缀确定格式，标准输入输出默认为 JSONL"""
+    if fmt:
+        return fmt
+    if path == '-':
+        return 'jsonl'
+    if path.lower().endswith('.csv'):
+        return 'csv'
+    if path.lower().endswith(('.jsonl', '.json')):
+        return 'jsonl'
+    raise ValueError(f"无法根据文件名判断格式，请指定格式（{'/'.join(FORMATS)}）: {path}")
+
+
+def read_records(path, fmt=None):
+    """逐条读取导入文件，生成 (行号, 记录字典)；无法解析的行记录为 None。path 为 '-' 时读取标准输入"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        # utf-8-sig 兼容 Excel 保存的带 BOM 的文件
+        f = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(f)
+            for row in reader:
+                record = {field: row[field] for field in ITEM_FIELDS if row.get(field)}
+                record['extra_attributes'] = {key: value for key, value in row.items()
+                                              if key not in ITEM_FIELDS and key is not None and value}
+                yield reader.line_num, record
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    else:
+        serializer = JSONSerializer()
+        f = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        try:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, serializer.loads(line)
+                except ValueError:
+                    yield line_no, None
+        finally:
+            if f is not sys.stdin.buffer:
+                f.close()
+
+
+def _attribute_text(attr, value):
+    # JSONL 中的数字属性值（如页数）转换为字符串，与界面中录入的属性值一致；其他类型不接受
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"属性 {attr} 的值必须是字符串或数字")
+
+
+def make_item(record, item_types, default_user=None):
+    """把一条导入记录转换为 Item，不符合要求时抛出 ValueError 说明原因
+
+    item_types 为 类型名 -> 类型字典；基本字段必须是字符串，extra_attributes 只能包含该类型定义过的属性，
+    属性值必须是字符串或数字（数字转换为字符串保存），数字、日期类型的属性值必须能够转换
+    （见 models.parse_attribute_value）。
+    """
+    if not isinstance(record, dict):
+        raise ValueError("不是有效的 JSON 对象")
+    for field in REQUIRED_FIELDS:
+        if not record.get(field):
+            raise ValueError(f"缺少字段 {field}")
+    for field in ITEM_FIELDS:
+        if record.get(field) is not None and not isinstance(record[field], str):
+            raise ValueError(f"字段 {field} 必须是字符串")
+    item_type = item_types.get(record['item_type'])
+    if item_type is None:
+        raise ValueError(f"物品类型 {record['item_type']} 不存在")
+    extra_attributes = record.get('extra_attributes') or {}
+    if not isinstance(extra_attributes, dict):
+        raise ValueError("extra_attributes 必须是对象")
+    unknown = [attr for attr in extra_attributes if attr not in item_type['attributes']]
+    if unknown:
+        raise ValueError(f"物品类型 {item_type['name']} 没有属性: {', '.join(unknown)}")
+    extra_attributes = {attr: _attribute_text(attr, value) for attr, value in extra_attributes.items()}
+    for attr, kind in (item_type.get('attribute_types') or {}).items():
+        if attr in extra_attributes and parse_attribute_value(kind, extra_attributes[attr]) is None:
+            raise ValueError(f"属性 {attr} 的值 {extra_attributes[attr]} 不是{ATTRIBUTE_KINDS[kind]}")
+    user = record.get('user') or default_user
+    if not user:
+        raise ValueError("缺少字段 user")
+    return Item(
+        name=record['name'],
+        description=record.get('description') or '',
+        address=record.get('address') or '',
+        contact_phone=record.get('contact_phone') or '',
+        contact_email=record.get('contact_email') or '',
+        item_type=item_type['name'],
+        user=user,
+        extra_attributes=extra_attributes,
+        id=record.get('id') or None
+    )
+
+
+def import_items(db, path, fmt=None, default_user=None, batch_size=1000, progress=None):
+    """流式导入物品，返回 ImportReport
+
+    每 batch_size 条合法记录调用一次 db.add_items，整个导入在一个批处理中，最后只写入一次。
+    记录缺少必填字段、类型或所有者不存在、额外属性不属于该类型、ID 已存在时跳过并记入 rejected。
+    progress(已导入数, 已跳过数) 在每批添加后调用。
+    """
+    item_types = {item_type['name']: item_type for item_type in db.get_item_types()}
+    known_users = set()
+    seen_ids = set()
+    imported = 0
+    rejected = []
+    start = time.perf_counter()
+
+    with db.batch():
+        chunk = []
+        for line_no, record in read_records(path, fmt):
+            try:
+                item = make_item(record, item_types, default_user)
+                if item.user not in known_users:
+                    if db.get_user(item.user) is None:
+                        raise ValueError(f"用户 {item.user} 不存在")
+                    known_users.add(item.user)
+                if record.get('id'):
+                    if item.id in seen_ids or db.get_item(item.id) is not None:
+                        raise ValueError(f"物品ID {item.id} 已存在")
+                    seen_ids.add(item.id)
+            except ValueError as e:
+                rejected.append((line_no, str(e)))
+                continue
+
+            chunk.append(item)
+            if len(chunk) >= batch_size:
+                db.add_items(chunk)
+                imported += len(chunk)
+                chunk = []
+                if progress:
+                    progress(imported, len(rejected))
+        if chunk:
+            db.add_items(chunk)
+            imported += len(chunk)
+
+    return ImportReport(imported, rejected, time.perf_counter() - start)
+
+
+def export_items(db, path, fmt=None, item_type=None, keyword=None):
+    """流式导出符合条件的物品，返回导出的物品数。path 为 '-' 时写到标准输出"""
+    fmt = detect_format(path, fmt)
+    count = 0
+    if fmt == 'csv':
+        # 额外属性的列取自物品类型的定义，不必先遍历一遍物品
+        attributes = []
+        for t in db.get_item_types():
+            if not item_type or t['name'] == item_type:
+                attributes.extend(attr for attr in t['attributes'] if attr not in attributes)
+        f = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8-sig', newline='')
+        try:
+            writer = csv.writer(f)
+            writer.writerow(ITEM_FIELDS + tuple(attributes))
+            for item in db.iter_items(item_type, keyword):
+                extra = item['extra_attributes']
+                writer.writerow([item[field] for field in ITEM_FIELDS] + [extra.get(attr, '') for attr in attributes])
+                count += 1
+        finally:
+            if f is not sys.stdout:
+                f.close()
+    else:
+        serializer = JSONSerializer()
+        f = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        try:
+            for item in db.iter_items(item_type, keyword):
+                f.write(serializer.dumps_line(item))
+                count += 1
+            f.flush()
+        finally:
+            if f is not sys.stdout.buffer:
+                f.close()
+    return count
+
+
+def write_rejects(path, rejected):
+    """把被跳过的记录（行号和原因）写入 CSV 文件"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('line', 'reason'))
+        writer.writerows(rejected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='物品批量导入导出')
+    parser.add_argument('--db', help='数据文件（默认使用环境变量 ITEM_DB_FILE 或 database.json）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='从 CSV/JSONL 文件导入物品')
+    import_parser.add_argument('file', help="导入文件，'-' 表示标准输入")
+    import_parser.add_argument('--format', choices=FORMATS, help='文件格式（默认按后缀判断）')
+    import_parser.add_argument('--user', help='记录中没有 user 字段时使用的物品所有者')
+    import_parser.add_argument('--batch-size', type=int, default=1000, help='每批添加的物品数')
+    import_parser.add_argument('--rejects', help='把被跳过的记录写入该 CSV 文件')
+
+    export_parser = subparsers.add_parser('export', help='导出物品到 CSV/JSONL 文件')
+    export_parser.add_argument('file', help="导出文件，'-' 表示标准输出")
+    export_parser.add_argument('--format', choices=FORMATS, help='文件格式（默认按后缀判断）')
+    export_parser.add_argument('--type', help='只导出该类型的物品')
+    export_parser.add_argument('--keyword', help='只导出包含关键字的物品')
+    args = parser.parse_args(argv)
+
+    # 日志输出到标准错误，不会混入导出到标准输出的数据
+    configure_logging()
+    db = get_database(args.db)
+    db.count_items()
+    try:
+        if args.command == 'import':
+            def progress(imported, rejected):
+                print(f"已导入 {imported} 个，跳过 {rejected} 个", file=sys.stderr)
+
+            report = import_items(db, args.file, args.format, args.user, args.batch_size, progress)
+            rate = report.imported / report.seconds if report.seconds else 0
+            print(f"导入完成: {report.imported} 个物品，跳过 {len(report.rejected)} 条，"
+                  f"耗时 {report.seconds:.2f} 秒（{rate:.0f} 个/秒）", file=sys.stderr)
+            for line_no, reason in report.rejected[:20]:
+                print(f"  第 {line_no} 行: {reason}", file=sys.stderr)
+            if len(report.rejected) > 20:
+                print(f"  ……共 {len(report.rejected)} 条", file=sys.stderr)
+            if args.rejects:
+                write_rejects(args.rejects, report.rejected)
+        else:
+            start = time.perf_counter()
+            count = export_items(db, args.file, args.format, args.type, args.keyword)
+            print(f"导出完成: {count} 个物品，耗时 {time.perf_counter() - start:.2f} 秒", file=sys.stderr)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""查询结果缓存"""
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """物品查询结果的 LRU 缓存
+
+    键为 (物品类型, 小写的关键字, 物品所有者)，值为符合条件的物品ID列表。缓存的ID总数不超过 max_ids，
+    条目数不超过 max_entries，超出时淘汰最久未使用的条目；结果本身超过 max_ids 的查询不缓存。
+
+    物品增删改时只淘汰修改前或修改后的物品符合其条件的条目（由 invalidate 判断），其余条目仍然有效。
+    多个读线程可以同时查询（见 server.py），各方法内部加锁。
+    """
+    def __init__(self, fields, max_entries=64, max_ids=200000):
+        self.fields = fields
+        self.max_entries = max_entries
+        self.max_ids = max_ids
+        self._entries = OrderedDict()  # 键 -> 物品ID列表，最近使用的在最后
+        self._size = 0                 # 所有条目的ID总数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(item_type, keyword, user):
+        """查询条件对应的键；关键字匹配不区分大小写，统一转为小写"""
+        return item_type or None, keyword.lower() if keyword else None, user or None
+
+    def get(self, key):
+        """返回缓存的物品ID列表（调用方不能修改），没有时返回 None"""
+        with self._lock:
+            item_ids = self._entries.get(key)
+            if item_ids is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return item_ids
+
+    def put(self, key, item_ids):
+        """缓存查询结果"""
+        if len(item_ids) > self.max_ids:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = item_ids
+            self._size += len(item_ids)
+            while len(self._entries) > self.max_entries or self._size > self.max_ids:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def _discard(self, key):
+        item_ids = self._entries.pop(key, None)
+        if item_ids is not None:
+            self._size -= len(item_ids)
+            self.invalidations += 1
+
+    def invalidate(self, item):
+        """淘汰 item（有 item_type、user 和 fields 属性的对象）符合其条件的条目
+
+        修改物品时，修改前和修改后各调用一次。
+        """
+        if not self._entries:
+            return
+        # 与 InvertedIndex 相同，各字段用 \0 分隔，关键字不会跨字段匹配
+        text = '\0'.join(getattr(item, field) for field in self.fields).lower()
+        with self._lock:
+            stale = [key for key in self._entries
+                     if (key[0] is None or key[0] == item.item_type)
+                     and (key[2] is None or key[2] == item.user)
+                     and (key[1] is None or key[1] in text)]
+            for key in stale:
+                self._discard(key)
+
+    def invalidate_types(self, *item_types):
+        """淘汰按这些物品类型筛选的条目（物品类型改名时使用）"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in item_types]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """命中统计，用于调整缓存大小"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'cached_ids': self._size
+        }
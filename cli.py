@@ -0,0 +1,264 @@
+"""命令行管理工具（不启动图形界面）
+
+不导入 tkinter，不需要显示器，适合在定时任务中使用。数据文件与图形界面相同
+（环境变量 ITEM_DB_FILE 或 --db 指定）。
+
+    python cli.py pending                       # 待审核用户
+    python cli.py approve alice bob             # 审核通过
+    python cli.py types                         # 物品类型
+    python cli.py add-type 玩具 品牌 适用年龄:数字 购买日期:日期
+    python cli.py update-type 玩具 儿童玩具 --attributes 品牌,适用年龄段:数字 --rename 适用年龄=适用年龄段
+    python cli.py add-item --type 书籍 --name 算法导论 --user admin --attr 作者=CLRS
+    python cli.py delete-item 2024010112000012300012345
+    python cli.py search --type 书籍 --keyword 算法 --limit 20
+    python cli.py search --user alice           # 某个用户的物品
+    python cli.py search --type 食品 --filter "保质期<=今天+7"   # 按额外属性筛选，可重复
+    python cli.py search --type 书籍 --sort id --desc --limit 50   # 最新的 50 本书
+    python cli.py stats
+    python cli.py batch < commands.txt          # 从标准输入逐行读取上面的命令，全部执行后只写入一次
+
+加 --json 时输出为每行一个 JSON 对象。
+"""
+import argparse
+import json
+import shlex
+import sys
+import time
+from collections import Counter
+
+from bulk import make_item
+from database import configure_logging, get_database, SORT_FIELDS
+from models import ItemType
+
+
+class CommandError(Exception):
+    """命令执行失败（如用户或物品不存在）"""
+
+
+class CLI:
+    """执行命令并输出结果；out 为结果的输出流，数据库的提示信息不会混入其中"""
+    def __init__(self, db, out, as_json=False):
+        self.db = db
+        self.out = out
+        self.as_json = as_json
+
+    def emit(self, record, text):
+        """输出一条结果：--json 时输出 record，否则输出 text"""
+        if self.as_json:
+            print(json.dumps(record, ensure_ascii=False), file=self.out)
+        else:
+            print(text, file=self.out)
+
+    def run(self, args):
+        getattr(self, 'cmd_' + args.command.replace('-', '_'))(args)
+
+    def cmd_pending(self, args):
+        for user in self.db.get_pending_users():
+            self.emit(user, f"{user['username']}\t{user['name']}\t{user['phone']}\t{user['email']}")
+
+    def cmd_approve(self, args):
+        missing = [username for username in args.usernames if self.db.get_user(username) is None]
+        if missing:
+            raise CommandError(f"用户不存在: {', '.join(missing)}")
+        with self.db.batch():
+            for username in args.usernames:
+                self.db.update_user(username, {'is_approved': True})
+        self.emit({'approved': args.usernames}, f"已审核通过 {len(args.usernames)} 个用户")
+
+    def cmd_types(self, args):
+        for item_type in self.db.get_item_types():
+            self.emit(item_type, f"{item_type['name']}\t{ItemType.from_dict(item_type).describe_attributes()}")
+
+    def cmd_add_type(self, args):
+        if self.db.get_item_type(args.name) is not None:
+            raise CommandError(f"物品类型已存在: {args.name}")
+        try:
+            item_type = ItemType.parse(args.name, ','.join(args.attributes))
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.db.add_item_type(item_type)
+        self.emit({'added': args.name}, f"已添加物品类型 {args.name}")
+
+    def cmd_update_type(self, args):
+        old_type = self.db.get_item_type(args.old_name)
+        if old_type is None:
+            raise CommandError(f"物品类型不存在: {args.old_name}")
+        if args.attributes is None:
+            new_type = ItemType(args.new_name, old_type['attributes'], old_type.get('attribute_types'))
+        else:
+            try:
+                new_type = ItemType.parse(args.new_name, args.attributes)
+            except ValueError as e:
+                raise CommandError(str(e))
+        attributes = new_type.attributes
+        renamed_attributes = {}
+        for pair in args.rename:
+            old, sep, new = pair.partition('=')
+            if not sep:
+                raise CommandError(f"属性改名应写成 旧属性=新属性: {pair}")
+            if new not in attributes:
+                raise CommandError(f"新的属性列表中没有 {new}")
+            renamed_attributes[old] = new
+        try:
+            self.db.update_item_type(args.old_name, new_type, renamed_attributes)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.emit({'updated': args.old_name, 'name': args.new_name}, f"已修改物品类型 {args.old_name}")
+
+    def cmd_add_item(self, args):
+        extra_attributes = {}
+        for pair in args.attr:
+            key, sep, value = pair.partition('=')
+            if not sep:
+                raise CommandError(f"额外属性应写成 属性=值: {pair}")
+            extra_attributes[key] = value
+        record = {
+            'name': args.name, 'description': args.description, 'address': args.address,
+            'contact_phone': args.phone, 'contact_email': args.email, 'item_type': args.type,
+            'user': args.user, 'extra_attributes': extra_attributes
+        }
+        item_types = {t['name']: t for t in self.db.get_item_types()}
+        try:
+            item = make_item(record, item_types)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if self.db.get_user(item.user) is None:
+            raise CommandError(f"用户不存在: {item.user}")
+        self.db.add_item(item)
+        self.emit({'added': item.id}, item.id)
+
+    def cmd_delete_item(self, args):
+        missing = [item_id for item_id in args.ids if self.db.get_item(item_id) is None]
+        if missing:
+            raise CommandError(f"物品不存在: {', '.join(missing)}")
+        with self.db.batch():
+            for item_id in args.ids:
+                self.db.delete_item(item_id)
+        self.emit({'deleted': args.ids}, f"已删除 {len(args.ids)} 个物品")
+
+    def cmd_search(self, args):
+        try:
+            items, total = self.db.get_items_page(args.type, args.keyword, args.offset, args.limit, args.user,
+                                                  '; '.join(args.filter), args.sort, args.desc)
+        except ValueError as e:
+            raise CommandError(str(e))
+        for item in items:
+            self.emit(item, f"{item['id']}\t{item['name']}\t{item['item_type']}\t{item['user']}\t{item['address']}")
+        if not self.as_json:
+            print(f"共 {total} 个物品，显示第 {args.offset + 1} 到 {args.offset + len(items)} 个", file=sys.stderr)
+
+    def cmd_stats(self, args):
+        start = time.perf_counter()
+        by_type = Counter(item['item_type'] for item in self.db.iter_items())
+        users = self.db.get_users()
+        stats = {
+            'users': len(users),
+            'pending_users': sum(1 for user in users if not user['is_approved']),
+            'item_types': len(self.db.get_item_types()),
+            'items': sum(by_type.values()),
+            'items_by_type': dict(by_type),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+        lines = [f"用户: {stats['users']}（待审核 {stats['pending_users']}）",
+                 f"物品类型: {stats['item_types']}",
+                 f"物品: {stats['items']}"]
+        lines += [f"  {name}: {count}" for name, count in by_type.most_common()]
+        self.emit(stats, '\n'.join(lines))
+
+    def cmd_batch(self, args):
+        parser = build_parser()
+        failed = 0
+        count = 0
+        start = time.perf_counter()
+        # 所有命令在同一个批处理中，最后只写入一次
+        with self.db.batch():
+            for line_no, line in enumerate(sys.stdin, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                count += 1
+                try:
+                    command = parser.parse_args(shlex.split(line))
+                    if command.command == 'batch':
+                        raise CommandError("batch 不能嵌套")
+                    self.run(command)
+                except SystemExit:
+                    # argparse 在参数错误时退出，错误信息已输出到标准错误
+                    failed += 1
+                    print(f"第 {line_no} 行: 参数错误", file=sys.stderr)
+                except (CommandError, ValueError) as e:
+                    failed += 1
+                    print(f"第 {line_no} 行: {e}", file=sys.stderr)
+                if failed and args.stop_on_error:
+                    break
+        print(f"执行 {count} 条命令，失败 {failed} 条，耗时 {time.perf_counter() - start:.2f} 秒", file=sys.stderr)
+        if failed:
+            raise CommandError(f"{failed} 条命令执行失败")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='物品复活系统命令行管理工具')
+    parser.add_argument('--db', help='数据文件（默认使用环境变量 ITEM_DB_FILE 或 database.json）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('pending', help='列出待审核用户')
+    p = subparsers.add_parser('approve', help='审核通过用户')
+    p.add_argument('usernames', nargs='+')
+
+    subparsers.add_parser('types', help='列出物品类型')
+    p = subparsers.add_parser('add-type', help='添加物品类型')
+    p.add_argument('name')
+    p.add_argument('attributes', nargs='*', help='额外属性，可以写成 属性:类型，类型为 文本/数字/日期（默认文本）')
+    p = subparsers.add_parser('update-type', help='修改物品类型')
+    p.add_argument('old_name')
+    p.add_argument('new_name')
+    p.add_argument('--attributes', help='新的额外属性（逗号分隔，可以写成 属性:类型），省略时保持不变；'
+                                        '该类型物品中不再有的属性会被删除')
+    p.add_argument('--rename', action='append', default=[], help='物品的额外属性改名，写成 旧属性=新属性，可重复')
+
+    p = subparsers.add_parser('add-item', help='添加物品')
+    p.add_argument('--type', required=True, help='物品类型')
+    p.add_argument('--name', required=True)
+    p.add_argument('--user', required=True, help='物品所有者')
+    p.add_argument('--description', default='')
+    p.add_argument('--address', default='')
+    p.add_argument('--phone', default='')
+    p.add_argument('--email', default='')
+    p.add_argument('--attr', action='append', default=[], help='额外属性，写成 属性=值，可重复')
+    p = subparsers.add_parser('delete-item', help='删除物品')
+    p.add_argument('ids', nargs='+')
+    p = subparsers.add_parser('search', help='搜索物品')
+    p.add_argument('--type')
+    p.add_argument('--keyword')
+    p.add_argument('--user', help='只搜索该用户的物品')
+    p.add_argument('--filter', action='append', default=[],
+                   help='按额外属性筛选，写成 属性 运算符 值（运算符为 = < <= > >=，日期可以写成 今天+7），可重复')
+    p.add_argument('--sort', choices=SORT_FIELDS, help='排序字段（id 即创建时间），省略时按添加顺序')
+    p.add_argument('--desc', action='store_true', help='从大到小排序')
+    p.add_argument('--offset', type=int, default=0)
+    p.add_argument('--limit', type=int, default=100)
+
+    subparsers.add_parser('stats', help='统计信息')
+    p = subparsers.add_parser('batch', help='从标准输入逐行读取命令并执行，最后只写入一次')
+    p.add_argument('--stop-on-error', action='store_true', help='遇到失败的命令时停止')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # 日志输出到标准错误，标准输出只有命令结果
+    configure_logging()
+    db = get_database(args.db)
+    try:
+        CLI(db, sys.stdout, args.json).run(args)
+    except CommandError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,183 +1,1207 @@
-import json
-import os
-from models import User, ItemType, Item
-
-class Database:
-    """数据库管理类"""
-    def __init__(self, db_file='database.json'):
-        self.db_file = db_file
-        self.data = {
-            'users': [],
-            'item_types': [],
-            'items': []
-        }
-        self.load_data()
-    
-    def load_data(self):
-        """加载数据"""
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-                print(f"数据加载成功，用户数: {len(self.data['users'])}, 物品数: {len(self.data['items'])}")
-            except Exception as e:
-                print(f"加载数据时出错: {e}")
-                pass
-    
-    def save_data(self):
-        """保存数据"""
-        try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-            print("数据保存成功")
-        except Exception as e:
-            print(f"保存数据时出错: {e}")
-    
-    # 用户相关操作
-    def add_user(self, user):
-        """添加用户"""
-        self.data['users'].append(user.to_dict())
-        self.save_data()
-    
-    def get_user(self, username):
-        """获取用户"""
-        for user in self.data['users']:
-            if user['username'] == username:
-                return user
-        return None
-    
-    def update_user(self, username, updated_data):
-        """更新用户信息"""
-        for i, user in enumerate(self.data['users']):
-            if user['username'] == username:
-                self.data['users'][i].update(updated_data)
-                self.save_data()
-                return True
-        return False
-    
-    def get_pending_users(self):
-        """获取待审核用户"""
-        return [user for user in self.data['users'] if not user['is_approved']]
-    
-    # 物品类型相关操作
-    def add_item_type(self, item_type):
-        """添加物品类型"""
-        self.data['item_types'].append(item_type.to_dict())
-        self.save_data()
-    
-    def get_item_types(self):
-        """获取所有物品类型"""
-        return self.data['item_types']
-    
-    def get_item_type(self, name):
-        """获取特定物品类型"""
-        for item_type in self.data['item_types']:
-            if item_type['name'] == name:
-                return item_type
-        return None
-    
-    def update_item_type(self, old_name, new_type):
-        """更新物品类型"""
-        for i, item_type in enumerate(self.data['item_types']):
-            if item_type['name'] == old_name:
-                self.data['item_types'][i] = new_type.to_dict()
-                self.save_data()
-                return True
-        return False
-    
-    # 物品相关操作
-    def add_item(self, item):
-        """添加物品"""
-        # 检查是否已存在相同ID的物品
-        for existing_item in self.data['items']:
-            if existing_item['id'] == item.id:
-                print(f"警告: 物品ID {item.id} 已存在，将生成新ID")
-                # 生成新ID
-                import random
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                random_num = random.randint(1000, 9999)
-                item.id = f"{timestamp}{random_num}"
-                break
-        
-        self.data['items'].append(item.to_dict())
-        self.save_data()
-    
-    def get_items(self, item_type=None, keyword=None):
-        """获取物品列表"""
-        items = self.data['items']
-        
-        if item_type:
-            items = [item for item in items if item['item_type'] == item_type]
-        
-        if keyword:
-            keyword = keyword.lower()
-            items = [item for item in items 
-                     if keyword in item['name'].lower() 
-                     or keyword in item['description'].lower()
-                     or keyword in item['address'].lower()]
-        
-        return items
-    
-    def get_item(self, item_id):
-        """获取特定物品"""
-        # 统一处理为字符串比较
-        item_id_str = str(item_id)
-        for item in self.data['items']:
-            if str(item['id']) == item_id_str:
-                return item
-        return None
-    
-    def get_item_by_id(self, item_id):
-        """根据ID获取物品 - 兼容性方法"""
-        return self.get_item(item_id)
-    
-    def delete_item(self, item_id):
-        """删除物品"""
-        try:
-            item_id_str = str(item_id)
-            print(f"正在删除物品 ID: {item_id_str}")
-            
-            # 检查物品是否存在
-            item_found = None
-            for item in self.data['items']:
-                if str(item['id']) == item_id_str:
-                    item_found = item
-                    break
-            
-            if not item_found:
-                print(f"物品 {item_id_str} 不存在")
-                return False
-            
-            print(f"找到物品: {item_found['name']}")
-            
-            # 删除物品
-            original_count = len(self.data['items'])
-            self.data['items'] = [item for item in self.data['items'] if str(item['id']) != item_id_str]
-            new_count = len(self.data['items'])
-            
-            print(f"删除前物品数: {original_count}, 删除后物品数: {new_count}")
-            
-            if new_count < original_count:
-                self.save_data()
-                print(f"物品删除成功: {item_id_str}")
-                return True
-            else:
-                print("删除失败，物品可能不存在")
-                return False
-            
-        except Exception as e:
-            print(f"删除物品时出错: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-    
-    def update_item(self, item_id, updated_data):
-        """更新物品信息"""
-        item_id_str = str(item_id)
-        for i, item in enumerate(self.data['items']):
-            if str(item['id']) == item_id_str:
-                self.data['items'][i].update(updated_data)
-                self.save_data()
-                return True
-        return False
\ No newline at end of file
+import atexit
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+from itertools import islice
+from models import User, ItemType, Item, parse_attribute_value
+from cache import QueryCache
+from indexes import InvertedIndex, KeyIndex, SortedIndex
+from ids import id_floor
+from metrics import metrics
+from passwords import hasher, is_hashed
+from serialization import JSONSerializer
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，此时只保证单个进程内的安全
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 关键字搜索匹配的物品字段
+SEARCH_FIELDS = ('name', 'description', 'address')
+
+# 建立等值索引的物品字段：物品类型、物品所有者
+KEY_FIELDS = ('item_type', 'user')
+
+# 查询结果可以排序的物品字段：物品ID（即创建时间）、名称、类型、地址
+SORT_FIELDS = ('id', 'name', 'item_type', 'address')
+
+# 涉及物品的日志操作，物品延迟加载时这些操作推迟到物品加载后再重放
+ITEM_OPS = ('add_item', 'update_item', 'delete_item')
+
+# 使用 SQLite 存储的数据文件后缀
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+# 数据变更通知：kind 为 'user'/'item_type'/'item'，action 为 'added'/'updated'/'deleted'，
+# key 为记录的主键，record 为变更后的记录字典（删除时为 None），old_key 为变更前的主键（改名时与 key 不同），
+# old_record 为变更前的记录字典（新增时为 None）。
+# 物品类型改名或修改属性时，该类型的物品随之修改，但只发出一条 kind 为 'item_type' 的通知，显示物品的订阅者需要重新查询。
+# 其他进程压缩数据文件后本进程需要重新加载，此时发出 kind 为 'database'、action 为 'reloaded' 的通知，其余字段为 None
+Change = namedtuple('Change', ['kind', 'action', 'key', 'record', 'old_key', 'old_record'])
+
+# 额外属性筛选条件：attribute 为属性名，op 为 FILTER_OPS 之一，value 为未转换的值（文字）
+AttributeFilter = namedtuple('AttributeFilter', ['attribute', 'op', 'value'])
+
+FILTER_OPS = ('=', '<', '<=', '>', '>=')
+
+# 筛选条件中的全角、数学符号写法
+_OP_ALIASES = {'＝': '=', '＜': '<', '＞': '>', '≤': '<=', '≥': '>=', '==': '='}
+_FILTER_PATTERN = re.compile(r'^\s*(.+?)\s*(<=|>=|==|=|<|>|≤|≥|＝|＜|＞)\s*(.+?)\s*$')
+_TODAY_PATTERN = re.compile(r'^(?:今天|today)\s*(?:([+-])\s*(\d+)\s*天?)?$', re.IGNORECASE)
+
+# 进程内共享的数据库实例，按数据文件的绝对路径区分
+_shared_databases = {}
+_shared_lock = threading.Lock()
+
+
+def configure_logging():
+    """命令行程序入口调用：日志输出到标准错误，级别由环境变量 ITEM_DB_LOG_LEVEL 指定（默认 WARNING）"""
+    logging.basicConfig(level=os.environ.get('ITEM_DB_LOG_LEVEL', 'WARNING').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+
+def default_db_file():
+    """默认数据文件，可以用环境变量 ITEM_DB_FILE 指定"""
+    return os.environ.get('ITEM_DB_FILE', 'database.json')
+
+
+def get_database(db_file=None):
+    """获取进程内共享的数据库实例，同一个数据文件只加载一次，各组件看到同一份数据"""
+    path = os.path.abspath(db_file or default_db_file())
+    with _shared_lock:
+        db = _shared_databases.get(path)
+        if db is None:
+            db = _shared_databases[path] = Database(db_file)
+        return db
+
+
+def item_matches(item, item_type=None, keyword=None, user=None):
+    """判断物品字典是否符合 get_items 的筛选条件"""
+    if item_type and item['item_type'] != item_type:
+        return False
+    if user and item['user'] != user:
+        return False
+    if keyword:
+        keyword = keyword.lower()
+        return any(keyword in item[field].lower() for field in SEARCH_FIELDS)
+    return True
+
+
+def parse_filters(text):
+    """解析“属性 运算符 值”形式的筛选条件，多个条件用分号或逗号分隔，如“保质期<=今天+7; 数量>=2”
+
+    返回 AttributeFilter 列表，格式错误时抛出 ValueError。
+    """
+    filters = []
+    for part in re.split(r'[;；,，]', text or ''):
+        if not part.strip():
+            continue
+        match = _FILTER_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"无法解析筛选条件“{part.strip()}”，格式为 属性 运算符 值，运算符为 {' '.join(FILTER_OPS)}")
+        attribute, op, value = match.groups()
+        filters.append(AttributeFilter(attribute, _OP_ALIASES.get(op, op), value))
+    return filters
+
+
+def filter_key(kind, value, today=None):
+    """把筛选条件的值转换为属性类型的键，无法转换时返回 None
+
+    日期除了具体日期，还可以写成相对于今天的“今天”“今天+7”“今天-3”（或 today+7）。
+    """
+    if kind == 'date':
+        match = _TODAY_PATTERN.match(str(value).strip())
+        if match:
+            sign, days = match.groups()
+            days = int(days or 0)
+            return (today or date.today()) + timedelta(days=-days if sign == '-' else days)
+    return parse_attribute_value(kind, value)
+
+
+def filter_bounds(op, key):
+    """运算符对应的 SortedIndex.range 参数 (low, high, include_low, include_high)"""
+    if op == '=':
+        return key, key, True, True
+    if op == '<':
+        return None, key, True, False
+    if op == '<=':
+        return None, key, True, True
+    if op == '>':
+        return key, None, False, True
+    if op == '>=':
+        return key, None, True, True
+    raise ValueError(f"未知的运算符: {op}")
+
+
+def migrate_attributes(extra_attributes, attributes, renamed_attributes=None):
+    """把物品的额外属性迁移到物品类型的新属性列表
+
+    renamed_attributes 为 旧属性名 -> 新属性名，先按它改名，再去掉新属性列表中没有的属性。
+    """
+    renamed_attributes = renamed_attributes or {}
+    migrated = {}
+    for key, value in extra_attributes.items():
+        key = renamed_attributes.get(key, key)
+        if key in attributes:
+            migrated[key] = value
+    return migrated
+
+
+@metrics.instrument
+class Database:
+    """数据库管理类
+
+    journal=True 时每次修改只向 ``<db_file>.log`` 追加一条操作记录，达到 compact_threshold 条后压缩为快照；
+    journal=False 时每次修改都重写整个数据文件。``with db.batch():`` 中的修改在最外层批处理结束时一次性写入，
+    设置 flush_interval（秒）后批处理之外的修改也会合并写入，flush() 立即写入，sync() 读取其他进程的修改。
+    lazy_items=True 时物品在第一次被访问时才加载；subscribe(callback) 注册变更通知。
+    数据文件后缀为 .db/.sqlite/.sqlite3 时返回接口相同的 sqlite_database.SQLiteDatabase。
+    存储格式、索引和多进程写入的设计见 README 的“技术架构”一节。
+    """
+    def __new__(cls, db_file=None, *args, **kwargs):
+        if cls is Database and (db_file or default_db_file()).endswith(SQLITE_SUFFIXES):
+            from sqlite_database import SQLiteDatabase
+            cls = SQLiteDatabase
+        return super().__new__(cls)
+    
+    def __init__(self, db_file=None, journal=True, compact_threshold=1000, flush_interval=None,
+                 serializer=None, lazy_items=True):
+        self.db_file = db_file or default_db_file()
+        self.log_file = self.db_file + '.log'
+        self.lock_file = self.db_file + '.lock'
+        self.serializer = serializer or JSONSerializer()
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.lazy_items = lazy_items
+        self._init_flush(flush_interval)
+        self._users = {}
+        self._item_types = {}
+        self._item_store = {}
+        self._items_file = None  # 快照中的物品文件名
+        self._deferred = []      # 物品加载前推迟重放的日志操作
+        self._search_index = None  # 关键字倒排索引，首次搜索时建立
+        self._key_indexes = {}     # 字段名 -> 等值索引，首次按该字段筛选时建立
+        self._attribute_indexes = {}  # (属性名, 值类型) -> 有序索引，首次按该属性筛选时建立
+        self._sort_indexes = {}    # 字段名 -> 按字段值排序的有序索引，首次按该字段排序时建立（物品ID除外）
+        self._query_cache = QueryCache(SEARCH_FIELDS)  # 关键字等查询的结果缓存
+        self._id_index = None      # 按ID（即创建时间）排序的有序索引，首次按时间查询时建立
+        self._seq = 0        # 已应用的最后一条操作序号（即文件版本号）
+        self._log_count = 0  # 日志中尚未压缩的操作条数
+        self._snapshot_id = None  # 已读取的快照文件的 (inode, 修改时间, 大小)，用于发现其他进程的压缩
+        self._log_id = None       # 已读取的日志文件的 inode
+        self._log_offset = 0      # 日志中已读取到的位置
+        self._lock_fd = None
+        self._lock_depth = 0
+        self.conflicts = 0        # 与其他进程修改同一记录的次数
+        self.load_data()
+    
+    def _init_flush(self, flush_interval):
+        """初始化批处理和延迟写入的状态"""
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        # 合并其他进程的修改（及重新加载）时进入的上下文，默认什么也不做；不加 self._lock 的并发读者
+        # （如 server.py）把它设为写锁，读请求就不会看到合并到一半的数据
+        self.merge_lock = nullcontext
+        self._batch_depth = 0
+        self._subscribers = []
+        self._pending = []    # 已应用但尚未写入日志的操作
+        self._dirty = False   # 是否有尚未写入磁盘的修改
+        self._flush_timer = None
+        if flush_interval:
+            # 定时写入时，程序退出前把剩余的修改写入磁盘
+            atexit.register(self.flush)
+    
+    @property
+    def _items(self):
+        """物品字典；物品延迟加载时第一次访问才读取物品文件"""
+        if self._item_store is None:
+            self._load_items()
+        return self._item_store
+    
+    @_items.setter
+    def _items(self, value):
+        self._item_store = value
+    
+    @property
+    def version(self):
+        """数据文件的版本号（最后一条已应用操作的序号），任何进程的每次写入都会使它增加"""
+        return self._seq
+    
+    @property
+    def data(self):
+        """与快照文件结构相同的数据字典"""
+        return {
+            'users': [user.to_dict() for user in self._users.values()],
+            'item_types': [item_type.to_dict() for item_type in self._item_types.values()],
+            'items': [item.to_dict() for item in self._items.values()]
+        }
+    
+    def load_data(self):
+        """加载数据"""
+        self._users = {}
+        self._item_types = {}
+        self._item_store = {}
+        self._items_file = None
+        self._deferred = []
+        self._search_index = None
+        self._key_indexes = {}
+        self._attribute_indexes = {}
+        self._sort_indexes = {}
+        self._query_cache.clear()
+        self._id_index = None
+        self._seq = 0
+        # 先记下快照文件的状态再读取，读取期间被其他进程替换时下次 sync 会发现并重新加载
+        self._snapshot_id = self._snapshot_stat()
+        if os.path.exists(self.db_file):
+            try:
+                data = self.serializer.read(self.db_file)
+                self._seq = data.get('journal_seq', 0)
+                self._users = {user['username']: User.from_dict(user) for user in data['users']}
+                self._item_types = {item_type['name']: ItemType.from_dict(item_type)
+                                    for item_type in data['item_types']}
+                if 'items' in data:
+                    # 旧格式：物品直接保存在数据文件中
+                    self._item_store = {str(item['id']): Item.from_dict(item) for item in data['items']}
+                elif data.get('items_file'):
+                    self._items_file = data['items_file']
+                    self._item_store = None
+                
+                if self._item_store is not None:
+                    logger.info("数据加载成功，用户数: %d, 物品数: %d", len(self._users), len(self._item_store))
+                else:
+                    logger.info("数据加载成功，用户数: %d，物品将在首次使用时加载", len(self._users))
+            except Exception as e:
+                logger.error("加载数据时出错: %s", e)
+        self._replay_log()
+        if not self.lazy_items and self._item_store is None:
+            self._load_items()
+        if self._item_store is not None:
+            metrics.set_gauge('items', len(self._item_store))
+    
+    def _items_path(self, items_file):
+        # 物品文件与数据文件放在同一目录
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_file)), items_file)
+    
+    def _load_items(self):
+        """读取物品文件，并重放推迟的物品日志操作"""
+        store = {}
+        try:
+            for item in self.serializer.read_lines(self._items_path(self._items_file)):
+                store[str(item['id'])] = Item.from_dict(item)
+        except FileNotFoundError as e:
+            if self._snapshot_stat() != self._snapshot_id:
+                # 其他进程压缩后删除了旧的物品文件，重新读取新的快照
+                self._reload()
+                if self._item_store is None:
+                    self._load_items()
+                return
+            logger.error("加载物品数据时出错: %s", e)
+        except Exception as e:
+            logger.error("加载物品数据时出错: %s", e)
+        self._item_store = store
+        
+        deferred, self._deferred = self._deferred, []
+        for entry in deferred:
+            self._apply(entry)
+        metrics.set_gauge('items', len(store))
+        logger.info("物品数据加载成功，物品数: %d", len(store))
+    
+    def _keyword_index(self):
+        """返回关键字倒排索引，尚未建立时先建立"""
+        if self._search_index is None:
+            index = InvertedIndex(SEARCH_FIELDS)
+            for item_id, item in self._items.items():
+                index.add(item_id, item)
+            self._search_index = index
+        return self._search_index
+    
+    def _key_index(self, field):
+        """返回字段的等值索引，尚未建立时先建立"""
+        index = self._key_indexes.get(field)
+        if index is None:
+            index = KeyIndex()
+            for item_id, item in self._items.items():
+                index.add(getattr(item, field), item_id)
+            self._key_indexes[field] = index
+        return index
+    
+    def _attribute_index(self, attr, kind):
+        """返回 (属性, 值类型) 的有序索引，尚未建立时先建立
+
+        只包含类型中该属性为这种值类型、且属性值能够转换的物品，从这些类型的等值索引取得物品，不扫描全部物品。
+        """
+        index = self._attribute_indexes.get((attr, kind))
+        if index is None:
+            items = self._items
+            type_index = self._key_index('item_type')
+            pairs = []
+            for item_type in self._item_types.values():
+                if attr not in item_type.attributes or item_type.kind(attr) != kind:
+                    continue
+                for item_id in type_index.get(item_type.name):
+                    key = self._attribute_key(items[item_id], attr, kind)
+                    if key is not None:
+                        pairs.append((key, item_id))
+            index = self._attribute_indexes[(attr, kind)] = SortedIndex(pairs)
+        return index
+    
+    def _attribute_key(self, item, attr, kind):
+        """物品属性值在有序索引中的键；物品类型中没有该属性、值类型不同或值无法转换时返回 None"""
+        item_type = self._item_types.get(item.item_type)
+        if item_type is None or attr not in item_type.attributes or item_type.kind(attr) != kind \
+                or attr not in item.extra_attributes:
+            return None
+        return parse_attribute_value(kind, item.extra_attributes[attr])
+    
+    def _index_attributes(self, item, item_id, remove=False):
+        """在已建立的属性索引中添加（remove=True 时删除）物品"""
+        for (attr, kind), index in self._attribute_indexes.items():
+            key = self._attribute_key(item, attr, kind)
+            if key is not None:
+                if remove:
+                    index.remove(key, item_id)
+                else:
+                    index.add(key, item_id)
+    
+    def _sort_index(self, field):
+        """返回按字段值排序的有序索引（值相同的按物品ID排序），尚未建立时先建立"""
+        if field == 'id':
+            return self._created_index()
+        if field not in SORT_FIELDS:
+            raise ValueError(f"不能按 {field} 排序（可用: {', '.join(SORT_FIELDS)}）")
+        index = self._sort_indexes.get(field)
+        if index is None:
+            index = SortedIndex((getattr(item, field), item_id) for item_id, item in self._items.items())
+            self._sort_indexes[field] = index
+        return index
+    
+    def _created_index(self):
+        """返回按物品ID排序的有序索引，尚未建立时先建立"""
+        if self._id_index is None:
+            self._id_index = SortedIndex((item_id, item_id) for item_id in self._items)
+        return self._id_index
+    
+    def _replay_log(self):
+        """重放快照之后的日志记录"""
+        self._log_id = None
+        self._log_offset = 0
+        self._log_count = 0
+        if not os.path.exists(self.log_file):
+            return
+        
+        with open(self.log_file, 'rb') as f:
+            self._log_id = os.fstat(f.fileno()).st_ino
+            entries, valid_size = self._read_log(f)
+            # 尾部不完整时可能是写入时崩溃，也可能是其他进程正在写入；
+            # 这里不截断，下次写入时在文件锁内截掉损坏的尾部
+            if valid_size < os.fstat(f.fileno()).st_size:
+                logger.warning("日志文件尾部不完整，只读取前 %d 字节", valid_size)
+        
+        self._log_offset = valid_size
+        self._log_count = len(entries)
+        for entry in entries:
+            # 序号不大于快照序号的记录已包含在快照中
+            if entry['seq'] > self._seq:
+                self._apply_logged(entry)
+                self._seq = entry['seq']
+        if entries:
+            logger.info("已重放日志 %d 条", len(entries))
+    
+    def _read_log(self, f):
+        """从文件当前位置读取完整的日志记录，返回 (记录列表, 读取的字节数)"""
+        entries = []
+        size = 0
+        for line in f:
+            # 最后一行没有换行符说明写入时崩溃（或正在写入），丢弃这半条记录
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = self.serializer.loads(line)
+            except ValueError:
+                break
+            entries.append(entry)
+            size += len(line)
+        return entries, size
+    
+    def _apply_logged(self, entry):
+        """应用从日志读到的操作；物品尚未加载时，物品操作推迟到物品加载后"""
+        if self._item_store is None and entry['op'] in ITEM_OPS:
+            self._deferred.append(entry)
+        else:
+            self._apply(entry)
+    
+    def _snapshot_stat(self):
+        try:
+            st = os.stat(self.db_file)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的排他锁，只在写入时使用；调用方须持有 self._lock，可以嵌套"""
+        if fcntl is None or not self.journal:
+            yield
+            return
+        if self._lock_depth == 0:
+            self._lock_fd = open(self.lock_file, 'ab')
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                self._lock_fd.close()
+                self._lock_fd = None
+    
+    def sync(self):
+        """读取其他进程写入的修改并合并（不加文件锁，不会等待其他进程的写入）"""
+        if not self.journal:
+            return
+        with self._lock:
+            self._sync()
+    
+    def _sync(self):
+        if self._snapshot_stat() != self._snapshot_id:
+            # 其他进程压缩了数据文件，日志已被替换
+            self._reload()
+            return
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if self._log_id is not None and (st.st_ino != self._log_id or st.st_size < self._log_offset):
+                self._reload()
+                return
+            self._log_id = st.st_ino
+            f.seek(self._log_offset)
+            entries, size = self._read_log(f)
+        
+        foreign = []
+        for entry in entries:
+            if entry['seq'] <= self._seq:
+                continue
+            if entry['seq'] != self._seq + 1:
+                # 序号不连续，说明读到了压缩过程中的中间状态，重新加载
+                self._reload()
+                return
+            foreign.append(entry)
+            self._seq = entry['seq']
+        self._log_offset += size
+        self._log_count += len(entries)
+        if foreign:
+            self._merge(foreign)
+    
+    def _reload(self):
+        """重新加载数据文件，再应用本进程尚未写入的修改"""
+        pending = self._pending
+        with self.merge_lock():
+            self.load_data()
+            for entry in pending:
+                self._apply_logged(entry)
+        self._pending = pending
+        self._publish(Change('database', 'reloaded', None, None, None, None))
+    
+    @staticmethod
+    def _entry_key(entry):
+        """操作涉及的记录"""
+        op = entry['op']
+        if op == 'add_user':
+            return 'user', entry['user']['username']
+        if op == 'update_user':
+            return 'user', entry['username']
+        if op == 'add_item_type':
+            return 'item_type', entry['item_type']['name']
+        if op == 'update_item_type':
+            return 'item_type', entry['old_name']
+        if op == 'add_item':
+            return 'item', str(entry['item']['id'])
+        return 'item', entry['id']
+    
+    def _merge(self, entries):
+        """合并其他进程写入的操作
+        
+        这些操作在日志中排在本进程尚未写入的操作之前。先应用它们，再重新应用本进程修改同一记录的操作
+        和新增操作，使内存中的结果与按日志顺序重放一致：同一记录上各自修改的字段都保留，
+        同一字段以后写入的本进程为准，对已被其他进程删除的记录的修改被丢弃。
+        """
+        with self.merge_lock():
+            touched = set()
+            for entry in entries:
+                touched.add(self._entry_key(entry))
+                self._apply_notified(entry)
+            
+            for entry in self._pending:
+                key = self._entry_key(entry)
+                if key in touched:
+                    self.conflicts += 1
+                    logger.warning("与其他进程的修改冲突: %s %s，按写入顺序合并", key[0], key[1])
+                    self._apply_notified(entry, reinsert=True)
+                elif entry['op'].startswith('add_'):
+                    # 新增的记录移到其他进程新增的记录之后，与日志中的顺序一致
+                    self._reinsert(entry)
+    
+    def _apply_notified(self, entry, reinsert=False):
+        """应用日志中的操作并通知订阅者"""
+        if not self._subscribers or (self._item_store is None and entry['op'] in ITEM_OPS):
+            self._reinsert(entry) if reinsert else self._apply_logged(entry)
+            return
+        old_record = self._old_record(entry)
+        self._reinsert(entry) if reinsert else self._apply(entry)
+        self._notify(entry, old_record)
+    
+    def _reinsert(self, entry):
+        """重新应用一条操作；新增操作先删除原记录，使记录排到最后"""
+        op = entry['op']
+        if op == 'add_item':
+            self._apply_delete_item({'id': str(entry['item']['id'])})
+        elif op == 'add_user':
+            self._users.pop(entry['user']['username'], None)
+        elif op == 'add_item_type':
+            self._item_types.pop(entry['item_type']['name'], None)
+        self._apply(entry)
+    
+    def save_data(self):
+        """保存数据（写入完整快照并清空日志）"""
+        with self._lock, self._file_lock():
+            self._save_data()
+    
+    def _save_data(self):
+        try:
+            if self.journal:
+                # 先合并其他进程的修改，快照才包含所有进程的数据
+                self._sync()
+                for entry in self._pending:
+                    self._seq += 1
+                    entry['seq'] = self._seq
+            snapshot = {
+                'users': [user.to_dict() for user in self._users.values()],
+                'item_types': [item_type.to_dict() for item_type in self._item_types.values()],
+                'journal_seq': self._seq
+            }
+            size = 0
+            old_items_file = self._items_file
+            if self._item_store is None and not self._deferred:
+                # 物品尚未加载且没有修改，沿用原来的物品文件
+                items_file = old_items_file
+            else:
+                # 物品文件名带上操作序号，数据文件替换之前原来的快照始终完整可用
+                items_file = f"{os.path.basename(self.db_file)}.items.{self._seq}"
+                size += self.serializer.write_lines_atomic(
+                    self._items_path(items_file), (item.to_dict() for item in self._items.values()))
+                metrics.set_gauge('items', len(self._item_store))
+            snapshot['items_file'] = items_file
+            
+            # 先写临时文件再原子替换，写到一半崩溃也不会损坏原有数据文件
+            size += self.serializer.write_atomic(self.db_file, snapshot)
+            self._snapshot_id = self._snapshot_stat()
+            self._items_file = items_file
+            if old_items_file and old_items_file != items_file:
+                try:
+                    os.remove(self._items_path(old_items_file))
+                except OSError:
+                    pass
+            
+            # 快照已包含全部操作，日志可以清空；用新文件替换而不是原地截断，
+            # 其他进程由 inode 变化知道日志已被替换
+            if self.journal:
+                self.serializer.write_lines_atomic(self.log_file, [])
+                self._log_id = os.stat(self.log_file).st_ino
+            self._log_offset = 0
+            self._log_count = 0
+            self._pending = []
+            self._dirty = False
+            metrics.observe('snapshot_bytes', size)
+            logger.info("数据保存成功，写入 %d 字节", size)
+        except Exception as e:
+            logger.error("保存数据时出错: %s", e)
+    
+    @contextmanager
+    def batch(self):
+        """批处理：其中的所有修改在最外层批处理结束时只写入一次，可以嵌套"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+    
+    def flush(self):
+        """把尚未写入的修改写入磁盘"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            
+            if not self.journal:
+                self.save_data()
+                return
+            
+            with self._file_lock():
+                try:
+                    # 先读取其他进程追加的日志，本进程的操作接在它们后面
+                    self._sync()
+                    if self._log_id is not None and os.path.getsize(self.log_file) > self._log_offset:
+                        # 持有文件锁时没有其他进程在写，读不完整的尾部是崩溃留下的，截掉以免影响后续记录
+                        logger.warning("日志文件尾部损坏，已截断到 %d 字节", self._log_offset)
+                        with open(self.log_file, 'r+b') as f:
+                            f.truncate(self._log_offset)
+                    
+                    for entry in self._pending:
+                        self._seq += 1
+                        entry['seq'] = self._seq
+                    # 多条操作合并为一次写入
+                    lines = b''.join(self.serializer.dumps_line(entry) for entry in self._pending)
+                    with open(self.log_file, 'ab') as f:
+                        f.write(lines)
+                        if self._log_id is None:
+                            self._log_id = os.fstat(f.fileno()).st_ino
+                    self._log_offset += len(lines)
+                    self._log_count += len(self._pending)
+                    metrics.observe('log_bytes', len(lines))
+                    if self._item_store is not None:
+                        metrics.set_gauge('items', len(self._item_store))
+                    self._pending = []
+                    self._dirty = False
+                except Exception as e:
+                    logger.error("写入日志时出错: %s", e)
+                    # 日志写不进去时退回到完整保存，避免修改丢失
+                    self._save_data()
+                    return
+                
+                if self._log_count >= self.compact_threshold:
+                    self._save_data()
+    
+    def close(self):
+        """写入所有未保存的修改"""
+        self.flush()
+    
+    def subscribe(self, callback):
+        """注册变更通知，返回取消注册的函数"""
+        self._subscribers.append(callback)
+        return lambda: self.unsubscribe(callback)
+    
+    def unsubscribe(self, callback):
+        """取消变更通知"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def _old_record(self, entry):
+        """修改前的记录字典，用于变更通知"""
+        op = entry['op']
+        if op == 'update_user':
+            return self.get_user(entry['username'])
+        if op == 'update_item_type':
+            return self.get_item_type(entry['old_name'])
+        if op in ('update_item', 'delete_item'):
+            return self.get_item(entry['id'])
+        return None
+    
+    def _notify(self, entry, old_record):
+        """把一条修改操作转换为 Change 通知订阅者"""
+        op = entry['op']
+        if op == 'add_user' or op == 'update_user':
+            key = entry['user']['username'] if op == 'add_user' else entry['username']
+            action = 'added' if op == 'add_user' else 'updated'
+            change = Change('user', action, key, self.get_user(key), key, old_record)
+        elif op == 'add_item_type':
+            key = entry['item_type']['name']
+            change = Change('item_type', 'added', key, self.get_item_type(key), key, old_record)
+        elif op == 'update_item_type':
+            key = entry['item_type']['name']
+            change = Change('item_type', 'updated', key, self.get_item_type(key), entry['old_name'], old_record)
+        elif op == 'add_item':
+            key = str(entry['item']['id'])
+            change = Change('item', 'added', key, self.get_item(key), key, old_record)
+        elif op == 'update_item':
+            key = str(entry['data'].get('id', entry['id']))
+            change = Change('item', 'updated', key, self.get_item(key), entry['id'], old_record)
+        else:
+            change = Change('item', 'deleted', entry['id'], None, entry['id'], old_record)
+        self._publish(change)
+    
+    def _publish(self, change):
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception:
+                # 订阅者出错不影响数据修改
+                logger.exception("变更通知处理出错")
+    
+    def _commit(self, entry):
+        """应用一条修改操作，并按批处理和延迟写入的设置持久化"""
+        with self._lock:
+            old_record = self._old_record(entry) if self._subscribers else None
+            self._stage(entry)
+            self._dirty = True
+            if self._subscribers:
+                self._notify(entry, old_record)
+            if self._batch_depth:
+                return
+            if not self.flush_interval:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _stage(self, entry):
+        """应用修改并记下待写入的日志（操作序号在写入日志时分配，接在其他进程的操作之后）"""
+        self._apply(entry)
+        if self.journal:
+            self._pending.append(entry)
+    
+    def _apply(self, entry):
+        """把一条操作记录应用到内存数据"""
+        getattr(self, '_apply_' + entry['op'])(entry)
+    
+    @staticmethod
+    def _update_record(record, data):
+        """把字典中的字段写入记录对象，忽略记录没有的字段"""
+        for key, value in data.items():
+            if key in record.__slots__:
+                setattr(record, key, value)
+    
+    def _apply_add_user(self, entry):
+        user = User.from_dict(entry['user'])
+        self._users[user.username] = user
+    
+    def _apply_update_user(self, entry):
+        user = self._users.get(entry['username'])
+        if user is not None:
+            self._update_record(user, entry['data'])
+    
+    def _apply_add_item_type(self, entry):
+        item_type = ItemType.from_dict(entry['item_type'])
+        self._item_types[item_type.name] = item_type
+        # 属性索引的内容取决于类型的属性定义，类型变化很少，直接丢弃，下次筛选时重建
+        self._attribute_indexes = {}
+    
+    def _apply_update_item_type(self, entry):
+        old_name = entry['old_name']
+        new_type = ItemType.from_dict(entry['item_type'])
+        old_type = self._item_types.get(old_name)
+        if old_type is None:
+            return
+        if new_type.name != old_name and new_type.name in self._item_types:
+            # 其他进程同时添加了同名类型，两个进程的检查都通过了；与 SQLite 存储一样丢弃这次改名
+            logger.warning("物品类型 %s 已存在，忽略 %s 的改名", new_type.name, old_name)
+            return
+        self._attribute_indexes = {}
+        if new_type.name == old_name:
+            self._item_types[old_name] = new_type
+        else:
+            # 改名时重建字典以保持类型原来的顺序（类型数量很少）
+            self._item_types = {
+                (new_type.name if name == old_name else name): (new_type if name == old_name else item_type)
+                for name, item_type in self._item_types.items()
+            }
+        
+        if new_type.name == old_name and new_type.attributes == old_type.attributes \
+                and not entry.get('renamed_attributes'):
+            return
+        # 该类型的物品随之修改；物品尚未加载时与其他物品操作一样推迟到加载后
+        cascade = dict(entry, op='cascade_item_type', old_attributes=old_type.attributes)
+        if self._item_store is None:
+            self._deferred.append(cascade)
+        else:
+            self._apply(cascade)
+    
+    def _apply_cascade_item_type(self, entry):
+        """把类型改名和属性变化应用到该类型的物品（不写入日志，由 update_item_type 操作重放时产生）"""
+        new_type = entry['item_type']
+        # 类型索引的整个集合直接改名，只访问该类型的物品，不扫描全部物品
+        item_ids = self._key_index('item_type').rename(entry['old_name'], new_type['name'])
+        self._query_cache.invalidate_types(entry['old_name'], new_type['name'])
+        self._attribute_indexes = {}
+        if new_type['name'] != entry['old_name']:
+            # 该类型的物品在按类型排序的索引中整体移动，直接丢弃，下次排序时重建
+            self._sort_indexes.pop('item_type', None)
+        renamed_attributes = entry.get('renamed_attributes')
+        migrate = renamed_attributes or new_type['attributes'] != entry['old_attributes']
+        items = self._items
+        for item_id in item_ids:
+            item = items[item_id]
+            item.item_type = new_type['name']
+            if migrate:
+                item.extra_attributes = migrate_attributes(
+                    item.extra_attributes, new_type['attributes'], renamed_attributes)
+    
+    def _apply_add_item(self, entry):
+        item = Item.from_dict(entry['item'])
+        item_id = str(item.id)
+        exists = item_id in self._items
+        if self._search_index is not None:
+            if exists:
+                self._search_index.update(item_id, item)
+            else:
+                self._search_index.add(item_id, item)
+        if self._id_index is not None and not exists:
+            self._id_index.add(item_id, item_id)
+        for field, index in self._key_indexes.items():
+            # 已有的物品被替换时在字典中的位置不变，在等值索引中也保持原来的顺序
+            if exists:
+                index.move(getattr(self._items[item_id], field), getattr(item, field), item_id)
+            else:
+                index.add(getattr(item, field), item_id)
+        for field, index in self._sort_indexes.items():
+            if exists:
+                index.remove(getattr(self._items[item_id], field), item_id)
+            index.add(getattr(item, field), item_id)
+        if exists:
+            self._query_cache.invalidate(self._items[item_id])
+            self._index_attributes(self._items[item_id], item_id, remove=True)
+        self._query_cache.invalidate(item)
+        self._index_attributes(item, item_id)
+        self._items[item_id] = item
+    
+    def _apply_update_item(self, entry):
+        item = self._items.get(entry['id'])
+        if item is None:
+            return
+        old_keys = {field: getattr(item, field) for field in self._key_indexes}
+        old_sort_keys = {field: getattr(item, field) for field in self._sort_indexes}
+        # 修改前后符合条件的缓存结果都会变化
+        self._query_cache.invalidate(item)
+        self._index_attributes(item, entry['id'], remove=True)
+        self._update_record(item, entry['data'])
+        self._query_cache.invalidate(item)
+        new_id = str(item.id)
+        self._index_attributes(item, new_id)
+        for field, index in self._key_indexes.items():
+            key = getattr(item, field)
+            if new_id != entry['id']:
+                # 改了ID的物品在字典中排到最后，在等值索引中也一样
+                index.remove(old_keys[field], entry['id'])
+                index.add(key, new_id)
+            else:
+                # 修改了类型或所有者的物品在新的类型（所有者）中保持原来的顺序，与 get_items 的顺序一致
+                index.move(old_keys[field], key, new_id)
+        for field, index in self._sort_indexes.items():
+            key = getattr(item, field)
+            if key != old_sort_keys[field] or new_id != entry['id']:
+                index.remove(old_sort_keys[field], entry['id'])
+                index.add(key, new_id)
+        if new_id != entry['id']:
+            self._items[new_id] = self._items.pop(entry['id'])
+            if self._id_index is not None:
+                self._id_index.remove(entry['id'], entry['id'])
+                self._id_index.add(new_id, new_id)
+        if self._search_index is not None and (
+                new_id != entry['id'] or any(field in entry['data'] for field in SEARCH_FIELDS)):
+            self._search_index.update(entry['id'], item, new_id)
+    
+    def _apply_delete_item(self, entry):
+        item = self._items.pop(entry['id'], None)
+        if item is None:
+            return
+        for indexes in (self._key_indexes, self._sort_indexes):
+            for field, index in indexes.items():
+                index.remove(getattr(item, field), entry['id'])
+        self._index_attributes(item, entry['id'], remove=True)
+        self._query_cache.invalidate(item)
+        if self._search_index is not None:
+            self._search_index.remove(entry['id'])
+        if self._id_index is not None:
+            self._id_index.remove(entry['id'], entry['id'])
+    
+    # 用户相关操作
+    def add_user(self, user, hashed=False):
+        """添加用户；密码先哈希（见 passwords.py），日志和数据文件中只保存哈希
+
+        hashed=True 表示 user.password 已经是 hasher.hash 的结果（预先在其他线程中计算、导入已有数据时），
+        不再哈希。密码一律按明文处理，以 scrypt$ 开头的密码也会被哈希。
+        """
+        data = user.to_dict()
+        data['password'] = self._password_hash(data['password'], hashed)
+        self._commit({'op': 'add_user', 'user': data})
+    
+    def get_user(self, username):
+        """获取用户"""
+        user = self._users.get(username)
+        return user.to_dict() if user is not None else None
+    
+    def update_user(self, username, updated_data, hashed=False):
+        """更新用户信息；修改密码时与 add_user 一样先哈希，hashed=True 表示已经是哈希"""
+        if self.get_user(username) is None:
+            return False
+        if 'password' in updated_data:
+            updated_data = dict(updated_data, password=self._password_hash(updated_data['password'], hashed))
+        self._commit({'op': 'update_user', 'username': username, 'data': updated_data})
+        return True
+    
+    @staticmethod
+    def _password_hash(password, hashed):
+        if not hashed:
+            return hasher.hash(password)
+        if not is_hashed(password):
+            raise ValueError("hashed=True 时密码必须是 hasher.hash 的结果")
+        return password
+    
+    def verify_password(self, username, password):
+        """验证用户的密码，用户不存在或密码错误时返回 False
+
+        scrypt 每次需要几十毫秒，图形界面应在后台线程调用。验证成功时，旧数据中的明文密码或按旧参数计算的哈希
+        按当前参数重新哈希后保存，用户不会察觉。
+        """
+        user = self.get_user(username)
+        if user is None:
+            return False
+        stored = user['password']
+        if not hasher.verify(password, stored):
+            return False
+        if hasher.needs_rehash(stored):
+            self.update_user(username, {'password': hasher.hash(password)}, hashed=True)
+            logger.info("用户 %s 的密码已更新为当前参数的哈希", username)
+        return True
+    
+    def get_users(self):
+        """获取所有用户"""
+        return [user.to_dict() for user in self._users.values()]
+    
+    def get_pending_users(self):
+        """获取待审核用户"""
+        return [user.to_dict() for user in self._users.values() if not user.is_approved]
+    
+    # 物品类型相关操作
+    def add_item_type(self, item_type):
+        """添加物品类型"""
+        self._commit({'op': 'add_item_type', 'item_type': item_type.to_dict()})
+    
+    def get_item_types(self):
+        """获取所有物品类型"""
+        return [item_type.to_dict() for item_type in self._item_types.values()]
+    
+    def get_item_type(self, name):
+        """获取特定物品类型"""
+        item_type = self._item_types.get(name)
+        return item_type.to_dict() if item_type is not None else None
+    
+    def update_item_type(self, old_name, new_type, renamed_attributes=None):
+        """更新物品类型
+
+        该类型的物品随之改为新的类型名，额外属性按 renamed_attributes（旧属性名 -> 新属性名）改名，
+        并去掉新属性列表中没有的属性。整个修改只是一条日志操作，一次写入。
+        类型不存在时返回 False，新的类型名已被其他类型使用时抛出 ValueError。
+        """
+        if self.get_item_type(old_name) is None:
+            return False
+        if new_type.name != old_name and self.get_item_type(new_type.name) is not None:
+            raise ValueError(f"物品类型已存在: {new_type.name}")
+        entry = {'op': 'update_item_type', 'old_name': old_name, 'item_type': new_type.to_dict()}
+        if renamed_attributes:
+            entry['renamed_attributes'] = dict(renamed_attributes)
+        self._commit(entry)
+        return True
+    
+    # 物品相关操作
+    def add_item(self, item):
+        """添加物品（物品ID由 ids.new_id 生成，不会重复，不必检查冲突）"""
+        self._commit({'op': 'add_item', 'item': item.to_dict()})
+    
+    def add_items(self, items):
+        """批量添加物品，只写入一次"""
+        with self.batch():
+            for item in items:
+                self.add_item(item)
+    
+    def get_items(self, item_type=None, keyword=None, user=None, filters=None, order_by=None, descending=False):
+        """获取物品列表，user 不为空时只返回该用户的物品
+
+        filters 为 AttributeFilter 列表（或 parse_filters 能解析的文字），按额外属性筛选，
+        属性不存在或值无法转换为属性的类型时抛出 ValueError。
+        order_by 为 SORT_FIELDS 中的字段时按该字段排序（值相同的按创建时间），descending=True 时从大到小；
+        为 None 时按添加顺序（有属性筛选条件时按属性值）排列。
+        """
+        return [item.to_dict() for item in self._filter_items(item_type, keyword, user, filters, order_by, descending)]
+    
+    def iter_items(self, item_type=None, keyword=None, user=None, filters=None, order_by=None, descending=False):
+        """逐个生成符合条件的物品字典，用于导出等数据量大的场景
+
+        开始时只取得物品对象的引用列表，字典在迭代时逐个生成，内存中不会同时存在全部物品的副本。
+        """
+        for item in self._filter_items(item_type, keyword, user, filters, order_by, descending):
+            yield item.to_dict()
+    
+    def _filter_items(self, item_type, keyword, user=None, filters=None, order_by=None, descending=False):
+        """按类型、所有者、关键字和额外属性筛选，返回 Item 对象列表"""
+        items = self._items
+        item_ids = self._matching_ids(item_type, keyword, user, filters)
+        if order_by:
+            item_ids = self._sorted_ids(item_ids, order_by, descending)
+        return [items[item_id] for item_id in item_ids]
+    
+    def _sorted_ids(self, item_ids, order_by, descending=False, count=None):
+        """把符合条件的物品ID按字段排序，返回列表；count 不为 None 时只返回排在最前的 count 个
+
+        没有筛选条件时直接截取排序索引的开头。有筛选条件时比较两种做法的代价：沿排序索引逐个检查是否符合条件，
+        直到凑够 count 个（平均检查 count * 物品总数 / 符合条件数 个），或者对符合条件的物品全部排序，
+        取较小者。“最新的 50 本书”只需从索引末尾检查几百个物品。
+        """
+        index = self._sort_index(order_by)
+        items = self._items
+        if item_ids is items:
+            return index.head(count, descending)
+        matched = len(item_ids)
+        if count is not None and count * len(index) < matched * matched:
+            members = item_ids if isinstance(item_ids, (dict, set)) else set(item_ids)
+            ordered = reversed(index) if descending else iter(index)
+            return list(islice((item_id for item_id in ordered if item_id in members), count))
+        # 与排序索引相同，值相同的按物品ID排序
+        if order_by == 'id':
+            ordered = sorted(item_ids, reverse=descending)
+        else:
+            ordered = sorted(item_ids, key=lambda item_id: (getattr(items[item_id], order_by), item_id),
+                             reverse=descending)
+        return ordered if count is None else ordered[:count]
+    
+    def _filter_ids(self, attribute_filter):
+        """符合一个属性筛选条件的物品ID列表
+
+        同一属性在不同类型中可能是不同的值类型，各值类型的有序索引分别查询后拼接（一个物品只属于其中一个）。
+        """
+        attr, op, value = attribute_filter
+        kinds = []
+        for item_type in self._item_types.values():
+            if attr in item_type.attributes and item_type.kind(attr) not in kinds:
+                kinds.append(item_type.kind(attr))
+        if not kinds:
+            raise ValueError(f"没有物品类型有属性“{attr}”")
+        ranges = []
+        for kind in kinds:
+            key = filter_key(kind, value)
+            if key is not None:
+                ranges.append(self._attribute_index(attr, kind).range(*filter_bounds(op, key)))
+        if not ranges:
+            raise ValueError(f"“{value}”不是属性“{attr}”的有效值")
+        return ranges[0] if len(ranges) == 1 else [item_id for ids in ranges for item_id in ids]
+    
+    def _matching_ids(self, item_type, keyword, user, filters=None):
+        """返回符合条件的物品ID，可能是列表，也可能直接是索引中的集合（调用方不能修改）
+
+        类型和所有者从等值索引取得物品ID集合，有关键字时与倒排表一起求交集，没有时从最小的集合出发逐个过滤，
+        耗时与候选集合中最小的一个成正比，而不是与物品总数成正比。
+        有属性筛选条件时，各条件由属性索引按范围取得物品ID；没有关键字时结果按第一个条件的属性值排序。
+        属性筛选的结果不缓存：范围查询本身只是二分查找，而且相对日期（今天+7）的结果每天都不同。
+        """
+        buckets = []
+        if item_type:
+            buckets.append(self._key_index('item_type').get(item_type))
+        if user:
+            buckets.append(self._key_index('user').get(user))
+        if isinstance(filters, str):
+            filters = parse_filters(filters)
+        if filters:
+            ranges = [self._filter_ids(attribute_filter) for attribute_filter in filters]
+            if keyword:
+                return self._keyword_index().search(keyword, buckets + [set(ids) for ids in ranges])
+            rest = buckets + [set(ids) for ids in ranges[1:]]
+            if not rest:
+                return ranges[0]
+            rest.sort(key=len)
+            return [item_id for item_id in ranges[0] if all(item_id in ids for ids in rest)]
+        if not keyword:
+            if not buckets:
+                return self._items
+            if len(buckets) == 1:
+                return buckets[0]
+        
+        # 需要求交集的查询先查缓存，翻页、重复搜索时不必重新计算
+        key = QueryCache.key(item_type, keyword, user)
+        item_ids = self._query_cache.get(key)
+        if item_ids is not None:
+            return item_ids
+        if keyword:
+            # 倒排索引求交集得到候选，再做子串校验，结果与逐条子串匹配一致
+            item_ids = self._keyword_index().search(keyword, buckets)
+        else:
+            buckets.sort(key=len)
+            item_ids = [item_id for item_id in buckets[0] if all(item_id in ids for ids in buckets[1:])]
+        self._query_cache.put(key, item_ids)
+        return item_ids
+    
+    def cache_stats(self):
+        """查询结果缓存的命中统计"""
+        return self._query_cache.stats()
+    
+    def get_items_page(self, item_type=None, keyword=None, offset=0, limit=100, user=None, filters=None,
+                       order_by=None, descending=False):
+        """分页获取物品列表，返回 (本页物品列表, 符合条件的物品总数)；排序参数与 get_items 相同"""
+        # 只按类型或只按所有者筛选、或没有筛选条件时直接在索引中截取当前页，不必生成完整列表
+        item_ids = self._matching_ids(item_type, keyword, user, filters)
+        items = self._items
+        if order_by:
+            # 排序时只取到当前页为止，不必对全部结果排序
+            page = self._sorted_ids(item_ids, order_by, descending, offset + limit)[offset:]
+        else:
+            page = islice(item_ids, offset, offset + limit)
+        return [items[item_id].to_dict() for item_id in page], len(item_ids)
+    
+    def get_items_created_between(self, start=None, end=None):
+        """获取在 [start, end) 时间范围内创建的物品（datetime，None 表示不限），按创建时间排序"""
+        item_ids = self._created_index().range(id_floor(start) if start else None,
+                                                id_floor(end) if end else None)
+        return [self._items[item_id].to_dict() for item_id in item_ids]
+    
+    def get_item(self, item_id):
+        """获取特定物品"""
+        # 统一按字符串ID查找
+        item = self._items.get(str(item_id))
+        return item.to_dict() if item is not None else None
+    
+    def count_items(self):
+        """物品总数"""
+        return len(self._items)
+    
+    def build_indexes(self):
+        """预先建立关键字索引（否则在第一次搜索时建立），用于长期运行的服务启动时"""
+        self._keyword_index()
+    
+    def get_item_by_id(self, item_id):
+        """根据ID获取物品 - 兼容性方法"""
+        return self.get_item(item_id)
+    
+    def delete_item(self, item_id):
+        """删除物品"""
+        try:
+            item_id_str = str(item_id)
+            
+            # 检查物品是否存在
+            item_found = self.get_item(item_id_str)
+            
+            if not item_found:
+                logger.debug("物品 %s 不存在", item_id_str)
+                return False
+            
+            # 删除物品
+            self._commit({'op': 'delete_item', 'id': item_id_str})
+            logger.debug("物品删除成功: %s (%s)", item_id_str, item_found['name'])
+            return True
+            
+        except Exception:
+            logger.exception("删除物品时出错")
+            return False
+    
+    def update_item(self, item_id, updated_data):
+        """更新物品信息"""
+        item_id_str = str(item_id)
+        if self.get_item(item_id_str) is None:
+            return False
+        self._commit({'op': 'update_item', 'id': item_id_str, 'data': updated_data})
+        return True
@@ -1,550 +1,990 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from models import User, ItemType, Item
-from database import Database
-
-class ItemResurrectionGUI:
-    """物品复活系统GUI"""
-    def __init__(self, root):
-        self.root = root
-        self.root.title("物品复活系统")
-        self.root.geometry("800x600")
-        
-        self.db = Database()
-        self.current_user = None
-        
-        # 初始化物品类型（如果数据库中没有）
-        self.initialize_item_types()
-        
-        # 创建主界面
-        self.create_login_interface()
-    
-    def initialize_item_types(self):
-        """初始化物品类型"""
-        if not self.db.get_item_types():
-            print("初始化默认物品类型...")
-            # 添加一些默认的物品类型
-            default_types = [
-                ItemType("书籍", ["作者", "出版社", "ISBN"]),
-                ItemType("电子产品", ["品牌", "型号", "序列号"]),
-                ItemType("家具", ["材质", "尺寸", "颜色"]),
-                ItemType("衣物", ["尺码", "材质", "品牌"]),
-                ItemType("其他", [])
-            ]
-            for item_type in default_types:
-                self.db.add_item_type(item_type)
-            print("默认物品类型初始化完成")
-    
-    def create_login_interface(self):
-        """创建登录界面"""
-        self.clear_interface()
-        
-        # 登录框架
-        login_frame = ttk.Frame(self.root, padding="20")
-        login_frame.pack(expand=True)
-        
-        ttk.Label(login_frame, text="物品复活系统", font=("Arial", 20)).grid(row=0, column=0, columnspan=2, pady=20)
-        
-        ttk.Label(login_frame, text="用户名:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.username_entry = ttk.Entry(login_frame, width=30)
-        self.username_entry.grid(row=1, column=1, pady=5)
-        
-        ttk.Label(login_frame, text="密码:").grid(row=2, column=0, sticky=tk.W, pady=5)
-        self.password_entry = ttk.Entry(login_frame, show="*", width=30)
-        self.password_entry.grid(row=2, column=1, pady=5)
-        
-        button_frame = ttk.Frame(login_frame)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=20)
-        
-        ttk.Button(button_frame, text="登录", command=self.login).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="注册", command=self.register).pack(side=tk.LEFT, padx=5)
-        
-        # 添加管理员初始化按钮（仅用于测试）
-        if not self.db.get_user("admin"):
-            ttk.Button(button_frame, text="初始化管理员", command=self.initialize_admin).pack(side=tk.LEFT, padx=5)
-    
-    def initialize_admin(self):
-        """初始化管理员账号（仅用于测试）"""
-        admin_user = User(
-            username="admin",
-            password="admin123",
-            name="系统管理员",
-            address="系统地址",
-            phone="00000000000",
-            email="admin@example.com",
-            is_admin=True,
-            is_approved=True
-        )
-        self.db.add_user(admin_user)
-        messagebox.showinfo("成功", "管理员账号已初始化！\n用户名: admin\n密码: admin123")
-    
-    def create_main_interface(self):
-        """创建主界面"""
-        self.clear_interface()
-        
-        # 创建菜单栏
-        menubar = tk.Menu(self.root)
-        self.root.config(menu=menubar)
-        
-        # 文件菜单
-        file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label="刷新", command=self.refresh_items)
-        file_menu.add_separator()
-        file_menu.add_command(label="退出", command=self.root.quit)
-        menubar.add_cascade(label="文件", menu=file_menu)
-        
-        # 用户菜单
-        user_menu = tk.Menu(menubar, tearoff=0)
-        user_menu.add_command(label="个人信息", command=self.show_user_info)
-        user_menu.add_command(label="退出登录", command=self.logout)
-        menubar.add_cascade(label="用户", menu=user_menu)
-        
-        # 如果是管理员，添加管理员菜单
-        if self.current_user and self.current_user.get('is_admin'):
-            admin_menu = tk.Menu(menubar, tearoff=0)
-            admin_menu.add_command(label="审核用户", command=self.approve_users)
-            admin_menu.add_command(label="管理物品类型", command=self.manage_item_types)
-            menubar.add_cascade(label="管理", menu=admin_menu)
-        
-        # 工具栏
-        toolbar = ttk.Frame(self.root)
-        toolbar.pack(fill=tk.X, padx=5, pady=5)
-        
-        ttk.Button(toolbar, text="刷新", command=self.refresh_items).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="添加物品", command=self.add_item).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="删除物品", command=self.delete_item).pack(side=tk.LEFT, padx=2)
-        
-        # 搜索框架
-        search_frame = ttk.Frame(self.root)
-        search_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        ttk.Label(search_frame, text="物品类型:").pack(side=tk.LEFT, padx=5)
-        self.type_var = tk.StringVar()
-        type_names = [t['name'] for t in self.db.get_item_types()]
-        type_names.insert(0, "全部")
-        self.type_combobox = ttk.Combobox(search_frame, textvariable=self.type_var, values=type_names, width=20)
-        self.type_combobox.pack(side=tk.LEFT, padx=5)
-        self.type_combobox.current(0)
-        
-        ttk.Label(search_frame, text="关键字:").pack(side=tk.LEFT, padx=5)
-        self.keyword_entry = ttk.Entry(search_frame, width=30)
-        self.keyword_entry.pack(side=tk.LEFT, padx=5)
-        
-        ttk.Button(search_frame, text="搜索", command=self.search_items).pack(side=tk.LEFT, padx=5)
-        ttk.Button(search_frame, text="重置", command=self.reset_search).pack(side=tk.LEFT, padx=5)
-        
-        # 物品列表
-        list_frame = ttk.Frame(self.root)
-        list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        self.tree = ttk.Treeview(list_frame, columns=('ID', '名称', '类型', '联系人', '地址'), show='headings')
-        self.tree.heading('ID', text='ID')
-        self.tree.heading('名称', text='物品名称')
-        self.tree.heading('类型', text='物品类型')
-        self.tree.heading('联系人', text='联系人')
-        self.tree.heading('地址', text='地址')
-        
-        # 设置列宽
-        self.tree.column('ID', width=100)
-        self.tree.column('名称', width=200)
-        self.tree.column('类型', width=100)
-        self.tree.column('联系人', width=150)
-        self.tree.column('地址', width=200)
-        
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # 显示所有物品
-        self.load_items()
-    
-    def clear_interface(self):
-        """清空界面"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
-    
-    def login(self):
-        """用户登录"""
-        username = self.username_entry.get().strip()
-        password = self.password_entry.get().strip()
-        
-        if not username or not password:
-            messagebox.showwarning("警告", "用户名和密码不能为空！")
-            return
-        
-        user = self.db.get_user(username)
-        if not user:
-            messagebox.showerror("错误", "用户名不存在！")
-            return
-        
-        if user['password'] != password:
-            messagebox.showerror("错误", "密码错误！")
-            return
-        
-        if not user['is_approved']:
-            messagebox.showinfo("提示", "您的账号正在审核中，请等待管理员批准！")
-            return
-        
-        self.current_user = user
-        self.create_main_interface()
-        messagebox.showinfo("成功", f"欢迎回来，{user['name']}！")
-    
-    def register(self):
-        """用户注册"""
-        username = simpledialog.askstring("注册", "请输入用户名:")
-        if not username:
-            return
-        
-        if self.db.get_user(username):
-            messagebox.showerror("错误", "用户名已存在！")
-            return
-        
-        password = simpledialog.askstring("注册", "请输入密码:", show="*")
-        if not password:
-            return
-        
-        name = simpledialog.askstring("注册", "请输入真实姓名:")
-        address = simpledialog.askstring("注册", "请输入地址:")
-        phone = simpledialog.askstring("注册", "请输入联系电话:")
-        email = simpledialog.askstring("注册", "请输入邮箱:")
-        
-        if not all([name, address, phone, email]):
-            messagebox.showwarning("警告", "所有信息都必须填写！")
-            return
-        
-        user = User(username, password, name, address, phone, email)
-        self.db.add_user(user)
-        messagebox.showinfo("成功", "注册成功！请等待管理员审核。")
-    
-    def logout(self):
-        """退出登录"""
-        self.current_user = None
-        self.create_login_interface()
-    
-    def refresh_items(self):
-        """刷新物品列表"""
-        self.load_items()
-    
-    def reset_search(self):
-        """重置搜索条件"""
-        self.type_var.set("全部")
-        self.keyword_entry.delete(0, tk.END)
-        self.load_items()
-    
-    def show_user_info(self):
-        """显示个人信息"""
-        if not self.current_user:
-            return
-        
-        info_window = tk.Toplevel(self.root)
-        info_window.title("个人信息")
-        info_window.geometry("400x300")
-        info_window.transient(self.root)
-        info_window.grab_set()
-        
-        frame = ttk.Frame(info_window, padding="20")
-        frame.pack(expand=True)
-        
-        ttk.Label(frame, text="个人信息", font=("Arial", 16)).grid(row=0, column=0, columnspan=2, pady=10)
-        
-        ttk.Label(frame, text="用户名:").grid(row=1, column=0, sticky=tk.W)
-        ttk.Label(frame, text=self.current_user['username']).grid(row=1, column=1, sticky=tk.W)
-        
-        ttk.Label(frame, text="姓名:").grid(row=2, column=0, sticky=tk.W)
-        ttk.Label(frame, text=self.current_user['name']).grid(row=2, column=1, sticky=tk.W)
-        
-        ttk.Label(frame, text="地址:").grid(row=3, column=0, sticky=tk.W)
-        ttk.Label(frame, text=self.current_user['address']).grid(row=3, column=1, sticky=tk.W)
-        
-        ttk.Label(frame, text="电话:").grid(row=4, column=0, sticky=tk.W)
-        ttk.Label(frame, text=self.current_user['phone']).grid(row=4, column=1, sticky=tk.W)
-        
-        ttk.Label(frame, text="邮箱:").grid(row=5, column=0, sticky=tk.W)
-        ttk.Label(frame, text=self.current_user['email']).grid(row=5, column=1, sticky=tk.W)
-        
-        ttk.Button(frame, text="关闭", command=info_window.destroy).grid(row=6, column=0, columnspan=2, pady=20)
-    
-    def approve_users(self):
-        """审核用户"""
-        if not self.current_user or not self.current_user['is_admin']:
-            return
-        
-        pending_users = self.db.get_pending_users()
-        if not pending_users:
-            messagebox.showinfo("提示", "没有待审核的用户！")
-            return
-        
-        approve_window = tk.Toplevel(self.root)
-        approve_window.title("审核用户")
-        approve_window.geometry("500x400")
-        approve_window.transient(self.root)
-        approve_window.grab_set()
-        
-        tree = ttk.Treeview(approve_window, columns=('用户名', '姓名', '电话', '邮箱'), show='headings')
-        tree.heading('用户名', text='用户名')
-        tree.heading('姓名', text='姓名')
-        tree.heading('电话', text='电话')
-        tree.heading('邮箱', text='邮箱')
-        
-        for user in pending_users:
-            tree.insert('', tk.END, values=(user['username'], user['name'], user['phone'], user['email']))
-        
-        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        def approve_selected():
-            selected = tree.selection()
-            if not selected:
-                messagebox.showwarning("警告", "请选择要审核的用户！")
-                return
-            
-            for item in selected:
-                username = tree.item(item)['values'][0]
-                self.db.update_user(username, {'is_approved': True})
-            
-            messagebox.showinfo("成功", "用户审核成功！")
-            approve_window.destroy()
-        
-        ttk.Button(approve_window, text="审核通过", command=approve_selected).pack(pady=10)
-    
-    def manage_item_types(self):
-        """管理物品类型"""
-        if not self.current_user or not self.current_user['is_admin']:
-            return
-        
-        type_window = tk.Toplevel(self.root)
-        type_window.title("管理物品类型")
-        type_window.geometry("500x400")
-        type_window.transient(self.root)
-        type_window.grab_set()
-        
-        # 类型列表
-        tree = ttk.Treeview(type_window, columns=('名称', '属性'), show='headings')
-        tree.heading('名称', text='类型名称')
-        tree.heading('属性', text='额外属性')
-        
-        for item_type in self.db.get_item_types():
-            attrs = ', '.join(item_type['attributes'])
-            tree.insert('', tk.END, values=(item_type['name'], attrs))
-        
-        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # 按钮框架
-        btn_frame = ttk.Frame(type_window)
-        btn_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        def add_type():
-            name = simpledialog.askstring("添加类型", "请输入物品类型名称:")
-            if not name:
-                return
-            
-            attrs = simpledialog.askstring("添加属性", "请输入额外属性（逗号分隔）:")
-            attributes = [attr.strip() for attr in attrs.split(',')] if attrs else []
-            
-            item_type = ItemType(name, attributes)
-            self.db.add_item_type(item_type)
-            
-            # 刷新列表
-            for item in tree.get_children():
-                tree.delete(item)
-            for item_type in self.db.get_item_types():
-                attrs_str = ', '.join(item_type['attributes'])
-                tree.insert('', tk.END, values=(item_type['name'], attrs_str))
-        
-        ttk.Button(btn_frame, text="添加类型", command=add_type).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="修改类型", command=lambda: self.edit_item_type(tree)).pack(side=tk.LEFT, padx=5)
-    
-    def edit_item_type(self, tree):
-        """编辑物品类型"""
-        selected = tree.selection()
-        if not selected:
-            messagebox.showwarning("警告", "请选择要修改的类型！")
-            return
-        
-        item = tree.item(selected[0])
-        old_name = item['values'][0]
-        old_attrs = item['values'][1]
-        
-        new_name = simpledialog.askstring("修改类型", "请输入新的类型名称:", initialvalue=old_name)
-        if not new_name:
-            return
-        
-        new_attrs = simpledialog.askstring("修改属性", "请输入新的额外属性（逗号分隔）:", initialvalue=old_attrs)
-        attributes = [attr.strip() for attr in new_attrs.split(',')] if new_attrs else []
-        
-        new_type = ItemType(new_name, attributes)
-        self.db.update_item_type(old_name, new_type)
-        
-        # 刷新列表
-        for item in tree.get_children():
-            tree.delete(item)
-        for item_type in self.db.get_item_types():
-            attrs_str = ', '.join(item_type['attributes'])
-            tree.insert('', tk.END, values=(item_type['name'], attrs_str))
-    
-    def add_item(self):
-        """添加物品"""
-        if not self.current_user:
-            return
-        
-        # 获取物品类型
-        item_types = self.db.get_item_types()
-        if not item_types:
-            messagebox.showwarning("警告", "暂无物品类型，请联系管理员添加！")
-            return
-        
-        type_names = [t['name'] for t in item_types]
-        
-        # 使用对话框选择类型
-        def on_type_select():
-            selected_type = type_var.get()
-            if selected_type and selected_type in type_names:
-                add_item_details(selected_type)
-                type_window.destroy()
-            else:
-                messagebox.showerror("错误", "请选择有效的物品类型！")
-        
-        type_window = tk.Toplevel(self.root)
-        type_window.title("选择物品类型")
-        type_window.geometry("300x150")
-        type_window.transient(self.root)
-        type_window.grab_set()
-        
-        ttk.Label(type_window, text="请选择物品类型:").pack(pady=10)
-        
-        type_var = tk.StringVar()
-        type_combo = ttk.Combobox(type_window, textvariable=type_var, values=type_names, width=30)
-        type_combo.pack(pady=10)
-        if type_names:
-            type_combo.current(0)
-        
-        ttk.Button(type_window, text="确定", command=on_type_select).pack(pady=10)
-    
-        def add_item_details(selected_type):
-            """添加物品详细信息"""
-            # 获取基本信息
-            name = simpledialog.askstring("物品名称", "请输入物品名称:")
-            if not name:
-                return
-            
-            description = simpledialog.askstring("物品描述", "请输入物品描述:")
-            address = simpledialog.askstring("物品地址", "请输入物品所在地址:")
-            phone = simpledialog.askstring("联系电话", "请输入联系电话:")
-            email = simpledialog.askstring("联系邮箱", "请输入联系邮箱:")
-            
-            if not all([description, address, phone, email]):
-                messagebox.showwarning("警告", "所有信息都必须填写！")
-                return
-            
-            # 获取额外属性
-            item_type = self.db.get_item_type(selected_type)
-            extra_attributes = {}
-            
-            for attr in item_type['attributes']:
-                value = simpledialog.askstring("额外属性", f"请输入{attr}:")
-                if value:
-                    extra_attributes[attr] = value
-            
-            # 创建物品
-            item = Item(
-                name=name,
-                description=description,
-                address=address,
-                contact_phone=phone,
-                contact_email=email,
-                item_type=selected_type,
-                user=self.current_user['username'],
-                extra_attributes=extra_attributes
-            )
-            
-            self.db.add_item(item)
-            self.refresh_items()
-            messagebox.showinfo("成功", "物品添加成功！")
-    
-    def delete_item(self):
-        """删除物品"""
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showwarning("警告", "请选择要删除的物品！")
-            return
-        
-        # 获取选中的物品ID和名称
-        item_id = self.tree.item(selected[0])['values'][0]
-        item_name = self.tree.item(selected[0])['values'][1]
-        
-        print(f"尝试删除: ID={item_id}, 名称={item_name}")  # 调试信息
-        
-        # 确认删除
-        if not messagebox.askyesno("确认", f"确定要删除物品 '{item_name}' 吗？"):
-            return
-        
-        try:
-            # 检查物品是否存在
-            item_to_delete = self.db.get_item(item_id)
-            if not item_to_delete:
-                messagebox.showerror("错误", "物品不存在！")
-                return
-            
-            # 检查权限：只有管理员或物品所有者可以删除
-            if (not self.current_user.get('is_admin') and 
-                item_to_delete['user'] != self.current_user['username']):
-                messagebox.showerror("错误", "您只能删除自己的物品！")
-                return
-            
-            # 执行删除操作
-            print(f"正在删除物品 ID: {item_id}")
-            print(f"当前用户: {self.current_user['username']}")
-            print(f"物品所有者: {item_to_delete['user']}")
-            print(f"用户是管理员: {self.current_user.get('is_admin', False)}")
-            
-            # 从数据库中删除
-            success = self.db.delete_item(item_id)
-            print(f"数据库删除结果: {success}")
-            
-            if success:
-                # 从Treeview中删除选中项
-                for item in selected:
-                    self.tree.delete(item)
-                messagebox.showinfo("成功", "物品删除成功！")
-            else:
-                messagebox.showerror("错误", "删除失败！")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"删除失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-    
-    def search_items(self):
-        """搜索物品"""
-        item_type = self.type_var.get()
-        keyword = self.keyword_entry.get().strip()
-        
-        if item_type == "全部":
-            item_type = None
-        
-        self.load_items(item_type, keyword)
-    
-    def load_items(self, item_type=None, keyword=None):
-        """加载物品列表"""
-        if not hasattr(self, 'tree'):
-            return
-            
-        # 清空现有数据
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 获取物品数据
-        items = self.db.get_items(item_type, keyword)
-        print(f"加载了 {len(items)} 个物品")
-        
-        # 添加到表格
-        for item in items:
-            self.tree.insert('', tk.END, values=(
-                item['id'],
-                item['name'],
-                item['item_type'],
-                item['contact_phone'],
-                item['address']
-            ))
-
+import json
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from models import User, ItemType, Item, ATTRIBUTE_KINDS, parse_attribute_value
+from database import get_database, item_matches, parse_filters
+from async_database import AsyncDatabase
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 物品列表每页显示的行数
+PAGE_SIZE = 100
+
+# 读取其他进程（其他工作人员的客户端）写入的修改的间隔（毫秒）
+SYNC_INTERVAL = 2000
+
+# 物品列表的列标题；可以点击排序的列 -> 排序字段（见 database.SORT_FIELDS）
+ITEM_HEADINGS = {'ID': 'ID', '名称': '物品名称', '类型': '物品类型', '联系人': '联系人', '地址': '地址'}
+SORT_COLUMNS = {'ID': 'id', '名称': 'name', '类型': 'item_type', '地址': 'address'}
+
+ATTRIBUTES_PROMPT = "请输入额外属性（逗号分隔），数字、日期属性写成 属性:数字、属性:日期:"
+
+
+def sync_tree_rows(tree, rows):
+    """把 Treeview 的内容同步为 rows（(行 ID, 列值) 的列表）
+
+    按行 ID 比较，只删除多余的行、插入新行、移动位置变化的行、修改列值变化的行，
+    内容没有变化的行不会被触碰。返回实际改动的行数。
+    """
+    keep = {iid for iid, _ in rows}
+    stale = [iid for iid in tree.get_children() if iid not in keep]
+    if stale:
+        tree.delete(*stale)
+    changed = len(stale)
+    
+    children = list(tree.get_children())
+    existing = set(children)
+    for index, (iid, values) in enumerate(rows):
+        if iid not in existing:
+            tree.insert('', index, iid=iid, values=values)
+            children.insert(index, iid)
+            changed += 1
+            continue
+        if children[index] != iid:
+            tree.move(iid, '', index)
+            children.remove(iid)
+            children.insert(index, iid)
+            changed += 1
+        # Treeview 返回的列值会把数字字符串转成整数，按字符串比较
+        if tuple(map(str, tree.item(iid, 'values'))) != tuple(map(str, values)):
+            tree.item(iid, values=values)
+            changed += 1
+    return changed
+
+class ItemResurrectionGUI:
+    """物品复活系统GUI"""
+    def __init__(self, root):
+        self.root = root
+        self.root.title("物品复活系统")
+        self.root.geometry("800x600")
+        
+        # 与 main.initialize_system 共用同一个进程内的数据库实例
+        self.db = get_database()
+        # 数据库的修改和查询在后台线程执行，界面不会因为保存或搜索而卡住
+        self.db_worker = AsyncDatabase(self.db, self.root)
+        # 数据变更通知：无论修改来自哪个窗口，物品列表和类型下拉框都只更新受影响的行
+        self.db_worker.subscribe(self.on_db_change)
+        self.root.after(SYNC_INTERVAL, self.sync_database)
+        self.current_user = None
+        
+        # 物品列表当前的查询条件和页码
+        self.query_type = None
+        self.query_keyword = None
+        self.query_user = None
+        self.query_filters = None
+        self.query_order_by = None
+        self.query_descending = False
+        self.page = 0
+        self.total_items = 0
+        self.refresh_pending = False  # 是否已安排重新加载当前页
+        
+        # 初始化物品类型（如果数据库中没有）
+        self.initialize_item_types()
+        
+        # 创建主界面
+        self.create_login_interface()
+    
+    def initialize_item_types(self):
+        """初始化物品类型"""
+        # 添加一些默认的物品类型
+        default_types = [
+            ItemType("书籍", ["作者", "出版社", "ISBN"]),
+            ItemType("电子产品", ["品牌", "型号", "序列号"]),
+            ItemType("家具", ["材质", "尺寸", "颜色"]),
+            ItemType("衣物", ["尺码", "材质", "品牌"]),
+            ItemType("其他", [])
+        ]
+        
+        def add_default_types(db):
+            # 检查和添加都在后台线程中执行
+            if db.get_item_types():
+                return False
+            logger.info("初始化默认物品类型")
+            with db.batch():
+                for item_type in default_types:
+                    db.add_item_type(item_type)
+            return True
+        
+        self.db_worker.submit(add_default_types,
+                              callback=lambda added: added and logger.info("默认物品类型初始化完成"),
+                              errback=self.show_db_error)
+    
+    def create_login_interface(self):
+        """创建登录界面"""
+        self.clear_interface()
+        
+        # 登录框架
+        login_frame = ttk.Frame(self.root, padding="20")
+        login_frame.pack(expand=True)
+        
+        ttk.Label(login_frame, text="物品复活系统", font=("Arial", 20)).grid(row=0, column=0, columnspan=2, pady=20)
+        
+        ttk.Label(login_frame, text="用户名:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.username_entry = ttk.Entry(login_frame, width=30)
+        self.username_entry.grid(row=1, column=1, pady=5)
+        
+        ttk.Label(login_frame, text="密码:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.password_entry = ttk.Entry(login_frame, show="*", width=30)
+        self.password_entry.grid(row=2, column=1, pady=5)
+        
+        button_frame = ttk.Frame(login_frame)
+        button_frame.grid(row=3, column=0, columnspan=2, pady=20)
+        
+        self.login_button = ttk.Button(button_frame, text="登录", command=self.login)
+        self.login_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="注册", command=self.register).pack(side=tk.LEFT, padx=5)
+        
+        # 添加管理员初始化按钮（仅用于测试）
+        def on_admin(admin):
+            if not admin and button_frame.winfo_exists():
+                ttk.Button(button_frame, text="初始化管理员", command=self.initialize_admin).pack(side=tk.LEFT, padx=5)
+        
+        self.db_worker.submit('get_user', "admin", callback=on_admin, errback=self.show_db_error)
+    
+    def initialize_admin(self):
+        """初始化管理员账号（仅用于测试）"""
+        admin_user = User(
+            username="admin",
+            password="admin123",
+            name="系统管理员",
+            address="系统地址",
+            phone="00000000000",
+            email="admin@example.com",
+            is_admin=True,
+            is_approved=True
+        )
+        self.db_worker.submit(
+            'add_user', admin_user,
+            callback=lambda _: messagebox.showinfo("成功", "管理员账号已初始化！\n用户名: admin\n密码: admin123"),
+            errback=self.show_db_error)
+    
+    def create_main_interface(self):
+        """创建主界面"""
+        self.clear_interface()
+        
+        # 创建菜单栏
+        menubar = tk.Menu(self.root)
+        self.root.config(menu=menubar)
+        
+        # 文件菜单
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="刷新", command=self.refresh_items)
+        if metrics.enabled:
+            # 设置了环境变量 ITEM_DB_METRICS 时才记录运行指标
+            file_menu.add_command(label="运行统计", command=self.show_metrics)
+        file_menu.add_separator()
+        file_menu.add_command(label="退出", command=self.root.quit)
+        menubar.add_cascade(label="文件", menu=file_menu)
+        
+        # 用户菜单
+        user_menu = tk.Menu(menubar, tearoff=0)
+        user_menu.add_command(label="个人信息", command=self.show_user_info)
+        user_menu.add_command(label="退出登录", command=self.logout)
+        menubar.add_cascade(label="用户", menu=user_menu)
+        
+        # 如果是管理员，添加管理员菜单
+        if self.current_user and self.current_user.get('is_admin'):
+            admin_menu = tk.Menu(menubar, tearoff=0)
+            admin_menu.add_command(label="审核用户", command=self.approve_users)
+            admin_menu.add_command(label="管理物品类型", command=self.manage_item_types)
+            menubar.add_cascade(label="管理", menu=admin_menu)
+        
+        # 工具栏
+        toolbar = ttk.Frame(self.root)
+        toolbar.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Button(toolbar, text="刷新", command=self.refresh_items).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="添加物品", command=self.add_item).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="删除物品", command=self.delete_item).pack(side=tk.LEFT, padx=2)
+        
+        # 搜索框架
+        search_frame = ttk.Frame(self.root)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(search_frame, text="物品类型:").pack(side=tk.LEFT, padx=5)
+        self.type_var = tk.StringVar()
+        self.type_combobox = ttk.Combobox(search_frame, textvariable=self.type_var, values=["全部"], width=20)
+        self.type_combobox.pack(side=tk.LEFT, padx=5)
+        self.type_combobox.current(0)
+        self.load_type_names()
+        
+        ttk.Label(search_frame, text="关键字:").pack(side=tk.LEFT, padx=5)
+        self.keyword_entry = ttk.Entry(search_frame, width=30)
+        self.keyword_entry.pack(side=tk.LEFT, padx=5)
+        
+        # 按额外属性筛选，如“保质期<=今天+7; 数量>=2”
+        ttk.Label(search_frame, text="属性筛选:").pack(side=tk.LEFT, padx=5)
+        self.filter_entry = ttk.Entry(search_frame, width=24)
+        self.filter_entry.pack(side=tk.LEFT, padx=5)
+        
+        self.mine_var = tk.BooleanVar()
+        ttk.Checkbutton(search_frame, text="只看我的", variable=self.mine_var).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(search_frame, text="搜索", command=self.search_items).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="重置", command=self.reset_search).pack(side=tk.LEFT, padx=5)
+        
+        # 分页栏
+        page_frame = ttk.Frame(self.root)
+        page_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        
+        ttk.Button(page_frame, text="上一页", command=self.prev_page).pack(side=tk.LEFT, padx=2)
+        ttk.Button(page_frame, text="下一页", command=self.next_page).pack(side=tk.LEFT, padx=2)
+        self.page_label = ttk.Label(page_frame, text="")
+        self.page_label.pack(side=tk.LEFT, padx=10)
+        
+        # 物品列表
+        list_frame = ttk.Frame(self.root)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.tree = ttk.Treeview(list_frame, columns=('ID', '名称', '类型', '联系人', '地址'), show='headings')
+        # 点击列标题按该列排序，再次点击反向排序；排序由数据库的有序索引完成，只取当前页
+        for column, text in ITEM_HEADINGS.items():
+            if column in SORT_COLUMNS:
+                self.tree.heading(column, text=text, command=lambda column=column: self.sort_items(column))
+            else:
+                self.tree.heading(column, text=text)
+        
+        # 设置列宽
+        self.tree.column('ID', width=100)
+        self.tree.column('名称', width=200)
+        self.tree.column('类型', width=100)
+        self.tree.column('联系人', width=150)
+        self.tree.column('地址', width=200)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # 显示所有物品
+        self.load_items()
+    
+    def show_db_error(self, exc):
+        """后台数据库操作出错时的提示"""
+        messagebox.showerror("错误", f"数据库操作失败: {exc}")
+    
+    def clear_interface(self):
+        """清空界面"""
+        for widget in self.root.winfo_children():
+            widget.destroy()
+    
+    def login(self):
+        """用户登录"""
+        username = self.username_entry.get().strip()
+        password = self.password_entry.get().strip()
+        
+        if not username or not password:
+            messagebox.showwarning("警告", "用户名和密码不能为空！")
+            return
+        
+        # 密码哈希的验证需要几十毫秒，在后台线程执行，界面不会卡住；验证期间禁用登录按钮，避免重复提交
+        self.login_button.config(state=tk.DISABLED)
+        
+        def check(db):
+            user = db.get_user(username)
+            if user is None:
+                return None, False
+            verified = db.verify_password(username, password)
+            # 明文密码验证成功时已经替换为哈希，重新读取
+            return db.get_user(username), verified
+        
+        def on_checked(result):
+            if self.login_button.winfo_exists():
+                self.login_button.config(state=tk.NORMAL)
+            user, verified = result
+            if not user:
+                messagebox.showerror("错误", "用户名不存在！")
+                return
+            
+            if not verified:
+                messagebox.showerror("错误", "密码错误！")
+                return
+            
+            if not user['is_approved']:
+                messagebox.showinfo("提示", "您的账号正在审核中，请等待管理员批准！")
+                return
+            
+            self.current_user = user
+            self.create_main_interface()
+            messagebox.showinfo("成功", f"欢迎回来，{user['name']}！")
+        
+        def on_error(exc):
+            if self.login_button.winfo_exists():
+                self.login_button.config(state=tk.NORMAL)
+            self.show_db_error(exc)
+        
+        self.db_worker.submit(check, callback=on_checked, errback=on_error)
+    
+    def register(self):
+        """用户注册"""
+        username = simpledialog.askstring("注册", "请输入用户名:")
+        if not username:
+            return
+        
+        # 在后台线程中检查用户名，不阻塞界面
+        def on_checked(existing):
+            if existing:
+                messagebox.showerror("错误", "用户名已存在！")
+            else:
+                self.register_details(username)
+        
+        self.db_worker.submit('get_user', username, callback=on_checked, errback=self.show_db_error)
+    
+    def register_details(self, username):
+        """用户名可用，继续填写注册信息"""
+        password = simpledialog.askstring("注册", "请输入密码:", show="*")
+        if not password:
+            return
+        
+        name = simpledialog.askstring("注册", "请输入真实姓名:")
+        address = simpledialog.askstring("注册", "请输入地址:")
+        phone = simpledialog.askstring("注册", "请输入联系电话:")
+        email = simpledialog.askstring("注册", "请输入邮箱:")
+        
+        if not all([name, address, phone, email]):
+            messagebox.showwarning("警告", "所有信息都必须填写！")
+            return
+        
+        user = User(username, password, name, address, phone, email)
+        self.db_worker.submit('add_user', user,
+                              callback=lambda _: messagebox.showinfo("成功", "注册成功！请等待管理员审核。"),
+                              errback=self.show_db_error)
+    
+    def logout(self):
+        """退出登录"""
+        self.current_user = None
+        self.create_login_interface()
+    
+    def refresh_items(self):
+        """刷新物品列表（保持当前的查询条件、排序和页码）"""
+        self.load_page(self.page)
+    
+    def schedule_refresh(self):
+        """在处理完当前这批变更通知后重新加载当前页，一批通知只查询一次"""
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.root.after_idle(self._run_scheduled_refresh)
+    
+    def _run_scheduled_refresh(self):
+        self.refresh_pending = False
+        if hasattr(self, 'tree') and self.tree.winfo_exists():
+            self.refresh_items()
+    
+    def load_page(self, page):
+        """以当前的查询条件和排序加载某一页"""
+        self.load_items(self.query_type, self.query_keyword, page, self.query_user, self.query_filters,
+                        self.query_order_by, self.query_descending)
+    
+    def prev_page(self):
+        """上一页"""
+        if self.page > 0:
+            self.load_page(self.page - 1)
+    
+    def next_page(self):
+        """下一页"""
+        if (self.page + 1) * PAGE_SIZE < self.total_items:
+            self.load_page(self.page + 1)
+    
+    def sort_items(self, column):
+        """按列排序：点击新的列时从小到大，再次点击同一列时反向，回到第一页"""
+        order_by = SORT_COLUMNS[column]
+        descending = not self.query_descending if order_by == self.query_order_by else False
+        self.load_items(self.query_type, self.query_keyword, 0, self.query_user, self.query_filters,
+                        order_by, descending)
+    
+    def update_sort_headings(self):
+        """在排序列的标题上显示排序方向"""
+        for column, order_by in SORT_COLUMNS.items():
+            mark = ''
+            if order_by == self.query_order_by:
+                mark = ' ▼' if self.query_descending else ' ▲'
+            self.tree.heading(column, text=ITEM_HEADINGS[column] + mark)
+    
+    def reset_search(self):
+        """重置搜索条件和排序"""
+        self.type_var.set("全部")
+        self.keyword_entry.delete(0, tk.END)
+        self.filter_entry.delete(0, tk.END)
+        self.mine_var.set(False)
+        self.load_items()
+    
+    def show_metrics(self):
+        """显示数据库各操作的调用次数和耗时，每秒刷新一次"""
+        metrics_window = tk.Toplevel(self.root)
+        metrics_window.title("运行统计")
+        metrics_window.geometry("800x500")
+        
+        columns = ('操作', '次数', '平均(ms)', '最大(ms)', '总计(ms)', '耗时分布')
+        tree = ttk.Treeview(metrics_window, columns=columns, show='headings')
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=80 if column != '耗时分布' else 320)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        summary = ttk.Label(metrics_window, text="", justify=tk.LEFT)
+        summary.pack(fill=tk.X, padx=5)
+        
+        def refresh():
+            if not metrics_window.winfo_exists():
+                return
+            snapshot = metrics.snapshot()
+            rows = []
+            for name, stat in snapshot['operations'].items():
+                histogram = ' '.join(f"{label}:{count}" for label, count in stat['histogram'].items() if count)
+                rows.append((name, (name, stat['count'], stat['avg_ms'], stat['max_ms'], stat['total_ms'], histogram)))
+            sync_tree_rows(tree, rows)
+            
+            lines = [f"{name}: {value}" for name, value in snapshot['gauges'].items()]
+            lines += [f"{name}: 共 {stat['count']} 次，合计 {stat['total']} 字节，最大 {stat['max']}，最近 {stat['last']}"
+                      for name, stat in snapshot['values'].items()]
+            cache = self.db.cache_stats()
+            if cache:
+                lines.append(f"查询缓存: 命中 {cache['hits']}，未命中 {cache['misses']}，命中率 {cache['hit_rate']:.1%}，"
+                             f"条目 {cache['entries']}，淘汰 {cache['evictions']}，失效 {cache['invalidations']}")
+            summary.config(text='\n'.join(lines))
+            metrics_window.after(1000, refresh)
+        
+        def export():
+            path = filedialog.asksaveasfilename(parent=metrics_window, defaultextension='.json',
+                                                filetypes=[('JSON', '*.json')])
+            if path:
+                snapshot = metrics.snapshot()
+                snapshot['query_cache'] = self.db.cache_stats()
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        
+        btn_frame = ttk.Frame(metrics_window)
+        btn_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(btn_frame, text="导出 JSON", command=export).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="清零", command=metrics.reset).pack(side=tk.LEFT, padx=5)
+        refresh()
+    
+    def show_user_info(self):
+        """显示个人信息"""
+        if not self.current_user:
+            return
+        
+        info_window = tk.Toplevel(self.root)
+        info_window.title("个人信息")
+        info_window.geometry("400x300")
+        info_window.transient(self.root)
+        info_window.grab_set()
+        
+        frame = ttk.Frame(info_window, padding="20")
+        frame.pack(expand=True)
+        
+        ttk.Label(frame, text="个人信息", font=("Arial", 16)).grid(row=0, column=0, columnspan=2, pady=10)
+        
+        ttk.Label(frame, text="用户名:").grid(row=1, column=0, sticky=tk.W)
+        ttk.Label(frame, text=self.current_user['username']).grid(row=1, column=1, sticky=tk.W)
+        
+        ttk.Label(frame, text="姓名:").grid(row=2, column=0, sticky=tk.W)
+        ttk.Label(frame, text=self.current_user['name']).grid(row=2, column=1, sticky=tk.W)
+        
+        ttk.Label(frame, text="地址:").grid(row=3, column=0, sticky=tk.W)
+        ttk.Label(frame, text=self.current_user['address']).grid(row=3, column=1, sticky=tk.W)
+        
+        ttk.Label(frame, text="电话:").grid(row=4, column=0, sticky=tk.W)
+        ttk.Label(frame, text=self.current_user['phone']).grid(row=4, column=1, sticky=tk.W)
+        
+        ttk.Label(frame, text="邮箱:").grid(row=5, column=0, sticky=tk.W)
+        ttk.Label(frame, text=self.current_user['email']).grid(row=5, column=1, sticky=tk.W)
+        
+        ttk.Button(frame, text="关闭", command=info_window.destroy).grid(row=6, column=0, columnspan=2, pady=20)
+    
+    def approve_users(self):
+        """审核用户"""
+        if not self.current_user or not self.current_user['is_admin']:
+            return
+        
+        self.db_worker.submit('get_pending_users', callback=self.show_pending_users, errback=self.show_db_error)
+    
+    def show_pending_users(self, pending_users):
+        """显示待审核用户的列表"""
+        if not pending_users:
+            messagebox.showinfo("提示", "没有待审核的用户！")
+            return
+        
+        approve_window = tk.Toplevel(self.root)
+        approve_window.title("审核用户")
+        approve_window.geometry("500x400")
+        approve_window.transient(self.root)
+        approve_window.grab_set()
+        
+        tree = ttk.Treeview(approve_window, columns=('用户名', '姓名', '电话', '邮箱'), show='headings')
+        tree.heading('用户名', text='用户名')
+        tree.heading('姓名', text='姓名')
+        tree.heading('电话', text='电话')
+        tree.heading('邮箱', text='邮箱')
+        
+        def user_values(user):
+            return (user['username'], user['name'], user['phone'], user['email'])
+        
+        # 以用户名作为行 ID，收到变更通知时直接定位到对应的行
+        for user in pending_users:
+            tree.insert('', tk.END, iid=user['username'], values=user_values(user))
+        
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        def on_user_change(change):
+            if change.kind != 'user' or not tree.winfo_exists():
+                return
+            user = change.record
+            if user['is_approved']:
+                if tree.exists(change.key):
+                    tree.delete(change.key)
+            elif tree.exists(change.key):
+                tree.item(change.key, values=user_values(user))
+            else:
+                tree.insert('', tk.END, iid=change.key, values=user_values(user))
+        
+        unsubscribe = self.db_worker.subscribe(on_user_change)
+        approve_window.bind('<Destroy>', lambda e: unsubscribe() if e.widget is approve_window else None)
+        
+        def approve_selected():
+            selected = tree.selection()
+            if not selected:
+                messagebox.showwarning("警告", "请选择要审核的用户！")
+                return
+            
+            usernames = list(selected)
+            
+            def approve(db):
+                # 批量审核只写入一次
+                with db.batch():
+                    for username in usernames:
+                        db.update_user(username, {'is_approved': True})
+            
+            def on_approved(_):
+                messagebox.showinfo("成功", "用户审核成功！")
+                approve_window.destroy()
+            
+            self.db_worker.submit(approve, callback=on_approved, errback=self.show_db_error)
+        
+        ttk.Button(approve_window, text="审核通过", command=approve_selected).pack(pady=10)
+    
+    def manage_item_types(self):
+        """管理物品类型"""
+        if not self.current_user or not self.current_user['is_admin']:
+            return
+        
+        type_window = tk.Toplevel(self.root)
+        type_window.title("管理物品类型")
+        type_window.geometry("500x400")
+        type_window.transient(self.root)
+        type_window.grab_set()
+        
+        # 类型列表
+        tree = ttk.Treeview(type_window, columns=('名称', '属性'), show='headings')
+        tree.heading('名称', text='类型名称')
+        tree.heading('属性', text='额外属性')
+        
+        # 以类型名称作为行 ID，类型列表在后台线程中查询
+        def on_loaded(item_types):
+            if not tree.winfo_exists():
+                return
+            for item_type in item_types:
+                if not tree.exists(item_type['name']):
+                    tree.insert('', tk.END, iid=item_type['name'], values=self.item_type_values(item_type))
+        
+        self.db_worker.submit('get_item_types', callback=on_loaded, errback=self.show_db_error)
+        
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        def on_type_change(change):
+            if change.kind != 'item_type' or not tree.winfo_exists():
+                return
+            values = self.item_type_values(change.record)
+            if change.action == 'updated' and tree.exists(change.old_key):
+                if change.key == change.old_key:
+                    tree.item(change.key, values=values)
+                    return
+                # 改名时在原来的位置换成新 ID 的行
+                index = tree.index(change.old_key)
+                tree.delete(change.old_key)
+                if tree.exists(change.key):
+                    tree.delete(change.key)
+                tree.insert('', index, iid=change.key, values=values)
+            elif tree.exists(change.key):
+                tree.item(change.key, values=values)
+            else:
+                tree.insert('', tk.END, iid=change.key, values=values)
+        
+        unsubscribe = self.db_worker.subscribe(on_type_change)
+        type_window.bind('<Destroy>', lambda e: unsubscribe() if e.widget is type_window else None)
+        
+        # 按钮框架
+        btn_frame = ttk.Frame(type_window)
+        btn_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        def add_type():
+            name = simpledialog.askstring("添加类型", "请输入物品类型名称:")
+            if not name:
+                return
+            
+            attrs = simpledialog.askstring("添加属性", ATTRIBUTES_PROMPT)
+            try:
+                item_type = ItemType.parse(name, attrs)
+            except ValueError as e:
+                messagebox.showerror("错误", str(e))
+                return
+            self.db_worker.submit('add_item_type', item_type, errback=self.show_db_error)
+        
+        ttk.Button(btn_frame, text="添加类型", command=add_type).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="修改类型", command=lambda: self.edit_item_type(tree)).pack(side=tk.LEFT, padx=5)
+    
+    def edit_item_type(self, tree):
+        """编辑物品类型"""
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("警告", "请选择要修改的类型！")
+            return
+        
+        old_name = selected[0]
+        old_attrs = tree.item(old_name)['values'][1]
+        
+        new_name = simpledialog.askstring("修改类型", "请输入新的类型名称:", initialvalue=old_name)
+        if not new_name:
+            return
+        # 列表以类型名称作为行 ID
+        if new_name != old_name and tree.exists(new_name):
+            messagebox.showerror("错误", f"物品类型“{new_name}”已存在！")
+            return
+        
+        new_attrs = simpledialog.askstring("修改属性", ATTRIBUTES_PROMPT, initialvalue=old_attrs)
+        try:
+            new_type = ItemType.parse(new_name, new_attrs)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        attributes = new_type.attributes
+        
+        # 该类型物品的额外属性随之迁移：去掉的属性按位置对应到新增的属性时可以改名保留，否则会被删除
+        old_list = ItemType.parse(old_name, str(old_attrs)).attributes
+        removed = [attr for attr in old_list if attr not in attributes]
+        added = [attr for attr in attributes if attr not in old_list]
+        renamed_attributes = {}
+        if removed and len(removed) == len(added):
+            pairs = '，'.join(f"{old} → {new}" for old, new in zip(removed, added))
+            answer = messagebox.askyesnocancel("修改属性", f"是否把物品的属性改名（{pairs}）？\n选择“否”将删除这些属性的值。")
+            if answer is None:
+                return
+            if answer:
+                renamed_attributes = dict(zip(removed, added))
+        elif removed:
+            if not messagebox.askyesno("修改属性", f"该类型物品的属性 {'，'.join(removed)} 将被删除，确定吗？"):
+                return
+        
+        def on_error(exc):
+            # 其他客户端同时添加了同名类型
+            if isinstance(exc, ValueError):
+                messagebox.showerror("错误", str(exc))
+            else:
+                self.show_db_error(exc)
+        
+        # 列表由变更通知更新
+        self.db_worker.submit('update_item_type', old_name, new_type, renamed_attributes, errback=on_error)
+    
+    @staticmethod
+    def item_type_values(item_type):
+        """物品类型在列表中显示的列"""
+        return (item_type['name'], ItemType.from_dict(item_type).describe_attributes())
+    
+    def add_item(self):
+        """添加物品"""
+        if not self.current_user:
+            return
+        
+        # 在后台线程中获取物品类型
+        self.db_worker.submit('get_item_types', callback=self.select_item_type, errback=self.show_db_error)
+    
+    def select_item_type(self, item_types):
+        """选择新物品的类型并填写详细信息"""
+        if not item_types:
+            messagebox.showwarning("警告", "暂无物品类型，请联系管理员添加！")
+            return
+        
+        types_by_name = {t['name']: t for t in item_types}
+        type_names = list(types_by_name)
+        
+        # 使用对话框选择类型
+        def on_type_select():
+            selected_type = type_var.get()
+            if selected_type and selected_type in type_names:
+                add_item_details(selected_type)
+                type_window.destroy()
+            else:
+                messagebox.showerror("错误", "请选择有效的物品类型！")
+        
+        type_window = tk.Toplevel(self.root)
+        type_window.title("选择物品类型")
+        type_window.geometry("300x150")
+        type_window.transient(self.root)
+        type_window.grab_set()
+        
+        ttk.Label(type_window, text="请选择物品类型:").pack(pady=10)
+        
+        type_var = tk.StringVar()
+        type_combo = ttk.Combobox(type_window, textvariable=type_var, values=type_names, width=30)
+        type_combo.pack(pady=10)
+        if type_names:
+            type_combo.current(0)
+        
+        ttk.Button(type_window, text="确定", command=on_type_select).pack(pady=10)
+    
+        def add_item_details(selected_type):
+            """添加物品详细信息"""
+            # 获取基本信息
+            name = simpledialog.askstring("物品名称", "请输入物品名称:")
+            if not name:
+                return
+            
+            description = simpledialog.askstring("物品描述", "请输入物品描述:")
+            address = simpledialog.askstring("物品地址", "请输入物品所在地址:")
+            phone = simpledialog.askstring("联系电话", "请输入联系电话:")
+            email = simpledialog.askstring("联系邮箱", "请输入联系邮箱:")
+            
+            if not all([description, address, phone, email]):
+                messagebox.showwarning("警告", "所有信息都必须填写！")
+                return
+            
+            # 获取额外属性
+            item_type = ItemType.from_dict(types_by_name[selected_type])
+            extra_attributes = {}
+            
+            for attr in item_type.attributes:
+                kind = item_type.kind(attr)
+                hint = {'number': '（数字）', 'date': '（日期，如 2024-05-01）'}.get(kind, '')
+                value = simpledialog.askstring("额外属性", f"请输入{attr}{hint}:")
+                if value:
+                    if parse_attribute_value(kind, value) is None:
+                        messagebox.showwarning("警告", f"{attr}应为{ATTRIBUTE_KINDS[kind]}，“{value}”无法识别！")
+                        return
+                    extra_attributes[attr] = value
+            
+            # 创建物品
+            item = Item(
+                name=name,
+                description=description,
+                address=address,
+                contact_phone=phone,
+                contact_email=email,
+                item_type=selected_type,
+                user=self.current_user['username'],
+                extra_attributes=extra_attributes
+            )
+            
+            # 列表由变更通知更新
+            self.db_worker.submit('add_item', item, callback=lambda _: messagebox.showinfo("成功", "物品添加成功！"),
+                                  errback=self.show_db_error)
+    
+    def delete_item(self):
+        """删除物品"""
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("警告", "请选择要删除的物品！")
+            return
+        
+        # 获取选中的物品ID和名称（行 ID 就是物品ID）
+        item_id = selected[0]
+        item_name = self.tree.item(selected[0])['values'][1]
+        
+        logger.debug("尝试删除: ID=%s, 名称=%s", item_id, item_name)
+        
+        # 确认删除
+        if not messagebox.askyesno("确认", f"确定要删除物品 '{item_name}' 吗？"):
+            return
+        
+        username = self.current_user['username']
+        is_admin = self.current_user.get('is_admin', False)
+        
+        def delete(db):
+            # 检查和删除在后台线程中一起执行，返回结果状态
+            item_to_delete = db.get_item(item_id)
+            if not item_to_delete:
+                return 'missing'
+            # 检查权限：只有管理员或物品所有者可以删除
+            if not is_admin and item_to_delete['user'] != username:
+                return 'forbidden'
+            logger.debug("正在删除物品 ID: %s，当前用户: %s，物品所有者: %s，用户是管理员: %s", item_id,
+                         username, item_to_delete['user'], is_admin)
+            return 'deleted' if db.delete_item(item_id) else 'failed'
+        
+        def on_deleted(status):
+            logger.debug("数据库删除结果: %s", status)
+            if status == 'deleted':
+                messagebox.showinfo("成功", "物品删除成功！")
+            elif status == 'missing':
+                messagebox.showerror("错误", "物品不存在！")
+            elif status == 'forbidden':
+                messagebox.showerror("错误", "您只能删除自己的物品！")
+            else:
+                messagebox.showerror("错误", "删除失败！")
+        
+        self.db_worker.submit(delete, callback=on_deleted, errback=self.show_db_error)
+    
+    def search_items(self):
+        """搜索物品"""
+        item_type = self.type_var.get()
+        keyword = self.keyword_entry.get().strip()
+        
+        if item_type == "全部":
+            item_type = None
+        # 勾选"只看我的"时只显示当前用户的物品
+        user = self.current_user['username'] if self.mine_var.get() and self.current_user else None
+        try:
+            filters = parse_filters(self.filter_entry.get())
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        
+        # 保持当前的排序
+        self.load_items(item_type, keyword, 0, user, filters, self.query_order_by, self.query_descending)
+    
+    def load_items(self, item_type=None, keyword=None, page=0, user=None, filters=None, order_by=None,
+                   descending=False):
+        """加载物品列表（只加载一页），user 不为空时只加载该用户的物品，filters 为属性筛选条件，
+        order_by 为排序字段（None 时按添加顺序）"""
+        if not hasattr(self, 'tree'):
+            return
+        
+        def query(db):
+            # 获取当前页的物品数据
+            items, total = db.get_items_page(item_type, keyword, page * PAGE_SIZE, PAGE_SIZE, user, filters,
+                                             order_by, descending)
+            if not items and page > 0:
+                # 当前页已经没有数据（例如删除了最后一页的物品），退回到最后一页
+                last_page = max(0, (total - 1) // PAGE_SIZE)
+                items, total = db.get_items_page(item_type, keyword, last_page * PAGE_SIZE, PAGE_SIZE, user,
+                                                 filters, order_by, descending)
+                return items, total, last_page
+            return items, total, page
+        
+        def on_error(exc):
+            if isinstance(exc, ValueError):
+                # 筛选的属性不存在、值无法识别
+                messagebox.showerror("错误", f"筛选条件有误: {exc}")
+            else:
+                self.show_db_error(exc)
+        
+        self.query_type = item_type
+        self.query_keyword = keyword
+        self.query_user = user
+        self.query_filters = filters
+        self.query_order_by = order_by
+        self.query_descending = descending
+        self.page = page
+        self.update_sort_headings()
+        self.db_worker.submit(query, callback=self.show_items, errback=on_error)
+    
+    def show_items(self, result):
+        """把查询结果显示到物品列表"""
+        items, total, page = result
+        if not self.tree.winfo_exists():
+            return
+        
+        self.page = page
+        self.total_items = total
+        
+        # 以物品ID作为行 ID 与现有的行比较，刷新、删除后补位时只改动有变化的行
+        sync_tree_rows(self.tree, [(str(item['id']), self.item_values(item)) for item in items])
+        
+        self.update_page_label()
+    
+    @staticmethod
+    def item_values(item):
+        """物品在列表中显示的列"""
+        return (item['id'], item['name'], item['item_type'], item['contact_phone'], item['address'])
+    
+    def update_page_label(self):
+        page_count = max(1, (self.total_items + PAGE_SIZE - 1) // PAGE_SIZE)
+        self.page_label.config(text=f"第 {self.page + 1}/{page_count} 页，共 {self.total_items} 个物品")
+    
+    def sync_database(self):
+        """定时在后台读取其他进程的修改，界面由变更通知更新"""
+        self.db_worker.submit('sync')
+        self.root.after(SYNC_INTERVAL, self.sync_database)
+    
+    def on_db_change(self, change):
+        """处理数据变更通知（在主线程中执行）"""
+        if change.kind == 'database':
+            self.on_db_reloaded()
+        elif change.kind == 'item_type':
+            self.on_item_type_change(change)
+        elif change.kind == 'item':
+            self.on_item_change(change)
+    
+    def on_db_reloaded(self):
+        """数据库被重新加载（其他进程压缩了数据文件），重新查询类型和当前页"""
+        if hasattr(self, 'type_combobox') and self.type_combobox.winfo_exists():
+            self.load_type_names()
+        if hasattr(self, 'tree') and self.tree.winfo_exists():
+            self.refresh_items()
+    
+    def load_type_names(self):
+        """在后台线程中查询物品类型，填入搜索栏的下拉框"""
+        def on_loaded(item_types):
+            if self.type_combobox.winfo_exists():
+                self.type_combobox['values'] = ["全部"] + [t['name'] for t in item_types]
+        
+        self.db_worker.submit('get_item_types', callback=on_loaded, errback=self.show_db_error)
+    
+    def on_item_type_change(self, change):
+        """更新搜索栏的物品类型下拉框"""
+        if not hasattr(self, 'type_combobox') or not self.type_combobox.winfo_exists():
+            return
+        names = list(self.type_combobox['values'])
+        if change.action == 'updated' and change.old_key in names:
+            names[names.index(change.old_key)] = change.key
+            if self.type_var.get() == change.old_key:
+                self.type_var.set(change.key)
+        elif change.key not in names:
+            names.append(change.key)
+        self.type_combobox['values'] = names
+        
+        if change.action == 'updated' and change.record != change.old_record:
+            # 该类型的物品随之改了类型名或额外属性，重新查询当前页
+            if self.query_type == change.old_key:
+                self.query_type = change.key
+            self.refresh_items()
+    
+    def on_item_change(self, change):
+        """只更新物品列表中受影响的行，不重新查询整页"""
+        if not hasattr(self, 'tree') or not self.tree.winfo_exists():
+            return
+        if self.query_filters or self.query_order_by:
+            # 属性筛选的结果按属性值排序，是否符合条件也取决于物品类型的属性定义；按列排序时物品的位置由排序决定，
+            # 都直接重新查询当前页
+            self.schedule_refresh()
+            return
+        matched_before = change.old_record is not None and item_matches(
+            change.old_record, self.query_type, self.query_keyword, self.query_user)
+        matched_after = change.record is not None and item_matches(
+            change.record, self.query_type, self.query_keyword, self.query_user)
+        self.total_items += matched_after - matched_before
+        
+        row = str(change.old_key)
+        if self.tree.exists(row):
+            if not matched_after:
+                self.tree.delete(row)
+                if (self.page + 1) * PAGE_SIZE <= self.total_items:
+                    # 后面还有物品，重新加载当前页让它补上空位
+                    self.schedule_refresh()
+            elif change.key != change.old_key:
+                # 改了ID的物品排到最后，当前页之后的物品随之前移
+                self.schedule_refresh()
+            else:
+                self.tree.item(row, values=self.item_values(change.record))
+        elif change.action == 'added':
+            # 新物品排在最后，只有当前页就是最后一页时才显示出来；否则落在当前页之后，当前页不变
+            if matched_after and len(self.tree.get_children()) < PAGE_SIZE \
+                    and (self.page + 1) * PAGE_SIZE >= self.total_items:
+                self.tree.insert('', tk.END, iid=str(change.key), values=self.item_values(change.record))
+        elif matched_before != matched_after or (matched_after and change.key != change.old_key):
+            # 不在当前页的物品开始或不再符合条件、或改了ID，它可能在当前页之前，当前页的边界随之移动
+            self.schedule_refresh()
+        
+        self.update_page_label()
@@ -0,0 +1,80 @@
+"""物品ID生成
+
+ID 是 25 位十进制数字组成的字符串：
+
+    YYYYmmddHHMMSSfff  同一毫秒内的序号  节点号
+        17 位              3 位          5 位
+
+开头是精确到毫秒的 UTC 时间，因此按字符串排序就是按创建时间排序；使用 UTC 是为了夏令时切换时ID不会倒退。
+原来的ID是本地时间的秒级时间戳 + 3 位随机数，格式兼容，但与新ID相差一个时区偏移：
+升级前后一段时间（本地时间快于 UTC 时为时区偏移那么长）内创建的新旧ID按字符串比较不保持时间顺序，
+按创建时间范围查询旧物品时结果也会偏移同样的时间。同一进程内由时间戳和序号保证单调递增、不会重复；
+节点号在每个进程启动（或 fork）时随机选取，不同进程同一毫秒、同一序号又恰好选中同一节点号的概率可以忽略。
+"""
+import os
+import random
+import threading
+import time
+from datetime import timezone
+
+
+def _random_node():
+    return random.SystemRandom().randrange(100000)
+
+
+def id_floor(moment):
+    """时间（datetime）对应的最小ID，用于按创建时间范围查询：在 moment 及之后创建的物品ID都不小于它
+
+    不带时区的 moment 按本地时间处理，与 datetime.now() 一致。
+    """
+    moment = moment.astimezone(timezone.utc)
+    return moment.strftime('%Y%m%d%H%M%S') + f'{moment.microsecond // 1000:03d}'
+
+
+class IdGenerator:
+    """单调递增、按时间排序的ID生成器（线程安全）"""
+    def __init__(self, node=None):
+        self.node = _random_node() if node is None else node
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._seq = 0
+        # 同一秒内的ID共用格式化好的秒级时间戳，不必每次调用 strftime
+        self._second = None
+        self._second_text = ''
+
+    def next_id(self):
+        """生成一个新ID"""
+        with self._lock:
+            now = time.time_ns() // 1000000
+            if now > self._last_ms:
+                self._last_ms = now
+                self._seq = 0
+            else:
+                # 同一毫秒内或系统时间回拨时沿用上一个时间戳，序号用完后借用下一毫秒，保证单调递增
+                self._seq += 1
+                if self._seq >= 1000:
+                    self._last_ms += 1
+                    self._seq = 0
+            seconds, millis = divmod(self._last_ms, 1000)
+            if seconds != self._second:
+                self._second = seconds
+                self._second_text = time.strftime('%Y%m%d%H%M%S', time.gmtime(seconds))
+            return f'{self._second_text}{millis:03d}{self._seq:03d}{self.node:05d}'
+
+
+_generator = IdGenerator()
+
+
+def _reset_after_fork():
+    # fork 出的子进程与父进程的生成器状态相同，重新选取节点号以免生成相同的ID
+    global _generator
+    _generator = IdGenerator()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def new_id():
+    """生成一个新的物品ID"""
+    return _generator.next_id()
@@ -0,0 +1,253 @@
+"""内存索引结构"""
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from operator import itemgetter
+
+
+# 连续的 ASCII 字母数字，或连续的其他文字字符（中文等）；空白、标点、下划线作为分隔符
+_RUN_PATTERN = re.compile(r'[0-9a-zA-Z]+|[^\W0-9a-zA-Z_]+')
+
+
+def _gram_size(run):
+    # ASCII 字符集小，二元组区分度太低，用三元组；中文用二元组
+    return 3 if run[0].isascii() else 2
+
+
+def tokenize(text):
+    """把（已转小写的）文本切分为索引词元
+
+    中文没有空格分词，按字符二元组（bigram）切分；ASCII 单词单独切出，按三元组（trigram）切分。
+    比 n-gram 还短的片段不产生词元，查询时由子串校验兜底。
+    """
+    tokens = set()
+    for run in _RUN_PATTERN.findall(text):
+        n = _gram_size(run)
+        tokens.update([run[i:i + n] for i in range(len(run) - n + 1)])
+    return tokens
+
+
+class InvertedIndex:
+    """关键字倒排索引
+
+    对每条记录（对象）的若干文本属性建立 词元 -> 记录ID集合 的倒排表。查询时对关键字的各个词元求交集
+    得到候选集，再对候选记录做一次真正的子串匹配，因此结果与直接子串匹配完全一致。
+    """
+    def __init__(self, fields):
+        self.fields = fields
+        self._postings = defaultdict(set)  # 词元 -> 记录ID集合
+        self._docs = {}      # 记录ID -> (插入序号, 小写文本)，按插入顺序排列
+        self._counter = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _text(self, record):
+        # 各字段之间用 \0 分隔，避免关键字跨字段匹配
+        return '\0'.join(getattr(record, field).lower() for field in self.fields)
+
+    def add(self, doc_id, record, order=None):
+        """添加记录；order 为 None 时排在所有已有记录之后"""
+        if order is None:
+            self._counter += 1
+            order = self._counter
+        text = self._text(record)
+        postings = self._postings
+        for token in self._tokens(text):
+            postings[token].add(doc_id)
+        self._docs[doc_id] = (order, text)
+
+    def _tokens(self, text):
+        tokens = set()
+        for field_text in text.split('\0'):
+            tokens |= tokenize(field_text)
+        return tokens
+
+    def _unlink(self, doc_id, text):
+        # 词元不单独保存，删除时由文本重新切分得到，以节省内存
+        for token in self._tokens(text):
+            postings = self._postings[token]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[token]
+
+    def remove(self, doc_id):
+        """删除记录"""
+        doc = self._docs.pop(doc_id, None)
+        if doc is not None:
+            self._unlink(doc_id, doc[1])
+
+    def update(self, doc_id, record, new_id=None):
+        """更新记录的文本；ID 不变时保持原来的顺序，ID 改变时视为新插入"""
+        if new_id is not None and new_id != doc_id:
+            self.remove(doc_id)
+            self.add(new_id, record)
+            return
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            self.add(doc_id, record)
+            return
+        self._unlink(doc_id, doc[1])
+        # 对已有的键重新赋值不会改变字典中的位置
+        self.add(doc_id, record, doc[0])
+
+    def search(self, keyword, within=()):
+        """返回文本中包含 keyword（不区分大小写）的记录ID列表，按插入顺序排列
+
+        within 为若干记录ID集合（或以ID为键的字典），结果限定在它们的交集中，
+        它们与词元的倒排表一起求交集，候选集合由最小的一个决定。
+        """
+        keyword = keyword.lower()
+        docs = self._docs
+        tokens = tokenize(keyword)
+        if not tokens and not within:
+            # 关键字太短（如单个汉字）或只有标点，无法使用索引，直接在预先转好小写的文本中匹配
+            return [doc_id for doc_id, doc in docs.items() if keyword in doc[1]]
+
+        postings = list(within)
+        for token in tokens:
+            ids = self._postings.get(token)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        smallest, rest = postings[0], postings[1:]
+        candidates = {doc_id for doc_id in smallest if all(doc_id in ids for ids in rest)}
+
+        # _docs 按插入顺序排列：候选很多时按顺序过滤比排序更快，候选少时只对候选排序
+        if len(candidates) * 8 > len(docs):
+            return [doc_id for doc_id, doc in docs.items()
+                    if doc_id in candidates and keyword in doc[1]]
+        matched = [doc_id for doc_id in candidates if keyword in docs[doc_id][1]]
+        matched.sort(key=lambda doc_id: docs[doc_id][0])
+        return matched
+
+
+class KeyIndex:
+    """等值索引
+
+    键 -> 记录ID 的集合。集合用 记录ID -> 插入序号 的字典表示，既能 O(1) 判断成员，又按插入序号排列，
+    与 InvertedIndex 一样是全局的插入顺序：记录改变键（move）时保留原来的序号，在新的集合中排在原来的位置，
+    而不是排到最后。不是加在最后的记录先直接加入，集合在下次 get 时才重新排序。
+    """
+    def __init__(self):
+        self._buckets = {}
+        self._unsorted = set()  # 需要重新排序的键
+        self._counter = 0
+
+    def add(self, key, doc_id, order=None):
+        """添加一条记录；order 为 None 时排在所有已有记录之后"""
+        if order is None:
+            self._counter += 1
+            order = self._counter
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = {}
+        elif doc_id not in bucket and order < next(reversed(bucket.values())):
+            self._unsorted.add(key)
+        bucket[doc_id] = order
+
+    def remove(self, key, doc_id):
+        """删除一条记录，返回它的插入序号；记录不存在时什么也不做，返回 None"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+        order = bucket.pop(doc_id, None)
+        if not bucket:
+            del self._buckets[key]
+            self._unsorted.discard(key)
+        return order
+
+    def move(self, old_key, new_key, doc_id):
+        """把记录的键从 old_key 改为 new_key，保持原来的插入顺序"""
+        if old_key != new_key:
+            self.add(new_key, doc_id, self.remove(old_key, doc_id))
+
+    def get(self, key):
+        """键为 key 的记录ID（只读的字典视图，不要修改）"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return {}
+        if key in self._unsorted:
+            self._unsorted.discard(key)
+            bucket = self._buckets[key] = dict(sorted(bucket.items(), key=itemgetter(1)))
+        return bucket
+    
+    def rename(self, old_key, new_key):
+        """把键为 old_key 的记录全部改为 new_key（整个集合直接移动），返回这些记录ID"""
+        bucket = self._buckets.pop(old_key, None)
+        if not bucket:
+            return {}
+        target = self._buckets.get(new_key)
+        if old_key in self._unsorted:
+            self._unsorted.discard(old_key)
+            self._unsorted.add(new_key)
+        if target is None:
+            self._buckets[new_key] = bucket
+        else:
+            target.update(bucket)
+            self._unsorted.add(new_key)
+        return bucket
+
+
+class SortedIndex:
+    """有序索引
+
+    按 (键, 记录ID) 排序的两个平行列表，插入和删除用二分查找定位，范围查询只需两次二分查找加切片。
+    """
+    def __init__(self, pairs=()):
+        entries = sorted(pairs)
+        self._keys = [key for key, _ in entries]
+        self._ids = [doc_id for _, doc_id in entries]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        """按键从小到大逐个生成记录ID"""
+        return iter(self._ids)
+
+    def __reversed__(self):
+        """按键从大到小逐个生成记录ID"""
+        return reversed(self._ids)
+
+    def _locate(self, key, doc_id):
+        # 键相同的记录按记录ID排序，先找到键的范围，再在其中按记录ID二分
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, start)
+        return bisect_left(self._ids, doc_id, start, end)
+
+    def add(self, key, doc_id):
+        """添加一条记录"""
+        i = self._locate(key, doc_id)
+        self._keys.insert(i, key)
+        self._ids.insert(i, doc_id)
+
+    def remove(self, key, doc_id):
+        """删除一条记录，记录不存在时什么也不做"""
+        i = self._locate(key, doc_id)
+        if i < len(self._keys) and self._keys[i] == key and self._ids[i] == doc_id:
+            del self._keys[i]
+            del self._ids[i]
+
+    def range(self, low=None, high=None, include_low=True, include_high=False):
+        """返回键在 low 和 high 之间的记录ID列表，按键排序；默认为 [low, high)，low/high 为 None 表示不限"""
+        keys = self._keys
+        if low is None:
+            start = 0
+        else:
+            start = bisect_left(keys, low) if include_low else bisect_right(keys, low)
+        if high is None:
+            end = len(keys)
+        else:
+            end = bisect_right(keys, high) if include_high else bisect_left(keys, high)
+        return self._ids[start:end]
+
+    def head(self, count=None, descending=False):
+        """键最小（descending=True 时最大）的 count 条记录ID，count 为 None 时返回全部"""
+        ids = self._ids
+        if count is None:
+            return ids[::-1] if descending else list(ids)
+        if descending:
+            return ids[max(len(ids) - count, 0):][::-1]
+        return ids[:count]
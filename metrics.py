@@ -0,0 +1,135 @@
+"""运行指标
+
+设置环境变量 ITEM_DB_METRICS=1 后，数据库的每个公开方法都会记录调用次数、总耗时和耗时分布（直方图），
+保存时记录写入的字节数，并记录当前的物品数。没有设置时方法不会被包装，没有任何额外开销。
+
+同时设置 ITEM_DB_METRICS_FILE 时，程序退出时把指标以 JSON 格式写入该文件；也可以调用 metrics.dump(path)。
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+ENV_VAR = 'ITEM_DB_METRICS'
+FILE_ENV_VAR = 'ITEM_DB_METRICS_FILE'
+
+# 耗时直方图各个桶的上限（毫秒），超过最后一个上限的计入溢出桶
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+
+class Metrics:
+    """线程安全的指标记录"""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空已记录的指标"""
+        with self._lock:
+            self._timings = {}  # 名称 -> [次数, 总耗时, 最大耗时, 各桶计数]
+            self._values = {}   # 名称 -> [次数, 总和, 最大值, 最后一次的值]
+            self._gauges = {}   # 名称 -> 当前值
+            self._started = time.time()
+
+    def record_time(self, name, seconds):
+        """记录一次耗时"""
+        ms = seconds * 1000
+        with self._lock:
+            stat = self._timings.get(name)
+            if stat is None:
+                stat = self._timings[name] = [0, 0.0, 0.0, [0] * (len(BUCKETS_MS) + 1)]
+            stat[0] += 1
+            stat[1] += ms
+            if ms > stat[2]:
+                stat[2] = ms
+            for i, bound in enumerate(BUCKETS_MS):
+                if ms <= bound:
+                    stat[3][i] += 1
+                    break
+            else:
+                stat[3][-1] += 1
+
+    def observe(self, name, value):
+        """记录一次数值（如每次保存写入的字节数）"""
+        with self._lock:
+            stat = self._values.get(name)
+            if stat is None:
+                stat = self._values[name] = [0, 0, 0, 0]
+            stat[0] += 1
+            stat[1] += value
+            stat[2] = max(stat[2], value)
+            stat[3] = value
+
+    def set_gauge(self, name, value):
+        """记录当前值（如物品数）"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self):
+        """当前指标的字典，可以直接转换为 JSON"""
+        labels = [f'<={bound}ms' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}ms']
+        with self._lock:
+            operations = {
+                name: {
+                    'count': count,
+                    'total_ms': round(total, 3),
+                    'avg_ms': round(total / count, 3),
+                    'max_ms': round(max_ms, 3),
+                    'histogram': dict(zip(labels, buckets))
+                }
+                for name, (count, total, max_ms, buckets) in sorted(self._timings.items())
+            }
+            values = {
+                name: {'count': count, 'total': total, 'max': max_value, 'last': last}
+                for name, (count, total, max_value, last) in sorted(self._values.items())
+            }
+            return {
+                'enabled': self.enabled,
+                'uptime_seconds': round(time.time() - self._started, 3),
+                'operations': operations,
+                'values': values,
+                'gauges': dict(self._gauges)
+            }
+
+    def dump(self, path):
+        """把指标以 JSON 格式写入文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def timed(self, name):
+        """装饰器：记录函数每次调用的耗时"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record_time(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def instrument(self, cls):
+        """类装饰器：启用时包装类中定义的所有公开方法，未启用时原样返回
+
+        生成器和上下文管理器（如 iter_items、batch）的调用只是创建对象，不计时。
+        """
+        if not self.enabled:
+            return cls
+        for name, attr in list(vars(cls).items()):
+            if name.startswith('_') or not inspect.isfunction(attr):
+                continue
+            if inspect.isgeneratorfunction(inspect.unwrap(attr)):
+                continue
+            setattr(cls, name, self.timed(name)(attr))
+        return cls
+
+
+metrics = Metrics(enabled=bool(os.environ.get(ENV_VAR)))
+
+if metrics.enabled and os.environ.get(FILE_ENV_VAR):
+    atexit.register(metrics.dump, os.environ[FILE_ENV_VAR])
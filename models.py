@@ -1,9 +1,36 @@
 import json
-from datetime import datetime
-import random
+import re
+from datetime import date
+from ids import new_id
+
+# 额外属性的值类型：文本、数字、日期；未指定类型的属性为文本
+ATTRIBUTE_KINDS = {'string': '文本', 'number': '数字', 'date': '日期'}
+
+_NUMBER_PATTERN = re.compile(r'\s*([-+]?\d+(?:\.\d+)?)')
+_DATE_PATTERN = re.compile(r'\s*(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})')
+
+
+def parse_attribute_value(kind, value):
+    """把属性值转换为可比较的键：数字为 float（允许带单位，如“2年”），日期为 datetime.date
+    （如 2024-05-01、2024/5/1、2024年5月1日），文本为字符串；无法转换时返回 None"""
+    if kind == 'number':
+        match = _NUMBER_PATTERN.match(str(value))
+        return float(match.group(1)) if match else None
+    if kind == 'date':
+        match = _DATE_PATTERN.match(str(value))
+        if not match:
+            return None
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            return None
+    return str(value)
+
 
 class User:
     """用户类"""
+    __slots__ = ('username', 'password', 'name', 'address', 'phone', 'email', 'is_admin', 'is_approved')
+    
     def __init__(self, username, password, name, address, phone, email, is_admin=False, is_approved=False):
         self.username = username
         self.password = password
@@ -26,32 +53,74 @@ class User:
             'is_admin': self.is_admin,
             'is_approved': self.is_approved
         }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """从字典创建"""
+        return cls(data['username'], data['password'], data['name'], data['address'],
+                   data['phone'], data['email'], data.get('is_admin', False), data.get('is_approved', False))
 
 class ItemType:
     """物品类型类"""
-    def __init__(self, name, attributes):
+    __slots__ = ('name', 'attributes', 'attribute_types')
+    
+    def __init__(self, name, attributes, attribute_types=None):
         self.name = name
         self.attributes = attributes  # 额外属性列表
+        # 属性名 -> 值类型（ATTRIBUTE_KINDS 中的 number/date），只记录不是文本的属性
+        self.attribute_types = {attr: kind for attr, kind in (attribute_types or {}).items()
+                                if attr in attributes and kind != 'string'}
+    
+    def kind(self, attr):
+        """属性的值类型"""
+        return self.attribute_types.get(attr, 'string')
+    
+    def describe_attributes(self):
+        """属性列表的文字形式，如“保质期:日期, 数量:数字, 产地”，可以由 parse 解析回来"""
+        return ', '.join(f"{attr}:{ATTRIBUTE_KINDS[self.attribute_types[attr]]}" if attr in self.attribute_types
+                         else attr for attr in self.attributes)
+    
+    @classmethod
+    def parse(cls, name, text):
+        """由“属性[:类型], ...”形式的文字创建，类型可以写成 文本/数字/日期 或 string/number/date"""
+        kinds = {label: kind for kind, label in ATTRIBUTE_KINDS.items()}
+        attributes = []
+        attribute_types = {}
+        for part in (text or '').replace('，', ',').split(','):
+            attr, _, kind = part.replace('：', ':').partition(':')
+            attr, kind = attr.strip(), kind.strip()
+            if not attr:
+                continue
+            if kind and kinds.get(kind, kind) not in ATTRIBUTE_KINDS:
+                raise ValueError(f"未知的属性类型: {kind}（可用: {'/'.join(ATTRIBUTE_KINDS.values())}）")
+            attributes.append(attr)
+            if kind:
+                attribute_types[attr] = kinds.get(kind, kind)
+        return cls(name, attributes, attribute_types)
     
     def to_dict(self):
         """转换为字典"""
         return {
             'name': self.name,
-            'attributes': self.attributes
+            'attributes': self.attributes,
+            'attribute_types': self.attribute_types
         }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """从字典创建"""
+        return cls(data['name'], data['attributes'], data.get('attribute_types'))
 
 class Item:
     """物品类"""
+    __slots__ = ('id', 'name', 'description', 'address', 'contact_phone', 'contact_email',
+                 'item_type', 'user', 'extra_attributes')
+    
     def __init__(self, name, description, address, contact_phone, contact_email, 
                  item_type, user, extra_attributes=None, id=None):
-        # 生成更简单的ID：时间戳+随机数
-        if id is None:
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            random_num = random.randint(100, 999)
-            self.id = f"{timestamp}{random_num}"
-        else:
-            self.id = id
-            
+        # 按时间排序、不会重复的ID，见 ids.py
+        self.id = new_id() if id is None else id
+        
         self.name = name
         self.description = description
         self.address = address
@@ -73,4 +142,11 @@ class Item:
             'item_type': self.item_type,
             'user': self.user,
             'extra_attributes': self.extra_attributes
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """从字典创建"""
+        return cls(data['name'], data['description'], data['address'], data['contact_phone'],
+                   data['contact_email'], data['item_type'], data['user'],
+                   data.get('extra_attributes'), id=data['id'])
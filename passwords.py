@@ -0,0 +1,119 @@
+"""密码哈希
+
+密码以加盐的 scrypt 哈希保存，格式为 ``scrypt$N$r$p$盐$哈希``（盐和哈希为 base64），
+N、r、p 是 scrypt 的代价参数：N 决定计算量和内存（每次约 128 * N * r 字节），r 为块大小，p 为并行度。
+默认参数可以用环境变量 ITEM_DB_SCRYPT_N、ITEM_DB_SCRYPT_R、ITEM_DB_SCRYPT_P 调整，
+用 benchmarks.bench_password 测量各组参数的耗时，选择登录延迟不超过目标的最大代价。
+修改参数后，旧参数的哈希仍然可以验证，并在用户下次登录成功时按新参数重新哈希（见 needs_rehash）。
+参数的代价（128 * N * r * p 字节）不能超过 MAX_COST，代价更高的保存值 verify 直接判为失败，
+以免被篡改的数据文件用极大的参数让每次登录耗尽内存或 CPU。
+
+以前的数据中密码是明文保存的，verify 同样可以验证明文记录，needs_rehash 对明文返回 True，
+由 Database.verify_password 在第一次登录成功时替换为哈希。
+
+验证成功的结果缓存在进程内，同一用户再次登录（如退出后重新登录）时不必重新计算 scrypt。缓存的是
+以进程启动时随机生成的密钥对 (保存的哈希, 密码) 计算的 HMAC，不保存密码本身；验证失败的结果不缓存，
+猜测密码的代价不会降低。
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+
+SCHEME = 'scrypt'
+SALT_BYTES = 16
+KEY_BYTES = 32
+MAX_COST = 256 * 1024 * 1024
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def is_hashed(stored):
+    """保存的密码是否已经是哈希（否则是旧数据中的明文）"""
+    return isinstance(stored, str) and stored.startswith(SCHEME + '$')
+
+
+def _valid_params(n, r, p):
+    # N 是大于 1 的 2 的幂，r、p 为正数，总代价不超过 MAX_COST
+    return n >= 2 and not n & (n - 1) and r >= 1 and p >= 1 and 128 * n * r * p <= MAX_COST
+
+
+class PasswordHasher:
+    """scrypt 密码哈希与验证，线程安全"""
+    def __init__(self, n=2 ** 14, r=8, p=1, cache_size=256):
+        if not _valid_params(n, r, p):
+            raise ValueError(f"scrypt 参数无效: N 必须是大于 1 的 2 的幂，r、p 为正数，128 * N * r * p 不超过 {MAX_COST}")
+        self.n = n
+        self.r = r
+        self.p = p
+        self.cache_size = cache_size
+        self._cache_key = os.urandom(32)
+        self._verified = OrderedDict()  # HMAC -> None，最近使用的在最后
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _derive(password, salt, n, r, p):
+        # scrypt 默认最多使用 32MB 内存，参数较大时按实际需要放宽
+        maxmem = 128 * n * r * (p + 1) + 1024 * 1024
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=maxmem,
+                              dklen=KEY_BYTES)
+
+    def hash(self, password, salt=None):
+        """用当前参数计算密码的哈希；salt 为 None 时使用新的随机盐，只有生成可重复的测试数据时才指定"""
+        if salt is None:
+            salt = os.urandom(SALT_BYTES)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return f'{SCHEME}${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}'
+
+    def verify(self, password, stored):
+        """验证密码；stored 为保存的哈希或旧数据中的明文，格式错误时返回 False"""
+        if not stored:
+            return False
+        if not is_hashed(stored):
+            return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+
+        token = hmac.new(self._cache_key, f'{stored}\0{password}'.encode('utf-8'), hashlib.sha256).digest()
+        with self._lock:
+            if token in self._verified:
+                self._verified.move_to_end(token)
+                return True
+        try:
+            _, n, r, p, salt, key = stored.split('$')
+            n, r, p = int(n), int(r), int(p)
+            if not _valid_params(n, r, p):
+                return False
+            expected = base64.b64decode(key)
+            actual = self._derive(password, base64.b64decode(salt), n, r, p)
+        except ValueError:
+            return False
+        if not hmac.compare_digest(actual, expected):
+            return False
+        with self._lock:
+            self._verified[token] = None
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return True
+
+    def needs_rehash(self, stored):
+        """保存的密码是明文或使用了与当前不同的参数，验证成功后应重新哈希"""
+        if not is_hashed(stored):
+            return True
+        try:
+            _, n, r, p, _, _ = stored.split('$')
+            return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+        except ValueError:
+            return True
+
+    def clear_cache(self):
+        """清空验证结果缓存"""
+        with self._lock:
+            self._verified.clear()
+
+
+hasher = PasswordHasher(n=int(os.environ.get('ITEM_DB_SCRYPT_N', 2 ** 14)),
+                        r=int(os.environ.get('ITEM_DB_SCRYPT_R', 8)),
+                        p=int(os.environ.get('ITEM_DB_SCRYPT_P', 1)))
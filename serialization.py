@@ -0,0 +1,83 @@
+"""数据文件的序列化
+
+默认写紧凑格式（不缩进），安装了 orjson 时自动使用它编码和解码，否则使用标准库 json。
+两种编码器读写的文件格式相同，可以互相读取。
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONSerializer:
+    """JSON 序列化器
+
+    compact=False 时按原来的格式缩进两格，便于人工查看；use_orjson=None 表示有 orjson 就用。
+    """
+    def __init__(self, compact=True, use_orjson=None):
+        self.compact = compact
+        if use_orjson is None:
+            use_orjson = orjson is not None
+        elif use_orjson and orjson is None:
+            raise ImportError("未安装 orjson")
+        self.use_orjson = use_orjson
+
+    def dumps(self, data):
+        """编码为 UTF-8 字节串"""
+        if self.use_orjson:
+            return orjson.dumps(data) if self.compact else orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        if self.compact:
+            return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+    def dumps_line(self, data):
+        """编码为以换行结尾的单行，用于追加日志"""
+        if self.use_orjson:
+            return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def loads(self, raw):
+        """从字节串或字符串解码"""
+        if self.use_orjson:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
+    def read(self, path):
+        """读取整个文件"""
+        with open(path, 'rb') as f:
+            return self.loads(f.read())
+
+    def read_lines(self, path):
+        """逐行读取每行一条记录的文件"""
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield self.loads(line)
+
+    def write_lines_atomic(self, path, records):
+        """把记录逐行写入文件（每行一条），同样先写临时文件再原子替换，返回写入的字节数"""
+        tmp_path = path + '.tmp'
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                line = self.dumps_line(record)
+                f.write(line)
+                size += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return size
+
+    def write_atomic(self, path, data):
+        """先写临时文件再用 os.replace 原子替换，写到一半崩溃也不会损坏原文件"""
+        raw = self.dumps(data)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(raw)
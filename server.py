@@ -0,0 +1,377 @@
+"""本地 HTTP JSON 接口
+
+基于 asyncio 的轻量 HTTP/1.1 服务（只用标准库），多个客户端可以同时使用同一份数据：
+
+    GET    /items?type=&keyword=&user=&offset=0&limit=100   物品列表，返回 {"items": [...], "total": n}
+                 &filter=保质期<=今天%2B7                     按额外属性筛选（见 database.parse_filters）
+                 &sort=-id                                    排序（id/name/item_type/address，前加 - 为从大到小）
+    GET    /items/<id>                                      物品详情
+    POST   /items                                           添加物品（请求体与 Item.to_dict() 相同，id 可省略）
+    DELETE /items/<id>                                      删除物品
+    POST   /users                                           注册用户（请求体与 User.to_dict() 相同，需要管理员审核）
+    POST   /users/<username>/approve                        审核通过用户
+
+连接在事件循环线程中处理，数据库操作在线程池中执行，不阻塞事件循环，并由读写锁保护：读请求持有读锁，
+彼此可以并发；写请求放入队列，由唯一的写入协程按顺序提交，队列中积累的多个写请求在同一个批处理中执行
+（组提交），只在修改内存数据时持有写锁，释放写锁后再写入磁盘和压缩，写入期间读请求照常进行。
+写入前合并其他进程的修改、定时读取其他进程的修改时也持有写锁（见 Database.merge_lock），
+读请求不会看到修改到一半的数据。写入磁盘完成后才返回响应。服务只监听本机地址，没有身份验证。
+
+    python server.py [--host 127.0.0.1] [--port 8080] [--db database.json]
+"""
+import argparse
+import asyncio
+import json
+import threading
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from bulk import make_item
+from database import configure_logging, get_database
+from models import User
+from passwords import hasher
+
+# 定时读取其他进程（如图形界面）写入的修改的间隔（秒）
+SYNC_INTERVAL = 2
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+MAX_BODY = 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadWriteLock:
+    """读写锁：读锁可以同时被多个线程持有，写锁独占，持有写锁的线程可以重入
+
+    有线程等待写锁时新的读者也等待，写入不会被源源不断的读请求饿死。
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = None   # 持有写锁的线程
+        self._depth = 0       # 写锁的重入次数
+        self._waiting = 0     # 等待写锁的线程数
+
+    @contextmanager
+    def reading(self):
+        with self._cond:
+            while self._writer is not None or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                self._waiting += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._waiting -= 1
+                self._writer = me
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if not self._depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class ItemServer:
+    """物品数据的 HTTP 服务"""
+    def __init__(self, db):
+        self.db = db
+        self._lock = ReadWriteLock()
+        db.merge_lock = self._lock.writing
+        # 重新加载（其他进程压缩了数据文件）时在写锁内一并读取物品，读请求不会触发延迟加载
+        db.lazy_items = False
+        self._writes = None
+        self._tasks = []
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """开始监听，返回 asyncio.Server"""
+        self._writes = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._writer()), asyncio.create_task(self._syncer())]
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self):
+        """停止写入协程并写入所有未保存的修改"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, self.db.close)
+
+    async def read(self, func, *args):
+        """在线程池中持有读锁执行 func(*args)，返回其结果"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, func, args)
+
+    def _read(self, func, args):
+        with self._lock.reading():
+            return func(*args)
+
+    # 写入
+    async def write(self, func, locked=True):
+        """把修改交给写入协程执行，返回 func 的结果；locked=False 时执行 func 不持有写锁，由 func 自己加锁"""
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((func, future, locked))
+        return await future
+
+    async def _writer(self):
+        while True:
+            jobs = [await self._writes.get()]
+            while not self._writes.empty():
+                jobs.append(self._writes.get_nowait())
+            results = await asyncio.get_running_loop().run_in_executor(None, self._write_batch, jobs)
+            for future, result, error in results:
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _write_batch(self, jobs):
+        """执行一批修改，返回 [(future, 结果, 异常)]
+
+        每个修改执行时持有写锁；同一批的修改在批处理结束时一起写入磁盘，这时写锁已经释放。
+        """
+        results = []
+        with self.db.batch():
+            for func, future, locked in jobs:
+                try:
+                    with self._lock.writing() if locked else nullcontext():
+                        results.append((future, func(), None))
+                except Exception as e:
+                    results.append((future, None, e))
+        return results
+
+    async def _syncer(self):
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            # 与写入协程的批处理依次执行；读取日志不持有写锁，合并时由 Database.merge_lock 持有
+            await self.write(self.db.sync, locked=False)
+
+    # HTTP
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': '请求格式错误'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                # HTTP/1.1 默认保持连接，HTTP/1.0 需要显式要求
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Content-Length 无效'}, False)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {'error': '请求体太大'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': f'服务器内部错误: {e}'}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                f'Content-Type: application/json; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """根据方法和路径处理请求，返回 (状态码, 响应数据)"""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if parts[0] == 'items':
+            if len(parts) == 1:
+                if method == 'GET':
+                    return 200, await self.read(self.list_items, query)
+                if method == 'POST':
+                    return 201, await self.add_item(self._json(body))
+            elif len(parts) == 2:
+                if method == 'GET':
+                    return 200, await self.read(self.get_item, parts[1])
+                if method == 'DELETE':
+                    return 200, await self.delete_item(parts[1])
+            else:
+                raise HTTPError(404, '路径不存在')
+        elif parts[0] == 'users':
+            if len(parts) == 1 and method == 'POST':
+                return 201, await self.register(self._json(body))
+            if len(parts) == 3 and parts[2] == 'approve' and method == 'POST':
+                return 200, await self.approve(parts[1])
+            if len(parts) not in (1, 3):
+                raise HTTPError(404, '路径不存在')
+        else:
+            raise HTTPError(404, '路径不存在')
+        raise HTTPError(405, f'不支持的方法: {method}')
+
+    @staticmethod
+    def _json(body):
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            raise HTTPError(400, '请求体不是有效的 JSON')
+        if not isinstance(data, dict):
+            raise HTTPError(400, '请求体必须是 JSON 对象')
+        return data
+
+    # 读请求：由 dispatch 在线程池中执行
+    def list_items(self, query):
+        try:
+            offset = int(query.get('offset', 0))
+            limit = min(int(query.get('limit', 100)), 1000)
+        except ValueError:
+            raise HTTPError(400, 'offset 和 limit 必须是整数')
+        if offset < 0 or limit < 1:
+            raise HTTPError(400, 'offset 不能小于 0，limit 不能小于 1')
+        sort = query.get('sort') or ''
+        try:
+            items, total = self.db.get_items_page(query.get('type'), query.get('keyword'), offset, limit,
+                                                  query.get('user'), query.get('filter'), sort.lstrip('-') or None,
+                                                  sort.startswith('-'))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return {'items': items, 'total': total}
+
+    def get_item(self, item_id):
+        item = self.db.get_item(item_id)
+        if item is None:
+            raise HTTPError(404, f'物品不存在: {item_id}')
+        return item
+
+    # 写请求：由写入协程执行，字段在放入队列之前检查
+    @staticmethod
+    def _check_strings(data, fields):
+        wrong = [field for field in fields if data.get(field) is not None and not isinstance(data[field], str)]
+        if wrong:
+            raise HTTPError(422, f"字段必须是字符串: {', '.join(wrong)}")
+
+    async def add_item(self, data):
+        # 字段类型等由 make_item 检查，不合格的请求不进入写入队列
+        item_types = await self.read(lambda: {t['name']: t for t in self.db.get_item_types()})
+        try:
+            item = make_item(data, item_types)
+        except ValueError as e:
+            raise HTTPError(422, str(e))
+
+        def add():
+            if self.db.get_item_type(item.item_type) is None:
+                raise HTTPError(422, f'物品类型不存在: {item.item_type}')
+            if self.db.get_user(item.user) is None:
+                raise HTTPError(422, f'用户不存在: {item.user}')
+            if data.get('id') and self.db.get_item(item.id) is not None:
+                raise HTTPError(409, f'物品ID已存在: {item.id}')
+            self.db.add_item(item)
+            return item.to_dict()
+        return await self.write(add)
+
+    async def delete_item(self, item_id):
+        def delete():
+            if self.db.get_item(item_id) is None:
+                raise HTTPError(404, f'物品不存在: {item_id}')
+            self.db.delete_item(item_id)
+            return {'deleted': item_id}
+        return await self.write(delete)
+
+    async def register(self, data):
+        fields = ('username', 'password', 'name', 'address', 'phone', 'email')
+        missing = [field for field in fields if not data.get(field)]
+        if missing:
+            raise HTTPError(422, f"缺少字段: {', '.join(missing)}")
+        self._check_strings(data, fields)
+        # 密码哈希需要几十毫秒，在线程池中计算，不阻塞事件循环和写入协程
+        password = await asyncio.get_running_loop().run_in_executor(None, hasher.hash, data['password'])
+
+        def add():
+            if self.db.get_user(data['username']) is not None:
+                raise HTTPError(409, f"用户名已存在: {data['username']}")
+            # 通过接口注册的用户不能自己成为管理员，也需要审核
+            self.db.add_user(User(*(password if field == 'password' else data[field] for field in fields)), hashed=True)
+            return {'registered': data['username']}
+        return await self.write(add)
+
+    async def approve(self, username):
+        def approve():
+            if not self.db.update_user(username, {'is_approved': True}):
+                raise HTTPError(404, f'用户不存在: {username}')
+            return {'approved': username}
+        return await self.write(approve)
+
+
+async def serve(host, port, db_file=None):
+    db = get_database(db_file)
+    # 启动时就加载物品、建立关键字索引，避免第一个请求等待
+    db.count_items()
+    db.build_indexes()
+    server = ItemServer(db)
+    listener = await server.start(host, port)
+    print(f"服务已启动: http://{host}:{port}/items")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='物品复活系统 HTTP 接口')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口')
+    parser.add_argument('--db', help='数据文件（默认使用环境变量 ITEM_DB_FILE 或 database.json）')
+    args = parser.parse_args()
+    configure_logging()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
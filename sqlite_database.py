@@ -0,0 +1,441 @@
+import argparse
+import json
+import logging
+import sqlite3
+from datetime import date
+from database import (Database, configure_logging, default_db_file, migrate_attributes, parse_filters, filter_key,
+                      filter_bounds, SORT_FIELDS)
+from ids import id_floor
+from metrics import metrics
+from models import parse_attribute_value
+
+logger = logging.getLogger(__name__)
+
+USER_FIELDS = ('username', 'password', 'name', 'address', 'phone', 'email', 'is_admin', 'is_approved')
+ITEM_FIELDS = ('id', 'name', 'description', 'address', 'contact_phone', 'contact_email',
+               'item_type', 'user', 'extra_attributes')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    username    TEXT PRIMARY KEY,
+    password    TEXT,
+    name        TEXT,
+    address     TEXT,
+    phone       TEXT,
+    email       TEXT,
+    is_admin    INTEGER NOT NULL DEFAULT 0,
+    is_approved INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_users_approved ON users(is_approved);
+
+CREATE TABLE IF NOT EXISTS item_types (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    name       TEXT NOT NULL UNIQUE,
+    attributes TEXT NOT NULL,
+    attribute_types TEXT
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    seq              INTEGER PRIMARY KEY AUTOINCREMENT,
+    id               TEXT NOT NULL UNIQUE,
+    name             TEXT,
+    description      TEXT,
+    address          TEXT,
+    contact_phone    TEXT,
+    contact_email    TEXT,
+    item_type        TEXT,
+    user             TEXT,
+    extra_attributes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_type ON items(item_type, seq);
+CREATE INDEX IF NOT EXISTS idx_items_user ON items(user, seq);
+-- 按名称、类型、地址排序（值相同的按 id 即创建时间），按 id 排序使用 id 列的唯一索引
+CREATE INDEX IF NOT EXISTS idx_items_name ON items(name, id);
+CREATE INDEX IF NOT EXISTS idx_items_type_id ON items(item_type, id);
+CREATE INDEX IF NOT EXISTS idx_items_address ON items(address, id);
+'''
+
+
+def _lower(text):
+    # SQLite 自带的 lower() 只处理 ASCII，这里用 Python 的 lower() 保持与 JSON 存储一致的匹配语义
+    return text.lower() if text is not None else None
+
+
+def _attr_key(extra_attributes, attr, kind):
+    # 额外属性值转换为可比较的键，与内存存储的属性索引一致；日期转为 ISO 格式的字符串，按字符串比较即按日期比较
+    value = json.loads(extra_attributes or '{}').get(attr)
+    if value is None:
+        return None
+    key = parse_attribute_value(kind, value)
+    return key.isoformat() if isinstance(key, date) else key
+
+
+def _sql_key(key):
+    return key.isoformat() if isinstance(key, date) else key
+
+
+def _item_type_dict(row):
+    return {'name': row['name'], 'attributes': json.loads(row['attributes']),
+            'attribute_types': json.loads(row['attribute_types'] or '{}')}
+
+
+def _user_row(user):
+    return tuple(bool(user[f]) if f in ('is_admin', 'is_approved') else user[f] for f in USER_FIELDS)
+
+
+def _item_row(item):
+    row = dict(item, id=str(item['id']), extra_attributes=json.dumps(item.get('extra_attributes') or {}, ensure_ascii=False))
+    return tuple(row[f] for f in ITEM_FIELDS)
+
+
+@metrics.instrument
+class SQLiteDatabase(Database):
+    """SQLite 存储的数据库
+
+    接口与 Database 相同。数据只保存在 SQLite 文件中（WAL 模式），不整体加载到内存，
+    主键、物品类型、物品所有者、审核状态都有索引。
+    按额外属性筛选时由 SQL 函数 attr_key 取出属性值比较，需要扫描符合类型条件的物品（额外属性以 JSON 保存，没有索引）。
+    """
+    def __init__(self, db_file=None, flush_interval=None, **kwargs):
+        # journal、compact_threshold 等 JSON 存储的参数在这里没有意义，直接忽略
+        self.db_file = db_file or default_db_file()
+        self.conn = None
+        self._init_flush(flush_interval)
+        self.load_data()
+
+    @property
+    def data(self):
+        """与 JSON 快照结构相同的数据字典（会读取全部数据，仅用于导出）"""
+        return {
+            'users': self.get_users(),
+            'item_types': self.get_item_types(),
+            'items': self.get_items()
+        }
+
+    def load_data(self):
+        """打开数据库连接并建表"""
+        if self.conn is not None:
+            self.conn.close()
+        # GUI 的后台线程也会使用这个连接，调用方保证同一时刻只有一个线程访问
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function('py_lower', 1, _lower, deterministic=True)
+        self.conn.create_function('attr_key', 3, _attr_key, deterministic=True)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # 旧版本建立的数据库没有 attribute_types 列
+        columns = [row['name'] for row in self.conn.execute('PRAGMA table_info(item_types)')]
+        if 'attribute_types' not in columns:
+            self.conn.execute('ALTER TABLE item_types ADD COLUMN attribute_types TEXT')
+            self.conn.commit()
+        count = self.count_items()
+        metrics.set_gauge('items', count)
+        logger.info("数据库已打开: %s, 物品数: %d", self.db_file, count)
+
+    def save_data(self):
+        """提交未完成的事务，并把 WAL 中的内容写回主数据库文件"""
+        try:
+            self.flush()
+            self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            if metrics.enabled:
+                metrics.set_gauge('items', self.count_items())
+            logger.info("数据保存成功")
+        except Exception as e:
+            logger.error("保存数据时出错: %s", e)
+
+    def flush(self):
+        """提交当前事务（批处理中的所有修改在同一个事务中）"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty and self.conn is not None:
+                self.conn.commit()
+                self._dirty = False
+
+    def sync(self):
+        """每次查询都直接读取数据库，其他进程提交的修改总是可见，不需要同步"""
+    
+    def close(self):
+        """提交未完成的修改并关闭数据库连接"""
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+    def _stage(self, entry):
+        """执行一条修改操作，事务在 flush 时提交"""
+        try:
+            self._apply(entry)
+        except Exception:
+            if not self._batch_depth and not self._dirty:
+                self.conn.rollback()
+            raise
+
+    def _apply_add_user(self, entry):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO users ({', '.join(USER_FIELDS)}) VALUES ({', '.join('?' * len(USER_FIELDS))})",
+            _user_row(entry['user']))
+
+    def _apply_update_user(self, entry):
+        data = {k: v for k, v in entry['data'].items() if k in USER_FIELDS}
+        if data:
+            sets = ', '.join(f'{k} = ?' for k in data)
+            self.conn.execute(f'UPDATE users SET {sets} WHERE username = ?', (*data.values(), entry['username']))
+
+    def _apply_add_item_type(self, entry):
+        item_type = entry['item_type']
+        self.conn.execute(
+            'INSERT INTO item_types (name, attributes, attribute_types) VALUES (?, ?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET attributes = excluded.attributes, '
+            'attribute_types = excluded.attribute_types',
+            (item_type['name'], json.dumps(item_type['attributes'], ensure_ascii=False),
+             json.dumps(item_type.get('attribute_types') or {}, ensure_ascii=False)))
+
+    def _apply_update_item_type(self, entry):
+        item_type = entry['item_type']
+        row = self.conn.execute('SELECT attributes FROM item_types WHERE name = ?', (entry['old_name'],)).fetchone()
+        if row is None:
+            return
+        if item_type['name'] != entry['old_name'] and self.conn.execute(
+                'SELECT 1 FROM item_types WHERE name = ?', (item_type['name'],)).fetchone():
+            # 与 JSON 存储一样丢弃改名到已有类型名的操作
+            logger.warning("物品类型 %s 已存在，忽略 %s 的改名", item_type['name'], entry['old_name'])
+            return
+        self.conn.execute(
+            'UPDATE item_types SET name = ?, attributes = ?, attribute_types = ? WHERE name = ?',
+            (item_type['name'], json.dumps(item_type['attributes'], ensure_ascii=False),
+             json.dumps(item_type.get('attribute_types') or {}, ensure_ascii=False), entry['old_name']))
+        
+        # 该类型的物品在同一个事务中随之修改，由 idx_items_type 索引找到，不扫描全表
+        renamed_attributes = entry.get('renamed_attributes')
+        if renamed_attributes or item_type['attributes'] != json.loads(row['attributes']):
+            rows = self.conn.execute('SELECT id, extra_attributes FROM items WHERE item_type = ?',
+                                     (entry['old_name'],)).fetchall()
+            self.conn.executemany('UPDATE items SET extra_attributes = ? WHERE id = ?', [
+                (json.dumps(migrate_attributes(json.loads(extra or '{}'), item_type['attributes'], renamed_attributes),
+                            ensure_ascii=False), item_id)
+                for item_id, extra in rows])
+        if item_type['name'] != entry['old_name']:
+            self.conn.execute('UPDATE items SET item_type = ? WHERE item_type = ?',
+                              (item_type['name'], entry['old_name']))
+
+    def _apply_add_item(self, entry):
+        columns = ', '.join(ITEM_FIELDS)
+        updates = ', '.join(f'{f} = excluded.{f}' for f in ITEM_FIELDS[1:])
+        self.conn.execute(
+            f"INSERT INTO items ({columns}) VALUES ({', '.join('?' * len(ITEM_FIELDS))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            _item_row(entry['item']))
+
+    def _apply_update_item(self, entry):
+        data = {k: v for k, v in entry['data'].items() if k in ITEM_FIELDS}
+        if 'id' in data:
+            data['id'] = str(data['id'])
+        if 'extra_attributes' in data:
+            data['extra_attributes'] = json.dumps(data['extra_attributes'] or {}, ensure_ascii=False)
+        if data:
+            sets = ', '.join(f'{k} = ?' for k in data)
+            self.conn.execute(f'UPDATE items SET {sets} WHERE id = ?', (*data.values(), entry['id']))
+
+    def _apply_delete_item(self, entry):
+        self.conn.execute('DELETE FROM items WHERE id = ?', (entry['id'],))
+
+    @staticmethod
+    def _user_dict(row):
+        user = dict(row)
+        user['is_admin'] = bool(user['is_admin'])
+        user['is_approved'] = bool(user['is_approved'])
+        return user
+
+    @staticmethod
+    def _item_dict(row):
+        item = dict(row)
+        del item['seq']
+        item['extra_attributes'] = json.loads(item['extra_attributes'] or '{}')
+        return item
+
+    # 用户相关操作
+    def get_user(self, username):
+        """获取用户"""
+        row = self.conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        return self._user_dict(row) if row else None
+
+    def get_users(self):
+        """获取所有用户"""
+        return [self._user_dict(row) for row in self.conn.execute('SELECT * FROM users ORDER BY rowid')]
+    
+    def get_pending_users(self):
+        """获取待审核用户"""
+        rows = self.conn.execute('SELECT * FROM users WHERE is_approved = 0 ORDER BY rowid')
+        return [self._user_dict(row) for row in rows]
+
+    # 物品类型相关操作
+    def get_item_types(self):
+        """获取所有物品类型"""
+        rows = self.conn.execute('SELECT name, attributes, attribute_types FROM item_types ORDER BY seq')
+        return [_item_type_dict(row) for row in rows]
+
+    def get_item_type(self, name):
+        """获取特定物品类型"""
+        row = self.conn.execute('SELECT name, attributes, attribute_types FROM item_types WHERE name = ?',
+                                (name,)).fetchone()
+        return _item_type_dict(row) if row else None
+
+    # 物品相关操作
+    def _filter_groups(self, attribute_filter):
+        """一个属性筛选条件按值类型分组：[(值类型, 类型名列表, 转换后的值)]，与 Database._filter_ids 的规则相同"""
+        attr, op, value = attribute_filter
+        groups = {}
+        for item_type in self.get_item_types():
+            if attr in item_type['attributes']:
+                groups.setdefault(item_type['attribute_types'].get(attr, 'string'), []).append(item_type['name'])
+        if not groups:
+            raise ValueError(f"没有物品类型有属性“{attr}”")
+        parsed = [(kind, names, filter_key(kind, value)) for kind, names in groups.items()]
+        parsed = [group for group in parsed if group[2] is not None]
+        if not parsed:
+            raise ValueError(f"“{value}”不是属性“{attr}”的有效值")
+        return parsed
+
+    def _item_conditions(self, item_type, keyword, user=None, filters=None, order_by=None, descending=False):
+        """生成物品筛选的 WHERE 子句及其参数、ORDER BY 子句及其参数
+
+        指定 order_by 时按该字段排序，否则有属性筛选条件而没有关键字时与内存存储一样按第一个条件的属性值排序，
+        其余按添加顺序排序。
+        """
+        conditions = []
+        params = []
+        order, order_params = 'seq', []
+        if item_type:
+            conditions.append('item_type = ?')
+            params.append(item_type)
+        if user:
+            conditions.append('user = ?')
+            params.append(user)
+        if keyword:
+            keyword = keyword.lower()
+            conditions.append('(instr(py_lower(name), ?) > 0 OR instr(py_lower(description), ?) > 0 '
+                              'OR instr(py_lower(address), ?) > 0)')
+            params.extend([keyword] * 3)
+        if isinstance(filters, str):
+            filters = parse_filters(filters)
+        for i, attribute_filter in enumerate(filters or ()):
+            attr = attribute_filter.attribute
+            groups = self._filter_groups(attribute_filter)
+            alternatives = []
+            for kind, names, key in groups:
+                low, high, include_low, include_high = filter_bounds(attribute_filter.op, key)
+                clause = f"item_type IN ({', '.join('?' * len(names))})"
+                params.extend(names)
+                if low is not None:
+                    clause += f" AND attr_key(extra_attributes, ?, ?) {'>=' if include_low else '>'} ?"
+                    params.extend([attr, kind, _sql_key(low)])
+                if high is not None:
+                    clause += f" AND attr_key(extra_attributes, ?, ?) {'<=' if include_high else '<'} ?"
+                    params.extend([attr, kind, _sql_key(high)])
+                alternatives.append(f'({clause})')
+            conditions.append('(' + ' OR '.join(alternatives) + ')')
+            if i == 0 and not keyword and not order_by:
+                # 各值类型依次排列，同一值类型内按属性值、再按物品ID（即创建时间）排序
+                group_case = []
+                key_case = []
+                for n, (kind, names, _) in enumerate(groups):
+                    placeholders = ', '.join('?' * len(names))
+                    group_case.append(f'WHEN item_type IN ({placeholders}) THEN {n}')
+                    key_case.append(f'WHEN item_type IN ({placeholders}) THEN attr_key(extra_attributes, ?, ?)')
+                    order_params.extend(names)
+                for kind, names, _ in groups:
+                    order_params.extend([*names, attr, kind])
+                order = f"CASE {' '.join(group_case)} END, CASE {' '.join(key_case)} END, id"
+        if order_by:
+            if order_by not in SORT_FIELDS:
+                raise ValueError(f"不能按 {order_by} 排序（可用: {', '.join(SORT_FIELDS)}）")
+            direction = ' DESC' if descending else ''
+            order = f'{order_by}{direction}' if order_by == 'id' else f'{order_by}{direction}, id{direction}'
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        return where, params, order, order_params
+
+    def get_items(self, item_type=None, keyword=None, user=None, filters=None, order_by=None, descending=False):
+        """获取物品列表，user 不为空时只返回该用户的物品，filters 为属性筛选条件，order_by 为排序字段"""
+        where, params, order, order_params = self._item_conditions(item_type, keyword, user, filters,
+                                                                   order_by, descending)
+        rows = self.conn.execute(f'SELECT * FROM items{where} ORDER BY {order}', (*params, *order_params))
+        return [self._item_dict(row) for row in rows]
+
+    def iter_items(self, item_type=None, keyword=None, user=None, filters=None, order_by=None, descending=False):
+        """逐行读取符合条件的物品，不把查询结果全部取到内存"""
+        where, params, order, order_params = self._item_conditions(item_type, keyword, user, filters,
+                                                                   order_by, descending)
+        for row in self.conn.execute(f'SELECT * FROM items{where} ORDER BY {order}', (*params, *order_params)):
+            yield self._item_dict(row)
+    
+    def cache_stats(self):
+        """SQLite 存储不缓存查询结果（由 SQLite 自己缓存数据页），返回 None"""
+        return None
+
+    def get_items_page(self, item_type=None, keyword=None, offset=0, limit=100, user=None, filters=None,
+                       order_by=None, descending=False):
+        """分页获取物品列表，返回 (本页物品列表, 符合条件的物品总数)"""
+        where, params, order, order_params = self._item_conditions(item_type, keyword, user, filters,
+                                                                   order_by, descending)
+        total = self.conn.execute(f'SELECT COUNT(*) FROM items{where}', params).fetchone()[0]
+        rows = self.conn.execute(f'SELECT * FROM items{where} ORDER BY {order} LIMIT ? OFFSET ?',
+                                 (*params, *order_params, limit, offset))
+        return [self._item_dict(row) for row in rows], total
+
+    def get_items_created_between(self, start=None, end=None):
+        """获取在 [start, end) 时间范围内创建的物品，按创建时间排序（使用 id 列的唯一索引）"""
+        conditions = []
+        params = []
+        if start:
+            conditions.append('id >= ?')
+            params.append(id_floor(start))
+        if end:
+            conditions.append('id < ?')
+            params.append(id_floor(end))
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        rows = self.conn.execute(f'SELECT * FROM items{where} ORDER BY id', params)
+        return [self._item_dict(row) for row in rows]
+    
+    def get_item(self, item_id):
+        """获取特定物品"""
+        row = self.conn.execute('SELECT * FROM items WHERE id = ?', (str(item_id),)).fetchone()
+        return self._item_dict(row) if row else None
+
+    def count_items(self):
+        """物品总数"""
+        return self.conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def build_indexes(self):
+        """索引保存在数据库文件中，不需要预先建立"""
+
+
+def import_json_database(json_file, sqlite_file):
+    """把 JSON 数据文件（含未压缩的日志）一次性导入 SQLite 数据库，返回导入的 (用户数, 类型数, 物品数)"""
+    source = Database(json_file, journal=True)
+    target = SQLiteDatabase(sqlite_file)
+    data = source.data
+    with target.conn:
+        for user in data['users']:
+            target._apply_add_user({'user': user})
+        for item_type in data['item_types']:
+            target._apply_add_item_type({'item_type': item_type})
+        target.conn.executemany(
+            f"INSERT OR REPLACE INTO items ({', '.join(ITEM_FIELDS)}) VALUES ({', '.join('?' * len(ITEM_FIELDS))})",
+            (_item_row(item) for item in data['items']))
+    target.close()
+    return len(data['users']), len(data['item_types']), len(data['items'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='把 JSON 数据文件导入 SQLite 数据库')
+    parser.add_argument('json_file', nargs='?', default='database.json', help='JSON 数据文件')
+    parser.add_argument('sqlite_file', nargs='?', default='database.db', help='SQLite 数据库文件')
+    args = parser.parse_args()
+    configure_logging()
+
+    users, item_types, items = import_json_database(args.json_file, args.sqlite_file)
+    print(f"导入完成: 用户 {users} 个, 物品类型 {item_types} 个, 物品 {items} 个")
+    print(f"设置环境变量 ITEM_DB_FILE={args.sqlite_file} 后启动系统即可使用 SQLite 存储")
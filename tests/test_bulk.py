@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from bulk import import_items
+from database import Database
+from models import ItemType, User
+
+
+class ImportItemsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmp, 'database.json'))
+        self.db.add_user(User('alice', 'pw', '张三', '一号楼', '123', 'a@example.com', is_approved=True))
+        self.db.add_item_type(ItemType('书籍', ['作者', '页数'], {'页数': 'number'}))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def import_records(self, records):
+        path = os.path.join(self.tmp, 'items.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return import_items(self.db, path, default_user='alice')
+
+    def test_wrongly_typed_fields_are_rejected(self):
+        report = self.import_records([
+            {'name': '算法导论', 'item_type': '书籍'},
+            {'name': 123, 'item_type': '书籍'},
+            {'name': '数据结构', 'item_type': ['书籍']},
+            {'name': '编译原理', 'item_type': '书籍', 'contact_phone': 13800000000},
+            {'name': '操作系统', 'item_type': '书籍', 'id': 20240101000000000},
+            {'name': '计算机网络', 'item_type': '书籍', 'extra_attributes': {'作者': ['谢希仁']}},
+            {'name': '数据库', 'item_type': '书籍', 'extra_attributes': {'页数': True}},
+        ])
+        self.assertEqual(report.imported, 1)
+        self.assertEqual([line_no for line_no, _ in report.rejected], [2, 3, 4, 5, 6, 7])
+        self.assertEqual([item['name'] for item in self.db.get_items()], ['算法导论'])
+
+    def test_numeric_attribute_values_are_stored_as_text(self):
+        report = self.import_records([
+            {'name': '算法导论', 'item_type': '书籍', 'extra_attributes': {'作者': 'CLRS', '页数': 1292}},
+        ])
+        self.assertEqual(report.rejected, [])
+        item, = self.db.get_items()
+        self.assertEqual(item['extra_attributes'], {'作者': 'CLRS', '页数': '1292'})
+
+
+if __name__ == '__main__':
+    unittest.main()
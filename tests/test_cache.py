@@ -0,0 +1,140 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from cache import QueryCache
+from database import Database, item_matches
+from models import Item, ItemType, User
+
+# 会被缓存的查询：有关键字，或者同时按类型和所有者筛选
+QUERIES = [
+    ('书籍', None, 'alice'),
+    ('家具', None, 'bob'),
+    ('教材', None, 'alice'),
+    (None, '九成新', None),
+    (None, 'python', 'alice'),
+    ('书籍', '算法', None),
+    ('教材', '算法', None),
+    ('家具', '台灯', 'bob'),
+]
+
+
+class QueryCacheInvalidationTest(unittest.TestCase):
+    """增删改物品、类型改名之后，缓存的查询结果与逐条筛选的结果一致，不受影响的条目仍然保留"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmp, 'database.json'))
+        with self.db.batch():
+            for username in ('alice', 'bob'):
+                self.db.add_user(User(username, 'pw', username, '地址', '123', 'a@example.com', is_approved=True))
+            for name in ('书籍', '家具'):
+                self.db.add_item_type(ItemType(name, []))
+            self.add('000', '算法导论', '九成新', '书籍', 'alice')
+            self.add('001', 'Python 编程', '全新', '书籍', 'bob')
+            self.add('002', '台灯', '九成新', '家具', 'bob')
+            self.add('003', '书架', '有划痕', '家具', 'alice')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def add(self, item_id, name, description, item_type, user):
+        self.db.add_item(Item(name, description, '闵行', '123', 'a@example.com', item_type, user, id=item_id))
+
+    def warm(self):
+        for query in QUERIES:
+            self.db.get_items(*query)
+        self.assertEqual(len(self.db._query_cache), len(QUERIES))
+
+    def warm_partially(self, rng):
+        for query in rng.sample(QUERIES, 4):
+            self.db.get_items(*query)
+
+    def cached(self, query):
+        return QueryCache.key(*query) in self.db._query_cache._entries
+
+    def assert_fresh(self):
+        all_items = self.db.get_items()
+        for query in QUERIES:
+            expected = [item['id'] for item in all_items if item_matches(item, *query)]
+            self.assertEqual([item['id'] for item in self.db.get_items(*query)], expected, query)
+
+    def test_add_item(self):
+        self.warm()
+        self.add('004', '算法笔记', '九成新', '书籍', 'alice')
+        self.assertFalse(self.cached(('书籍', '算法', None)))
+        self.assertFalse(self.cached(('书籍', None, 'alice')))
+        self.assertFalse(self.cached((None, '九成新', None)))
+        self.assertTrue(self.cached(('家具', None, 'bob')))
+        self.assertTrue(self.cached((None, 'python', 'alice')))
+        self.assert_fresh()
+
+    def test_update_type_and_owner(self):
+        self.warm()
+        self.db.update_item('002', {'item_type': '书籍'})
+        self.assertFalse(self.cached(('家具', None, 'bob')))
+        self.assertFalse(self.cached(('家具', '台灯', 'bob')))
+        self.assertTrue(self.cached(('书籍', None, 'alice')))
+        self.assert_fresh()
+
+        self.warm()
+        self.db.update_item('001', {'user': 'alice'})
+        self.assertFalse(self.cached((None, 'python', 'alice')))
+        self.assertFalse(self.cached(('书籍', None, 'alice')))
+        self.assertTrue(self.cached(('家具', None, 'bob')))
+        self.assert_fresh()
+
+    def test_update_keyword_fields_and_id(self):
+        self.warm()
+        self.db.update_item('003', {'description': '九成新'})
+        self.assertFalse(self.cached((None, '九成新', None)))
+        self.assertTrue(self.cached(('书籍', '算法', None)))
+        self.assert_fresh()
+
+        self.warm()
+        self.db.update_item('000', {'id': '010', 'name': 'Python 算法'})
+        self.assert_fresh()
+
+    def test_delete_item(self):
+        self.warm()
+        self.db.delete_item('002')
+        self.assertFalse(self.cached(('家具', '台灯', 'bob')))
+        self.assertFalse(self.cached((None, '九成新', None)))
+        self.assertTrue(self.cached(('书籍', None, 'alice')))
+        self.assert_fresh()
+
+    def test_rename_item_type(self):
+        self.warm()
+        self.db.update_item_type('书籍', ItemType('教材', []))
+        for query in QUERIES:
+            if query[0] in ('书籍', '教材'):
+                self.assertFalse(self.cached(query), query)
+        self.assertTrue(self.cached(('家具', None, 'bob')))
+        self.assert_fresh()
+        self.assertEqual([item['id'] for item in self.db.get_items('教材', '算法')], ['000'])
+
+    def test_random_changes_match_uncached_results(self):
+        rng = random.Random(0)
+        names = ['算法导论', 'Python 编程', '台灯', '书架', '算法笔记', 'python 台灯']
+        descriptions = ['九成新', '全新', '有划痕']
+        for step in range(200):
+            self.warm_partially(rng)
+            item_ids = [item['id'] for item in self.db.get_items()]
+            op = rng.randrange(4)
+            if op == 0 or not item_ids:
+                self.add(f'{100 + step:03d}', rng.choice(names), rng.choice(descriptions),
+                         rng.choice(['书籍', '家具']), rng.choice(['alice', 'bob']))
+            elif op == 1:
+                self.db.update_item(rng.choice(item_ids), {
+                    'item_type': rng.choice(['书籍', '家具']), 'user': rng.choice(['alice', 'bob'])})
+            elif op == 2:
+                self.db.update_item(rng.choice(item_ids), {
+                    'name': rng.choice(names), 'description': rng.choice(descriptions)})
+            else:
+                self.db.delete_item(rng.choice(item_ids))
+            self.assert_fresh()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from itertools import islice
+from unittest import mock
+
+from database import SORT_FIELDS, Database, item_matches
+from models import Item, ItemType, User
+
+
+class UpdateItemTypeTest(unittest.TestCase):
+    """改名到已有的类型名在两种存储上都被拒绝，数据不变"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def check_rename_onto_existing_name(self, filename):
+        path = os.path.join(self.tmp, filename)
+        db = Database(path)
+        db.add_item_type(ItemType('书籍', ['作者']))
+        db.add_item_type(ItemType('教材', ['课程']))
+        db.add_item(Item('算法导论', '九成新', '闵行', '123', 'a@example.com', '书籍', 'alice', {'作者': 'CLRS'}))
+
+        with self.assertRaises(ValueError):
+            db.update_item_type('书籍', ItemType('教材', ['作者']))
+        self.assertFalse(db.update_item_type('不存在', ItemType('其他', [])))
+        self.assertTrue(db.update_item_type('书籍', ItemType('书籍', ['作者', '出版社'])))
+
+        db.close()
+        db = Database(path)
+        self.assertEqual([t['name'] for t in db.get_item_types()], ['书籍', '教材'])
+        self.assertEqual(db.get_item_type('教材')['attributes'], ['课程'])
+        self.assertEqual([item['name'] for item in db.get_items('书籍')], ['算法导论'])
+        db.close()
+
+    def test_json(self):
+        self.check_rename_onto_existing_name('database.json')
+
+    def test_sqlite(self):
+        self.check_rename_onto_existing_name('database.db')
+
+
+class JournalTest(unittest.TestCase):
+    """修改写入日志，重新打开时重放；达到阈值后压缩为快照；日志最后一行不完整时丢弃并在下次写入时截掉"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'database.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make_changes(self, db, count=5):
+        db.add_item_type(ItemType('书籍', ['作者']))
+        for i in range(count):
+            db.add_item(Item(f'书{i}', '九成新', '闵行', '123', 'a@example.com', '书籍', 'alice',
+                             {'作者': f'作者{i}'}, id=f'{i:03d}'))
+        db.update_item('001', {'name': '算法导论'})
+        db.delete_item('002')
+
+    def log_lines(self):
+        with open(self.path + '.log', 'rb') as f:
+            return f.read().splitlines()
+
+    def test_reopen_replays_journal(self):
+        db = Database(self.path)
+        self.make_changes(db)
+        db.close()
+        # 未达到压缩阈值，没有快照，全部修改都在日志里
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(self.log_lines()), 8)
+        self.assertEqual([json.loads(line)['seq'] for line in self.log_lines()], list(range(1, 9)))
+
+        reopened = Database(self.path)
+        self.assertEqual(reopened.data, db.data)
+        self.assertEqual(reopened.version, 8)
+        self.assertEqual([item['name'] for item in reopened.get_items()], ['书0', '算法导论', '书3', '书4'])
+
+    def test_compaction_writes_snapshot_and_items_file(self):
+        db = Database(self.path, compact_threshold=6)
+        self.make_changes(db)
+        db.close()
+        # 第6条操作后压缩，之后的两条操作留在日志中
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(sorted(name for name in os.listdir(self.tmp) if '.items.' in name),
+                         ['database.json.items.6'])
+        with open(self.path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot['journal_seq'], 6)
+        self.assertEqual(snapshot['items_file'], 'database.json.items.6')
+        self.assertEqual([json.loads(line)['seq'] for line in self.log_lines()], [7, 8])
+
+        reopened = Database(self.path)
+        self.assertEqual(reopened.data, db.data)
+        self.assertEqual(reopened.version, 8)
+
+        # 再次压缩后旧的物品文件被删除，日志清空
+        reopened.save_data()
+        self.assertEqual(sorted(name for name in os.listdir(self.tmp) if '.items.' in name),
+                         ['database.json.items.8'])
+        self.assertEqual(self.log_lines(), [])
+        self.assertEqual(Database(self.path).data, db.data)
+
+    def test_torn_last_line_is_discarded(self):
+        db = Database(self.path)
+        self.make_changes(db)
+        db.close()
+        with open(self.path + '.log', 'ab') as f:
+            f.write(b'{"op": "delete_item", "id": "000", "se')
+
+        reopened = Database(self.path)
+        self.assertEqual(reopened.data, db.data)
+        self.assertEqual(reopened.version, 8)
+
+        # 下次写入时截掉损坏的尾部，新记录接在完整记录后面
+        reopened.add_item(Item('编译原理', '全新', '徐汇', '456', 'b@example.com', '书籍', 'alice',
+                               {'作者': '龙书'}, id='010'))
+        self.assertEqual([json.loads(line)['seq'] for line in self.log_lines()], list(range(1, 10)))
+        again = Database(self.path)
+        self.assertEqual(again.data, reopened.data)
+        self.assertEqual([item['id'] for item in again.get_items()], ['000', '001', '003', '004', '010'])
+
+
+class SortedPageTest(unittest.TestCase):
+    """排序分页逐页拼接等于完整的排序结果，两种存储的结果相同"""
+    QUERIES = [
+        (None, None, None),
+        ('书籍', None, None),
+        (None, '九成新', None),
+        ('家具', None, 'bob'),
+        ('书籍', '算法', 'alice'),
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.json_db = self.make_db('database.json')
+        self.sqlite_db = self.make_db('database.db')
+
+    def tearDown(self):
+        self.json_db.close()
+        self.sqlite_db.close()
+        shutil.rmtree(self.tmp)
+
+    def make_db(self, filename):
+        # 名称、地址有大量重复，检查值相同时按ID排序；插入顺序与ID顺序不同
+        rng = random.Random(0)
+        order = list(range(60))
+        rng.shuffle(order)
+        db = Database(os.path.join(self.tmp, filename))
+        with db.batch():
+            for username in ('alice', 'bob'):
+                db.add_user(User(username, 'pw', username, '地址', '123', 'a@example.com', is_approved=True))
+            for name in ('书籍', '家具'):
+                db.add_item_type(ItemType(name, []))
+            for i in order:
+                db.add_item(Item(rng.choice(['算法导论', '台灯', 'Python', '书架', '算法笔记']),
+                                 rng.choice(['九成新', '全新']), rng.choice(['闵行', '徐汇', 'Minhang']),
+                                 '123', 'a@example.com', '家具' if i % 6 == 0 else '书籍',
+                                 'bob' if i % 4 == 0 else 'alice', id=f'{i:03d}'))
+        return db
+
+    def expected(self, db, query, order_by, descending):
+        items = [item for item in db.get_items() if item_matches(item, *query)]
+        items.sort(key=lambda item: (item[order_by], item['id']), reverse=descending)
+        return [item['id'] for item in items]
+
+    def pages(self, db, query, order_by, descending, limit):
+        item_type, keyword, user = query
+        ids = []
+        offset = 0
+        while True:
+            page, total = db.get_items_page(item_type, keyword, offset, limit, user,
+                                            order_by=order_by, descending=descending)
+            ids.extend(item['id'] for item in page)
+            if offset + limit >= total:
+                return ids, total
+            self.assertEqual(len(page), limit)
+            offset += limit
+
+    def test_pages_match_sorted_list_on_both_stores(self):
+        for query in self.QUERIES:
+            for order_by in SORT_FIELDS:
+                for descending in (False, True):
+                    args = (query, order_by, descending)
+                    expected = self.expected(self.json_db, *args)
+                    for db in (self.json_db, self.sqlite_db):
+                        self.assertEqual([item['id'] for item in db.get_items(*query, order_by=order_by,
+                                                                               descending=descending)],
+                                         expected, args)
+                        self.assertEqual(self.pages(db, *args, limit=7), (expected, len(expected)), args)
+
+    def test_sorted_pages_follow_updates(self):
+        for db in (self.json_db, self.sqlite_db):
+            db.get_items_page(order_by='name')
+            db.update_item('005', {'name': '鼠标'})
+            db.update_item('007', {'name': 'A'})
+            db.delete_item('011')
+        for descending in (False, True):
+            expected = self.expected(self.json_db, (None, None, None), 'name', descending)
+            ascending = expected[::-1] if descending else expected
+            self.assertEqual((ascending[0], ascending[-1]), ('007', '005'))
+            for db in (self.json_db, self.sqlite_db):
+                self.assertEqual(self.pages(db, (None, None, None), 'name', descending, 9),
+                                 (expected, 59))
+
+    def test_both_branches_of_sort_heuristic(self):
+        """count * 物品总数 < 符合条件数² 时沿排序索引查找，否则对符合条件的物品排序，两种做法结果相同"""
+        db = self.json_db
+        books = self.expected(db, ('书籍', None, None), 'address', True)
+        furniture = self.expected(db, ('家具', None, 'bob'), 'address', True)
+        self.assertEqual((len(books), len(furniture)), (50, 5))
+        cases = [
+            # (查询, offset, limit, 是否沿索引查找)
+            (('书籍', None, None), 0, 10, True),     # 10 * 60 < 50 * 50
+            (('书籍', None, None), 40, 10, False),   # 50 * 60 >= 50 * 50
+            (('家具', None, 'bob'), 0, 2, False),    # 2 * 60 >= 5 * 5
+        ]
+        for query, offset, limit, walks_index in cases:
+            expected = books if query[0] == '书籍' else furniture
+            with mock.patch('database.islice', wraps=islice) as spy:
+                page, total = db.get_items_page(query[0], query[1], offset, limit, query[2],
+                                                order_by='address', descending=True)
+            self.assertEqual(spy.called, walks_index, (query, offset))
+            self.assertEqual([item['id'] for item in page], expected[offset:offset + limit])
+            self.assertEqual(total, len(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
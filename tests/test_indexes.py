@@ -0,0 +1,152 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from database import Database
+from indexes import InvertedIndex, KeyIndex, tokenize
+from models import Item, ItemType, User
+
+FIELDS = ('name', 'description')
+
+
+def record(name, description):
+    return SimpleNamespace(name=name, description=description)
+
+
+class InvertedIndexTest(unittest.TestCase):
+    """搜索结果与逐条子串匹配完全一致"""
+    def setUp(self):
+        self.index = InvertedIndex(FIELDS)
+        self.records = {}
+
+    def add(self, doc_id, name, description):
+        self.records[doc_id] = record(name, description)
+        self.index.add(doc_id, self.records[doc_id])
+
+    def scan(self, keyword):
+        keyword = keyword.lower()
+        return [doc_id for doc_id, r in self.records.items()
+                if keyword in '\0'.join(getattr(r, field) for field in FIELDS).lower()]
+
+    def assert_matches_scan(self, keyword):
+        self.assertEqual(self.index.search(keyword), self.scan(keyword), keyword)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('python'), {'pyt', 'yth', 'tho', 'hon'})
+        self.assertEqual(tokenize('二手书'), {'二手', '手书'})
+        # 比 n-gram 短的片段不产生词元
+        self.assertEqual(tokenize('py 书'), set())
+        self.assertEqual(tokenize('ab二手'), {'二手'})
+
+    def test_ascii_trigrams_and_cjk_bigrams(self):
+        self.add('1', 'Python 编程', '九成新')
+        self.add('2', '算法导论', 'python3 入门，九成新')
+        self.add('3', '台灯', 'LED 护眼')
+        for keyword in ('python', 'PYTHON', 'pyth', 'on3', '九成新', '成新', '算法导论', 'led 护眼', '护眼台灯'):
+            self.assert_matches_scan(keyword)
+        self.assertEqual(self.index.search('python'), ['1', '2'])
+
+    def test_keywords_shorter_than_a_gram(self):
+        self.add('1', '书', 'ab')
+        self.add('2', '二手书', 'x')
+        self.add('3', '台灯', 'abc')
+        for keyword in ('书', 'ab', 'a', 'x', '，', ' '):
+            self.assert_matches_scan(keyword)
+
+    def test_keyword_does_not_match_across_fields(self):
+        self.add('1', '自行车', '九成新')
+        self.add('2', 'abc', 'def')
+        for keyword in ('车九', '自行车九成新', 'cde', 'abcdef'):
+            self.assertEqual(self.index.search(keyword), [], keyword)
+        self.assert_matches_scan('车')
+
+    def test_within_restricts_results(self):
+        self.add('1', '二手书', '')
+        self.add('2', '二手书架', '')
+        self.add('3', '书', '')
+        self.assertEqual(self.index.search('二手', [{'2', '3'}]), ['2'])
+        self.assertEqual(self.index.search('书', [{'1', '3'}]), ['1', '3'])
+
+    def test_random_documents_match_scan(self):
+        rng = random.Random(0)
+        alphabet = 'abcAB 二手书九成新，'
+        words = lambda: ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        for doc_id in range(300):
+            self.add(str(doc_id), words(), words())
+        # 更新、删除、改ID之后仍然一致
+        for doc_id in rng.sample(sorted(self.records), 60):
+            self.records[doc_id] = record(words(), words())
+            self.index.update(doc_id, self.records[doc_id])
+        for doc_id in rng.sample(sorted(self.records), 30):
+            del self.records[doc_id]
+            self.index.remove(doc_id)
+        for doc_id in rng.sample(sorted(self.records), 10):
+            self.records[doc_id + 'x'] = self.records.pop(doc_id)
+            self.index.update(doc_id, self.records[doc_id + 'x'], doc_id + 'x')
+        for _ in range(300):
+            keyword = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+            self.assert_matches_scan(keyword)
+
+
+class KeyIndexTest(unittest.TestCase):
+    def test_move_keeps_insertion_order(self):
+        index = KeyIndex()
+        for doc_id, key in [('1', 'a'), ('2', 'b'), ('3', 'a'), ('4', 'b')]:
+            index.add(key, doc_id)
+        index.move('b', 'a', '2')
+        self.assertEqual(list(index.get('a')), ['1', '2', '3'])
+        self.assertEqual(list(index.get('b')), ['4'])
+        index.move('a', 'b', '1')
+        self.assertEqual(list(index.get('b')), ['1', '4'])
+
+    def test_rename_onto_existing_key_merges_in_order(self):
+        index = KeyIndex()
+        for doc_id, key in [('1', 'a'), ('2', 'b'), ('3', 'a')]:
+            index.add(key, doc_id)
+        index.rename('b', 'a')
+        self.assertEqual(list(index.get('a')), ['1', '2', '3'])
+
+
+class KeyIndexOrderTest(unittest.TestCase):
+    """按类型、所有者筛选的结果与不筛选时的顺序一致，修改类型、所有者后以及重新加载后都不变"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'database.json')
+        self.db = Database(self.path)
+        with self.db.batch():
+            for username in ('alice', 'bob'):
+                self.db.add_user(User(username, 'pw', username, '地址', '123', 'a@example.com', is_approved=True))
+            for name in ('书籍', '家具'):
+                self.db.add_item_type(ItemType(name, []))
+            for i in range(6):
+                self.db.add_item(Item(f'物品{i}', '九成新', '闵行', '123', 'a@example.com',
+                                      '书籍' if i % 2 else '家具', 'alice' if i < 3 else 'bob', id=f'{i:03d}'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def assert_consistent(self, db):
+        all_ids = [item['id'] for item in db.get_items()]
+        for item_type in ('书籍', '家具'):
+            expected = [item['id'] for item in db.get_items() if item['item_type'] == item_type]
+            self.assertEqual([item['id'] for item in db.get_items(item_type)], expected)
+            self.assertEqual([item['id'] for item in db.get_items(item_type, keyword='九成新')], expected)
+        for user in ('alice', 'bob'):
+            expected = [item_id for item_id in all_ids if db.get_item(item_id)['user'] == user]
+            self.assertEqual([item['id'] for item in db.get_items(user=user)], expected)
+
+    def test_order_after_changing_type_and_user(self):
+        self.assert_consistent(self.db)
+        self.db.update_item('005', {'item_type': '家具'})
+        self.db.update_item('000', {'item_type': '书籍', 'user': 'bob'})
+        self.assertEqual([item['id'] for item in self.db.get_items('书籍')], ['000', '001', '003'])
+        self.assert_consistent(self.db)
+        self.db.close()
+        self.assert_consistent(Database(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from database import Database
+from models import User
+from passwords import PasswordHasher, hasher
+
+
+class PasswordHasherTest(unittest.TestCase):
+    def test_rejects_stored_params_above_cost_limit(self):
+        # 参数超出上限时不计算 scrypt，直接判为失败
+        self.assertFalse(hasher.verify('pw', 'scrypt$1073741824$8$1$AAAA$AAAA'))
+        self.assertFalse(hasher.verify('pw', 'scrypt$16384$8$100000$AAAA$AAAA'))
+        self.assertFalse(hasher.verify('pw', 'scrypt$16384$0$1$AAAA$AAAA'))
+        with self.assertRaises(ValueError):
+            PasswordHasher(n=2 ** 30)
+
+
+class UserPasswordTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmp, 'database.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_password_that_looks_hashed_is_hashed(self):
+        password = 'scrypt$2$1$1$AAAA$AAAA'
+        self.db.add_user(User('alice', password, '张三', '一号楼', '123', 'a@example.com'))
+        self.assertNotEqual(self.db.get_user('alice')['password'], password)
+        self.assertTrue(self.db.verify_password('alice', password))
+        self.db.update_user('alice', {'password': password + '1'})
+        self.assertTrue(self.db.verify_password('alice', password + '1'))
+
+    def test_hashed_requires_a_hash(self):
+        with self.assertRaises(ValueError):
+            self.db.add_user(User('alice', 'pw', '张三', '一号楼', '123', 'a@example.com'), hashed=True)
+        self.db.add_user(User('alice', hasher.hash('pw'), '张三', '一号楼', '123', 'a@example.com'), hashed=True)
+        self.assertTrue(self.db.verify_password('alice', 'pw'))
+
+
+if __name__ == '__main__':
+    unittest.main()